@@ -0,0 +1,63 @@
+"""
+Scaling benchmark for the representation converters of :code:`pytom.libs.bjorklund`.
+
+Compares the current converters on lists and numpy arrays against the previous quadratic implementations.
+The quadratic ones are only timed up to :code:`LEGACY_LIMIT` steps.
+
+Usage::
+
+    $ python benchmarks/converters.py
+"""
+from functools import reduce
+from timeit import Timer
+
+import numpy as np
+
+from pytom.libs.bjorklund import bjorklund, steps_to_durations, durations_to_steps, steps_to_indices, \
+    indices_and_n_steps_to_steps
+
+SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+LEGACY_LIMIT = 10 ** 4
+
+
+def legacy_steps_to_durations(steps):
+    index = steps.index(1)
+    return reduce(lambda x, y: x[:-1] + [x[-1] + 1] if y == 0 else x + [y], steps[index:] + steps[:index], [])
+
+
+def legacy_durations_to_steps(durations):
+    return sum([[1] + [0] * (x - 1) for x in durations], [])
+
+
+def best_of(func, *args, repeat=3):
+    timer = Timer(lambda: func(*args))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    print(f"{'function':<30}{'n_steps':>10}{'legacy':>12}{'list':>12}{'numpy':>12}")
+    for n_steps in SIZES:
+        pattern = bjorklund(n_steps, n_steps // 3 + 1)
+        steps, durations, indices = pattern.steps, pattern.durations, pattern.indices
+        steps_array, durations_array, indices_array = np.array(steps), np.array(durations), np.array(indices)
+
+        rows = [
+            ('steps_to_durations', legacy_steps_to_durations, steps_to_durations, (steps,), (steps_array,)),
+            ('durations_to_steps', legacy_durations_to_steps, durations_to_steps, (durations,), (durations_array,)),
+            ('steps_to_indices', None, steps_to_indices, (steps,), (steps_array,)),
+            ('indices_and_n_steps_to_steps', None, indices_and_n_steps_to_steps, (indices, n_steps),
+             (indices_array, n_steps)),
+        ]
+        for name, legacy, current, args, array_args in rows:
+            if legacy is not None and n_steps <= LEGACY_LIMIT:
+                legacy_time = f"{best_of(legacy, *args) * 1e3:.3f}ms"
+            else:
+                legacy_time = '-'
+            list_time = best_of(current, *args) * 1e3
+            array_time = best_of(current, *array_args) * 1e3
+            print(f"{name:<30}{n_steps:>10}{legacy_time:>12}{list_time:>10.3f}ms{array_time:>10.3f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark suite for the hot paths of the rhythm engine.
+
+Times :code:`bjorklund`, :code:`euclid`, the representation converters (including bitmasks), :code:`Bjorklund.__eq__`,
+:code:`Bjorklund.__add__`, the rotations, :code:`uglyness` and :code:`total_uglyness` on Euclidean rhythms from 8 to
+:code:`10 ** 5` steps, with a third of the steps as beats. Results are saved as JSON, and two runs can be compared to
+catch regressions.
+
+Usage::
+
+    $ python benchmarks/suite.py run --output before.json
+    $ python benchmarks/suite.py run --output after.json --filter uglyness --max-steps 4096
+    $ python benchmarks/suite.py compare before.json after.json --threshold 1.25
+"""
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime
+from timeit import Timer
+
+from pytom.libs.bjorklund import Bjorklund, bjorklund, steps_to_durations, durations_to_steps, steps_to_indices, \
+    indices_and_n_steps_to_steps, steps_to_mask, mask_to_steps, mask_to_indices
+from pytom.libs.euclid import euclid, euclidean_durations
+
+SIZES = [8, 64, 512, 4096, 32768, 10 ** 5]
+
+# A single call slower than this is only timed once per repetition.
+SLOW_CALL = 1.0
+
+
+def n_beats_of(n_steps):
+    return n_steps // 3 + 1
+
+
+def uncached(func):
+    """Clear the memoization cache of Euclidean durations before each call, so the algorithm itself is timed."""
+    def wrapper(n_steps, n_beats):
+        euclidean_durations.cache_clear()
+        return func(n_steps, n_beats)
+    return wrapper
+
+
+uncached_bjorklund = uncached(bjorklund)
+uncached_euclid = uncached(euclid)
+
+
+def cases(n_steps):
+    """Benchmarks of size :code:`n_steps`, as :code:`(name, function)` pairs."""
+    n_beats = n_beats_of(n_steps)
+    x = bjorklund(n_steps, n_beats)
+    y = Bjorklund(list(reversed(x.durations)), 1)
+    # Steps of `other` are as many as beats of `x`, so the sum has as many durations as `x`.
+    other = bjorklund(n_beats, n_beats_of(n_beats))
+    steps, durations, indices, mask = x.steps, x.durations, x.indices, x.mask
+    # Rotations change the rhythm in place, so they get their own copies.
+    step_rotated, duration_rotated = Bjorklund(durations), Bjorklund(durations)
+
+    return [
+        ('bjorklund', lambda: uncached_bjorklund(n_steps, n_beats)),
+        ('euclid', lambda: uncached_euclid(n_steps, n_beats)),
+        ('steps_to_durations', lambda: steps_to_durations(steps)),
+        ('durations_to_steps', lambda: durations_to_steps(durations)),
+        ('steps_to_indices', lambda: steps_to_indices(steps)),
+        ('indices_and_n_steps_to_steps', lambda: indices_and_n_steps_to_steps(indices, n_steps)),
+        ('steps_to_mask', lambda: steps_to_mask(steps)),
+        ('mask_to_steps', lambda: mask_to_steps(mask, n_steps)),
+        ('mask_to_indices', lambda: mask_to_indices(mask)),
+        ('__eq__', lambda: x == y),
+        ('__add__', lambda: x + other),
+        ('rotate_steps', lambda: step_rotated.rotate_steps(1)),
+        ('rotate_durations', lambda: duration_rotated.rotate_durations(1)),
+        ('uglyness', lambda: x.uglyness(n_beats // 2)),
+        ('total_uglyness', lambda: x.total_uglyness()),
+    ]
+
+
+def best_of(func, repeat):
+    """Best time of a single call, in seconds."""
+    timer = Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed / number > SLOW_CALL:
+        number = 1
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(args):
+    results = {}
+    for n_steps in [size for size in SIZES if size <= args.max_steps]:
+        for name, func in cases(n_steps):
+            if args.filter and not any(word in name for word in args.filter):
+                continue
+            key = f"{name}/{n_steps}"
+            results[key] = best_of(func, args.repeat)
+            print(f"{key:<40}{results[key] * 1e3:>14.4f}ms", flush=True)
+
+    if args.output:
+        report = {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': sys.modules['numpy'].__version__ if 'numpy' in sys.modules else None,
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+def compare(args):
+    with open(args.before) as f:
+        before = json.load(f)['results']
+    with open(args.after) as f:
+        after = json.load(f)['results']
+
+    regressions = 0
+    print(f"{'benchmark':<40}{'before':>14}{'after':>14}{'ratio':>8}")
+    for key in [key for key in before if key in after]:
+        ratio = after[key] / before[key]
+        flag = ''
+        if ratio > args.threshold:
+            regressions += 1
+            flag = '  slower'
+        elif ratio < 1 / args.threshold:
+            flag = '  faster'
+        print(f"{key:<40}{before[key] * 1e3:>12.4f}ms{after[key] * 1e3:>12.4f}ms{ratio:>8.2f}{flag}")
+
+    missing = set(before) ^ set(after)
+    if missing:
+        print(f"{len(missing)} benchmark(s) only in one of the runs")
+    print(f"{regressions} regression(s) slower than {args.threshold}x")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rhythm engine.")
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    run_parser = commands.add_parser('run', help="run the benchmarks")
+    run_parser.add_argument('--output', help="save the results to this JSON file")
+    run_parser.add_argument('--max-steps', type=int, default=max(SIZES), help="largest number of steps")
+    run_parser.add_argument('--repeat', type=int, default=3, help="repetitions, the best one is kept")
+    run_parser.add_argument('--filter', nargs='+', help="only run benchmarks whose name contains one of these")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help="compare two saved runs")
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+    compare_parser.add_argument('--threshold', type=float, default=1.25,
+                                help="report benchmarks slower by more than this ratio (exits with 1 if any)")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
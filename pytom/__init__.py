@@ -6,6 +6,24 @@ __author__ = """Sahin Kureta"""
 __email__ = 'skureta@gmail.com'
 __version__ = '0.1.6'
 
-from .libs.bjorklund import Bjorklund
+__all__ = ['Bjorklund', 'Rhythm']
 
-__all__ = ['Bjorklund']
+# Classes are imported on first access, so that importing pytom (and starting the command line) stays fast. Module
+# __getattr__ (PEP 562) needs Python 3.7.
+_lazy_imports = {
+    'Bjorklund': 'pytom.libs.bjorklund',
+    'Rhythm': 'pytom.libs.rhythm',
+}
+
+
+def __getattr__(name):
+    if name in _lazy_imports:
+        from importlib import import_module
+        value = getattr(import_module(_lazy_imports[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
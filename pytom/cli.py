@@ -3,27 +3,329 @@
 """Console script for pytom.
 Usage::
 
-    $ pytom --bjorklund 8 3
-    [3, 2, 3]
+    $ pytom euclidean --steps-beats 8 3
+    <3 2 3>
+    $ printf '8 3\\n13 5\\n' | pytom euclidean --input - --jobs 4
+    {"n_steps": 8, "n_beats": 3, "durations": [3, 2, 3]}
+    {"n_steps": 13, "n_beats": 5, "durations": [3, 2, 3, 3, 2]}
+    $ pytom is-bjorklund '3 3 2' '1 3 4' --format csv
+    line,durations,offset,is_bjorklund,error
+    1,3 3 2,0,true,
+    2,1 3 4,0,false,
 
 """
+import sys
+from itertools import islice
+
 import click
 
-from pytom.libs.bjorklund import bjorklund
+# Everything else is imported by the commands that use it, so that `pytom --help` and simple commands start fast.
+
+NOTATIONS = ['durations', 'steps', 'indices']
+
+
+def _read_pairs(lines):
+    """Parse one :code:`n_steps n_beats` pair per line. Commas also separate, blank lines and :code:`#` comments are
+    skipped. Yields :code:`(n_steps, n_beats, error)`, where the numbers are :code:`None` if the line is malformed."""
+    for line_number, line in enumerate(lines, 1):
+        line = line.split('#', 1)[0].replace(',', ' ').split()
+        if not line:
+            continue
+        try:
+            n_steps, n_beats = map(int, line)
+        except ValueError:
+            yield None, None, f"Line {line_number}: expected two integers!"
+            continue
+        yield n_steps, n_beats, None
+
+
+def _parse_pattern(line, notation):
+    """
+    Parse a pattern in :code:`notation`. Numbers are separated by spaces or commas.
+
+    * durations: :code:`3 2 3`, optionally followed by :code:`/ <offset>`
+    * steps: :code:`1 0 0 1 0 1 0 0` or :code:`10010100`
+    * indices: :code:`0 3 5 / <n_steps>`
+    """
+    from pytom.libs.bjorklund import Bjorklund
+
+    values, _, parameter = line.replace(',', ' ').partition('/')
+    values = values.split()
+    if notation == 'steps' and len(values) == 1:
+        values = list(values[0])
+    try:
+        values = [int(x) for x in values]
+        parameter = int(parameter) if parameter.strip() else None
+    except ValueError:
+        raise ValueError("Patterns can only contain integers!")
+
+    if notation == 'durations':
+        # Bjorklund would print a warning and move the first beat instead.
+        if values and parameter is not None and not 0 <= parameter < values[-1]:
+            raise ValueError("Offset must be at least 0 and less than the last duration!")
+        return Bjorklund(values, parameter or 0)
+    if notation == 'steps':
+        if parameter is not None:
+            raise ValueError("Steps do not take a parameter!")
+        return Bjorklund.from_steps(values)
+    if parameter is None:
+        raise ValueError("Indices need the number of steps after a '/'!")
+    return Bjorklund.from_indices_and_n_steps(values, parameter)
+
+
+def _read_patterns(lines, notation):
+    """Parse one pattern per line. Blank lines and :code:`#` comments are skipped. Yields :code:`(line_number, rhythm,
+    error)`."""
+    for line_number, line in enumerate(lines, 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        try:
+            yield line_number, _parse_pattern(line, notation), None
+        except ValueError as e:
+            yield line_number, None, str(e)
+
+
+def _representations(rhythm, notations):
+    row = {}
+    for notation in notations:
+        if notation == 'durations':
+            row.update(durations=rhythm.durations, offset=rhythm.offset)
+        elif notation == 'steps':
+            row.update(steps=rhythm.steps)
+        else:
+            row.update(indices=rhythm.indices, n_steps=rhythm.n_steps)
+    return row
+
+
+def _representation_columns(notations):
+    columns = {'durations': ['durations', 'offset'], 'steps': ['steps'], 'indices': ['indices', 'n_steps']}
+    return [column for notation in notations for column in columns[notation]]
+
+
+def _write_rows(rows, columns, output_format):
+    """Write dictionary rows as JSON Lines, where missing (:code:`None`) values are left out, or as CSV, where lists
+    are separated by spaces."""
+    import csv
+    import json
+
+    out = sys.stdout
+    if output_format == 'jsonl':
+        for row in rows:
+            out.write(json.dumps({key: row[key] for key in columns if row.get(key) is not None}) + '\n')
+        return
+
+    def cell(value):
+        if value is None:
+            return ''
+        if isinstance(value, bool):
+            return str(value).lower()
+        if isinstance(value, (list, tuple)):
+            return ' '.join(map(str, value))
+        return value
+
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([cell(row.get(key)) for key in columns])
+
+
+def _pattern_rows(patterns, input_file, notation, analyse):
+    """Rows of :code:`analyse(rhythm)` for each pattern, with their line numbers. Errors are reported per row."""
+    lines = patterns if patterns else input_file
+    for line_number, rhythm, error in _read_patterns(lines, notation):
+        row = {'line': line_number}
+        if error is None:
+            try:
+                row.update(analyse(rhythm))
+            except (ValueError, ZeroDivisionError) as e:
+                error = str(e)
+        row['error'] = error
+        yield row
+
+
+def pattern_options(command):
+    """Arguments and options shared by the commands that read patterns."""
+    options = [
+        click.argument('patterns', nargs=-1),
+        click.option('--input', 'input_file', type=click.File('r'), default='-', metavar='<file>',
+                     help='Read patterns, one per line, from a file when none are given as arguments (default: stdin)'),
+        click.option('--notation', type=click.Choice(NOTATIONS), default='durations',
+                     help='Notation of the patterns: "3 2 3 / <offset>", "10010100" or "0 3 5 / <steps>"'),
+        click.option('--format', 'output_format', type=click.Choice(['jsonl', 'csv']), default='jsonl',
+                     help='Output format'),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def _euclidean_row(pair):
+    from pytom.libs.euclid import euclidean_durations
+
+    n_steps, n_beats, error = pair
+    row = {'n_steps': n_steps, 'n_beats': n_beats, 'error': error}
+    if error is None:
+        try:
+            row['durations'] = list(euclidean_durations(n_steps, n_beats))
+        except ValueError as e:
+            row['error'] = str(e)
+    return row
+
+
+def _euclidean_chunk(pairs):
+    return [_euclidean_row(pair) for pair in pairs]
+
+
+def _euclidean_rows(pairs, jobs, chunk_size):
+    if jobs == 1:
+        yield from map(_euclidean_row, pairs)
+        return
+
+    import threading
+    from multiprocessing import Pool
+
+    # `Pool.imap` keeps the input order and yields each chunk as soon as it is done, instead of waiting for a whole
+    # batch. Chunks are made here, so that each one is a single task and a single result. The feeder thread of the
+    # pool reads its input as fast as it can, so only a few chunks per worker are let in ahead of the output, and
+    # memory stays bounded however long the stream is.
+    window = threading.Semaphore(4 * jobs)
+    stop = threading.Event()
+
+    def chunks():
+        while True:
+            chunk = list(islice(pairs, chunk_size))
+            window.acquire()
+            if not chunk or stop.is_set():
+                return
+            yield chunk
+
+    with Pool(jobs) as pool:
+        try:
+            for rows in pool.imap(_euclidean_chunk, chunks()):
+                window.release()
+                yield from rows
+        finally:
+            # Wake the feeder up if the output is closed early, so that the pool can shut down.
+            stop.set()
+            window.release()
 
 
 @click.group()
-def main():
-    pass
+@click.option('--profile', is_flag=True,
+              help='Count and time conversions, constructions, rotations and uglyness, and report them on stderr')
+@click.pass_context
+def main(ctx, profile):
+    if profile:
+        from pytom.libs import profiling
+
+        def report():
+            profiling.disable()
+            click.echo(profiling.report(), err=True)
+
+        profiling.reset()
+        profiling.enable()
+        ctx.call_on_close(report)
 
 
 @click.command()
 @click.option('--steps-beats', nargs=2, type=int, metavar='<int> <int>',
               help='Number of steps and number of pulses')
-def euclidean(steps_beats):
-    """Euclidean rhthym given a number of steps and a number of pulses to evenly distribute."""
-    click.echo(repr(bjorklund(*steps_beats)))
+@click.option('--input', 'input_file', type=click.File('r'), metavar='<file>',
+              help='Read many "<steps> <pulses>" pairs, one per line, from a file ("-" for stdin)')
+@click.option('--format', 'output_format', type=click.Choice(['jsonl', 'csv']), default='jsonl',
+              help='Output format of --input results')
+@click.option('--jobs', type=click.IntRange(min=1), default=1, metavar='<int>', help='Number of worker processes')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=1024, metavar='<int>',
+              help='Pairs sent to a worker at a time')
+def euclidean(steps_beats, input_file, output_format, jobs, chunk_size):
+    """Euclidean rhthym given a number of steps and a number of pulses to evenly distribute.
+
+    With --input, results are streamed in input order, as JSON Lines or CSV.
+    """
+    if steps_beats and input_file is not None:
+        raise click.UsageError("--steps-beats and --input are mutually exclusive!")
+    if input_file is None:
+        if not steps_beats:
+            raise click.UsageError("Either --steps-beats or --input is required!")
+        from pytom.libs.bjorklund import bjorklund
+        click.echo(repr(bjorklund(*steps_beats)))
+        return 0
+
+    rows = _euclidean_rows(_read_pairs(input_file), jobs, chunk_size)
+    _write_rows(rows, ['n_steps', 'n_beats', 'durations', 'error'], output_format)
+    return 0
+
+
+@click.command()
+@pattern_options
+def uglyness(patterns, input_file, notation, output_format):
+    """Uglyness of each beat and total uglyness of patterns, as defined in Bjorklund (2003)."""
+    def analyse(rhythm):
+        row = _representations(rhythm, [notation])
+        row.update(uglyness=rhythm.uglyness_profile() if rhythm.n_beats > 1 else None,
+                   total_uglyness=rhythm.total_uglyness())
+        return row
+
+    columns = ['line'] + _representation_columns([notation]) + ['uglyness', 'total_uglyness', 'error']
+    _write_rows(_pattern_rows(patterns, input_file, notation, analyse), columns, output_format)
+    return 0
+
+
+@click.command(name='is-bjorklund')
+@pattern_options
+def is_bjorklund(patterns, input_file, notation, output_format):
+    """Whether patterns are Euclidean rhythms, up to rotation."""
+    def analyse(rhythm):
+        row = _representations(rhythm, [notation])
+        row.update(is_bjorklund=rhythm.is_bjorklund())
+        return row
+
+    columns = ['line'] + _representation_columns([notation]) + ['is_bjorklund', 'error']
+    _write_rows(_pattern_rows(patterns, input_file, notation, analyse), columns, output_format)
+    return 0
+
+
+@click.command()
+@pattern_options
+@click.option('--to', 'notations', type=click.Choice(NOTATIONS), multiple=True,
+              help='Output notations, can be repeated (default: all)')
+def convert(patterns, input_file, notation, output_format, notations):
+    """Convert patterns between the durations, steps and indices notations."""
+    notations = notations or NOTATIONS
+    columns = ['line'] + _representation_columns(notations) + ['error']
+    rows = _pattern_rows(patterns, input_file, notation, lambda rhythm: _representations(rhythm, notations))
+    _write_rows(rows, columns, output_format)
+    return 0
+
+
+@click.command()
+@pattern_options
+@click.option('--steps', 'n_steps', type=int, default=0, metavar='<int>', help='Rotate stepwise')
+@click.option('--durations', 'n_durations', type=int, default=0, metavar='<int>',
+              help='Rotate by durations, before the stepwise rotation')
+@click.option('--to', 'notations', type=click.Choice(NOTATIONS), multiple=True,
+              help='Output notations, can be repeated (default: input notation)')
+def rotate(patterns, input_file, notation, output_format, n_steps, n_durations, notations):
+    """Rotate patterns. Same as Bjorklund.rotate_durations and Bjorklund.rotate_steps."""
+    notations = notations or [notation]
+
+    def analyse(rhythm):
+        durations = rhythm.durations
+        # The offset is kept, so it must still be less than the last duration after the rotation.
+        if durations and rhythm.offset >= durations[-(n_durations % len(durations)) - 1]:
+            raise ValueError("Offset must be less than the last duration after the rotation!")
+        rhythm.rotate_durations(n_durations)
+        rhythm.rotate_steps(n_steps)
+        return _representations(rhythm, notations)
+
+    columns = ['line'] + _representation_columns(notations) + ['error']
+    _write_rows(_pattern_rows(patterns, input_file, notation, analyse), columns, output_format)
     return 0
 
 
 main.add_command(euclidean)
+main.add_command(uglyness)
+main.add_command(is_bjorklund)
+main.add_command(convert)
+main.add_command(rotate)
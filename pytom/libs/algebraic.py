@@ -1,80 +1,384 @@
 from fractions import Fraction
-from math import gcd
-from typing import List, Union
+from typing import List, Optional, Tuple
 
-from anytree import NodeMixin
+from pytom.libs import uglyness
+from pytom.libs.core import _numpy
+from pytom.libs.euclid import euclid, steps_from_beat_durations, indices_from_steps
+from pytom.libs.profiling import instrumented
 
 
-def indices_from_steps(steps: List[int]) -> List[int]:
-    return [index for index, value in enumerate(steps) if value == 1]
+class RhythmTree:
+    """
+    RhythmTree(duration=1, signature=None)
 
+    OpenMusic-style rhythm tree. The duration of a node is divided between its children in proportion to their
+    weights, and negative weights are rests, as are all the nodes under them. Subdivisions are given as lists of
+    weights or as :code:`Euclid` proportions, whose beat durations are the weights.
 
-def steps_from_beat_durations(durations: List[int]) -> List[int]:
-    if any(x <= 0 for x in durations):
-        raise ValueError("Negative or zero length durations do not make sense!")
+    Nodes are integers, stored in flat arrays instead of as objects: node 0 is the root, and each node has a parent, a
+    weight and a number of children. Parents are always added before their children, so the tree is built and
+    flattened without recursion, however deep it is.
 
-    return sum([[1] + [0] * (x - 1) for x in durations], [])
+    The root and the measures of a voice can have a time signature :code:`(numerator, denominator)`. It is kept as it
+    is written, so that 6/8 is not 3/4, but it does not change the rhythm: the duration of the root is the signature,
+    and a measure's share of its parent is still its weight.
 
+    >>> tree = RhythmTree.from_nested((2, [1, (2, Euclid(8, 3)), -1]))
+    >>> len(tree), tree.children(0), tree.children(2)
+    (7, [1, 2, 6], [3, 4, 5])
+    >>> onsets, durations = tree.flatten()
+    >>> [str(x) for x in onsets], [str(x) for x in durations]
+    (['0', '1/2', '7/8', '9/8'], ['1/2', '3/8', '1/4', '3/8'])
+    >>> tree.flatten(exact=False, rests=True)
+    ([0.0, 0.5, 0.875, 1.125, 1.5], [0.5, 0.375, 0.25, 0.375, -0.5])
+    """
 
-def distribute_remainder(duration: int, remainder: Union[int, List[int]]) -> List[int]:
-    if isinstance(remainder, int):
-        remainder = [remainder]
-    remainder_steps = steps_from_beat_durations(remainder)
+    def __init__(self, duration=1, signature: Tuple[int, int] = None):
+        if signature is not None:
+            self._check_signature(signature)
+            duration = Fraction(*signature)
+        duration = Fraction(duration)
+        if duration <= 0:
+            raise ValueError("Duration of a rhythm tree must be positive!")
+        self.duration = duration
+        self._parents = [-1]
+        self._weights = [1]
+        self._n_children = [0]
+        # Time signatures of the nodes that have one, as written.
+        self._signatures = {} if signature is None else {0: tuple(signature)}
+        # Children of every node, in the order they were added, as (offsets, nodes). Built when first needed.
+        self._children = None
 
-    durations = [duration] * len(remainder_steps)
+    @classmethod
+    def from_nested(cls, tree) -> 'RhythmTree':
+        """
+        Build a tree from OpenMusic's nested notation :code:`(duration, subdivisions)`. Each subdivision is a weight,
+        a :code:`(weight, subdivisions)` pair or a :code:`Euclid`, which is a subdivision of weight 1.
 
-    return [x + y for x, y in zip(durations, remainder_steps)]
+        :param tree: :code:`(duration, subdivisions)`, where subdivisions are a list or a :code:`Euclid`
+        """
+        duration, subdivisions = tree
+        self = cls(duration)
+        # Depth-first with an explicit stack, so nodes are numbered in time order.
+        stack = [(0, iter(cls._as_weights(subdivisions)))]
+        while stack:
+            parent, subdivisions = stack[-1]
+            subdivision = next(subdivisions, None)
+            if subdivision is None:
+                stack.pop()
+            elif isinstance(subdivision, Euclid):
+                stack.append((self.add(parent, 1), iter(subdivision.beat_durations)))
+            elif isinstance(subdivision, (tuple, list)):
+                weight, children = subdivision
+                stack.append((self.add(parent, weight), iter(cls._as_weights(children))))
+            else:
+                self.add(parent, subdivision)
+        return self
 
+    @staticmethod
+    def _as_weights(subdivisions):
+        return subdivisions.beat_durations if isinstance(subdivisions, Euclid) else subdivisions
 
-def euclid(n_steps: int, n_beats: int) -> List[int]:
-    if n_beats <= 0 or n_steps <= 0:
-        raise ValueError("Negative or zero number of steps or beats do not make sense!")
-    if n_beats > n_steps:
-        raise ValueError("Number of beats cannot be more than the number of steps!")
+    @staticmethod
+    def _check_signature(signature):
+        if len(signature) != 2 or any(not isinstance(x, int) or x <= 0 for x in signature):
+            raise ValueError("Time signatures must be pairs of positive integers!")
 
-    quotient, remainder = divmod(n_steps, n_beats)
-    if remainder == 0:
-        return [quotient] * n_beats
+    def __len__(self) -> int:
+        return len(self._parents)
 
-    return distribute_remainder(quotient, euclid(n_beats, remainder))
+    def add(self, parent: int, weight: int, signature: Tuple[int, int] = None) -> int:
+        """
+        Add a child at the end of the children of :code:`parent`.
 
+        :param parent: parent node
+        :param weight: proportion of the child, negative for a rest
+        :param signature: time signature of the child, if it is a measure
+        :return: the new node
+        """
+        if not 0 <= parent < len(self._parents):
+            raise ValueError("Parent is not a node of the tree!")
+        if not isinstance(weight, int) or weight == 0:
+            raise ValueError("Weights must be non-zero integers!")
+        if signature is not None:
+            self._check_signature(signature)
+            self._signatures[len(self._parents)] = tuple(signature)
+        self._parents.append(parent)
+        self._weights.append(weight)
+        self._n_children.append(0)
+        self._n_children[parent] += 1
+        self._children = None
+        return len(self._parents) - 1
 
-class RhythmTree:
-    """
+    def subdivide(self, node: int, subdivisions) -> List[int]:
+        """
+        Add children to :code:`node`.
+
+        :param node: node to subdivide
+        :param subdivisions: list of weights, or a :code:`Euclid` whose beat durations are the weights
+        :return: the new nodes
+        """
+        return [self.add(node, weight) for weight in self._as_weights(subdivisions)]
+
+    def parent(self, node: int) -> int:
+        return self._parents[node]
+
+    def weight(self, node: int) -> int:
+        return self._weights[node]
+
+    def signature(self, node: int) -> Optional[Tuple[int, int]]:
+        return self._signatures.get(node)
+
+    def is_leaf(self, node: int) -> bool:
+        return self._n_children[node] == 0
+
+    def is_rest(self, node: int) -> bool:
+        return self._weights[node] < 0
+
+    def children(self, node: int) -> List[int]:
+        if self._children is None:
+            # Counting sort of the nodes by parent, which keeps them in the order they were added.
+            offsets = [0] * (len(self._parents) + 1)
+            for i, count in enumerate(self._n_children):
+                offsets[i + 1] = offsets[i] + count
+            nodes = [0] * (len(self._parents) - 1)
+            position = offsets[:-1]
+            for i in range(1, len(self._parents)):
+                parent = self._parents[i]
+                nodes[position[parent]] = i
+                position[parent] += 1
+            self._children = offsets, nodes
+        offsets, nodes = self._children
+        return nodes[offsets[node]:offsets[node + 1]]
+
+    @instrumented('rhythm tree')
+    def flatten(self, exact: bool = True, rests: bool = False):
+        """
+        Onsets and durations of the leaves, in time order.
+
+        Exact values are computed in a single pass over the nodes with integers over a common denominator per node,
+        and only the leaves are made :code:`Fraction`. Float values are computed with NumPy one level of the tree at a
+        time, when it is installed.
+
+        :param exact: :code:`Fraction` values if true, else floats
+        :param rests: include rests, with negative durations as in OpenMusic. Leaves under a rest are rests.
+        :return: :code:`(onsets, durations)` lists
+        """
+        if not exact and _numpy() is not None:
+            return self._flatten_float(rests)
+        onsets, durations = self._flatten_exact(rests)
+        if not exact:
+            onsets, durations = [float(x) for x in onsets], [float(x) for x in durations]
+        return onsets, durations
+
+    def _flatten_exact(self, rests):
+        parents, weights = self._parents, self._weights
+        n = len(parents)
+        totals = [0] * n
+        for i in range(1, n):
+            totals[parents[i]] += abs(weights[i])
+
+        # Onset and duration of node i are onset_numerators[i] / denominators[i] and numerators[i] / denominators[i].
+        numerators, onset_numerators, denominators = [0] * n, [0] * n, [0] * n
+        numerators[0], denominators[0] = self.duration.numerator, self.duration.denominator
+        # Weight of the children of each node that are already placed.
+        placed = [0] * n
+        rest = [False] * n
+        for i in range(1, n):
+            p = parents[i]
+            rest[i] = rest[p] or weights[i] < 0
+            total, weight = totals[p], abs(weights[i])
+            denominators[i] = denominators[p] * total
+            onset_numerators[i] = onset_numerators[p] * total + placed[p] * numerators[p]
+            numerators[i] = numerators[p] * weight
+            placed[p] += weight
+
+        leaves = [i for i in range(n) if totals[i] == 0 and (rests or not rest[i])]
+        onsets = [Fraction(onset_numerators[i], denominators[i]) for i in leaves]
+        durations = [Fraction(-numerators[i] if rest[i] else numerators[i], denominators[i]) for i in leaves]
+        if any(a > b for a, b in zip(onsets, onsets[1:])):
+            order = sorted(range(len(leaves)), key=onsets.__getitem__)
+            onsets, durations = [onsets[i] for i in order], [durations[i] for i in order]
+        return onsets, durations
+
+    def _flatten_float(self, rests):
+        np = _numpy()
+        parents = np.array(self._parents, dtype=np.intp)
+        signed = np.array(self._weights, dtype=float)
+        weights = np.abs(signed)
+        n = len(parents)
+        n_children = np.array(self._n_children, dtype=np.intp)
+        totals = np.bincount(parents[1:], weights=weights[1:], minlength=n)
+
+        # Children sorted by parent, and the weight of their earlier siblings from a cumulative sum within each group.
+        by_parent = np.argsort(parents[1:], kind='stable') + 1
+        sibling_weights = weights[by_parent]
+        earlier = np.cumsum(sibling_weights) - sibling_weights
+        first = np.ones(n - 1, dtype=bool)
+        first[1:] = parents[by_parent][1:] != parents[by_parent][:-1]
+        earlier -= earlier[first][np.cumsum(first) - 1]
+        placed = np.zeros(n)
+        placed[by_parent] = earlier
+        offsets = np.concatenate(([0], np.cumsum(n_children)))
+
+        onsets, durations = np.zeros(n), np.zeros(n)
+        durations[0] = float(self.duration)
+        # -1 for rests and the nodes under them, else 1.
+        signs = np.ones(n)
+        level = np.array([0], dtype=np.intp)
+        while True:
+            counts = n_children[level]
+            level = level[counts > 0]
+            counts = counts[counts > 0]
+            if not len(level):
+                break
+            # Positions of the children of the whole level in `by_parent`.
+            starts = np.repeat(offsets[level] - np.cumsum(counts) + counts, counts)
+            level = by_parent[starts + np.arange(counts.sum())]
+            p = parents[level]
+            scale = durations[p] / totals[p]
+            onsets[level] = onsets[p] + placed[level] * scale
+            durations[level] = weights[level] * scale
+            signs[level] = np.minimum(signs[p], np.sign(signed[level]))
+
+        leaves = totals == 0
+        if not rests:
+            leaves &= signs > 0
+        onsets, durations = onsets[leaves], (durations * signs)[leaves]
+        order = np.argsort(onsets, kind='stable')
+        return onsets[order].tolist(), durations[order].tolist()
+
+
+class Euclid(Fraction):
     """
-    pass
+    Euclid(numerator=0, denominator=None)
 
+    Rhythmic proportion of :code:`n_steps` (numerator) steps over :code:`n_beats` (denominator) beats. It is a
+    :code:`Fraction`, and arithmetic between proportions gives proportions again, at about the cost of
+    :code:`Fraction` arithmetic: :code:`beat_durations`, :code:`steps` and :code:`indices` of the Euclidean rhythm are
+    only computed when they are first read, then cached in slots, so a proportion takes no more memory than a
+    :code:`Fraction` and three references.
 
-class Euclid(Fraction, NodeMixin):
-    def __new__(cls, numerator=0, denominator=None, *, _normalize=True):
-        self = super().__new__(cls, numerator, denominator, _normalize=_normalize)
+    Every operation that gives a :code:`Fraction` gives a :code:`Euclid` instead. Those that give an integer, like
+    :code:`//`, :code:`math.floor` or :code:`round` without digits, and those with floats, still do.
+
+    >>> x = Euclid(8, 3) + Euclid(4, 3)
+    >>> x, type(x).__name__
+    (Euclid(4, 1), 'Euclid')
+    >>> Euclid(8, 3) % 1, Euclid(8, 3) // 1, Euclid(2, 3) ** 2
+    (Euclid(2, 3), 2, Euclid(4, 9))
+    >>> Euclid(16, 6).beat_durations
+    [3, 2, 3]
+    """
+    __slots__ = ('_beat_durations', '_steps', '_indices')
 
-        self.n_steps = self._numerator
-        self.n_beats = self._denominator
-        self.beat_durations = euclid(self.n_steps, self.n_beats)
-        self.steps = steps_from_beat_durations(self.beat_durations)
-        self.indices = indices_from_steps(self.steps)
+    def __new__(cls, numerator=0, denominator=None, *, _normalize=True):
+        return super().__new__(cls, numerator, denominator, _normalize=_normalize)
 
+    @classmethod
+    def _from_fraction(cls, value):
+        # Results of Fraction arithmetic are already normalized, so they are wrapped without another gcd.
+        if type(value) is not Fraction:
+            return value
+        self = object.__new__(cls)
+        self._numerator = value._numerator
+        self._denominator = value._denominator
         return self
 
-    def __delta(self, j: int, i: int) -> int:
-        return (self.indices[(i + j) % self.n_beats] - self.indices[i]) % self.n_steps
+    @property
+    def n_steps(self) -> int:
+        return self._numerator
+
+    @property
+    def n_beats(self) -> int:
+        return self._denominator
+
+    @property
+    def beat_durations(self) -> List[int]:
+        try:
+            return self._beat_durations
+        except AttributeError:
+            self._beat_durations = euclid(self._numerator, self._denominator)
+            return self._beat_durations
+
+    @property
+    def steps(self) -> List[int]:
+        try:
+            return self._steps
+        except AttributeError:
+            self._steps = steps_from_beat_durations(self.beat_durations)
+            return self._steps
 
-    def __delta_bar(self, i) -> float:
-        result = 0
-        for j in range(1, self.n_beats):
-            result += self.__delta(j, i)
-        return result / (self.n_beats - 1)
+    @property
+    def indices(self) -> List[int]:
+        try:
+            return self._indices
+        except AttributeError:
+            self._indices = indices_from_steps(self.steps)
+            return self._indices
 
     def uglyness(self, i: int) -> float:
-        result = 0
-        for j in range(1, self.n_beats):
-            result += (self.__delta(j, i) - self.__delta_bar(i)) ** 2
-        return result / (self.n_beats - 1)
+        return uglyness.beat_uglyness(self.indices, self.n_steps, i)
 
     def total_uglyness(self) -> float:
-        result = 0
-        for j in range(1, self.n_beats // 2 + 1):
-            for i in range(0, self.n_beats):
-                result += (self.__delta(j, i) - (j * self.n_steps) / self.n_beats) ** 2
-        return 2 * result / self.n_beats
+        return uglyness.total_uglyness(self.indices, self.n_steps)
+
+    def __add__(self, other):
+        return self._from_fraction(Fraction.__add__(self, other))
+
+    def __radd__(self, other):
+        return self._from_fraction(Fraction.__radd__(self, other))
+
+    def __sub__(self, other):
+        return self._from_fraction(Fraction.__sub__(self, other))
+
+    def __rsub__(self, other):
+        return self._from_fraction(Fraction.__rsub__(self, other))
+
+    def __mul__(self, other):
+        return self._from_fraction(Fraction.__mul__(self, other))
+
+    def __rmul__(self, other):
+        return self._from_fraction(Fraction.__rmul__(self, other))
+
+    def __truediv__(self, other):
+        return self._from_fraction(Fraction.__truediv__(self, other))
+
+    def __rtruediv__(self, other):
+        return self._from_fraction(Fraction.__rtruediv__(self, other))
+
+    def __mod__(self, other):
+        return self._from_fraction(Fraction.__mod__(self, other))
+
+    def __rmod__(self, other):
+        return self._from_fraction(Fraction.__rmod__(self, other))
+
+    def __divmod__(self, other):
+        result = Fraction.__divmod__(self, other)
+        if result is NotImplemented:
+            return result
+        return result[0], self._from_fraction(result[1])
+
+    def __rdivmod__(self, other):
+        result = Fraction.__rdivmod__(self, other)
+        if result is NotImplemented:
+            return result
+        return result[0], self._from_fraction(result[1])
+
+    def __pow__(self, other):
+        return self._from_fraction(Fraction.__pow__(self, other))
+
+    def __rpow__(self, other):
+        return self._from_fraction(Fraction.__rpow__(self, other))
+
+    def __round__(self, ndigits=None):
+        return self._from_fraction(Fraction.__round__(self, ndigits))
+
+    def __pos__(self):
+        return self._from_fraction(Fraction.__pos__(self))
+
+    def __neg__(self):
+        return self._from_fraction(Fraction.__neg__(self))
+
+    def __abs__(self):
+        return self._from_fraction(Fraction.__abs__(self))
@@ -1,6 +1,9 @@
+import sys
 from itertools import cycle
+from typing import Dict, Iterable, Iterator, List, TextIO
 
 from pytom.libs.euclid import euclid
+from pytom.libs.tuning import EDO
 
 alphabet_names = {'α': 'αλφα',
                   'β': 'βητα',
@@ -33,31 +36,155 @@ alphabet = ['α', 'β', 'γ', 'δ', 'ε', 'ζ', 'η', 'θ', 'ι', 'κ', 'λ', '
 notes = ['do', 'dosd', 'dod', 'dodsd', 're', 'resd', 'red', 'redsd', 'mi', 'misd', 'fa', 'fasd', 'fad', 'fadsd', 'sol',
          'solsd', 'sold', 'soldsd', 'la', 'lasd', 'lad', 'ladsd', 'si', 'sisd']
 
+# Characters of LilyPond written to a file at a time.
+BUFFER_SIZE = 1 << 16
 
-def main():
-    seed = 'α'
-    tree = []
 
-    # 6
-    for _ in range(4):
-        tree = [alphabet_names[letter] for letter in seed]
-        seed = ''.join(tree)
+class LSystem:
+    """
+    Lindenmayer system: every letter of a word is rewritten with the rewrite table at each generation, starting from
+    the axiom. Letters that are not in the table are constants and stay as they are.
+
+    Generations grow geometrically, so they are never built. Letters and words are generated lazily, depth-first, with
+    memory proportional to the depth, and any letter or word can be reached directly from the lengths of the
+    expansions of each letter at each depth.
+
+    :param rules: rewrite table, from letters to words
+    :param axiom: word of generation 0
+
+    >>> system = LSystem(alphabet_names, 'α')
+    >>> ''.join(system.letters(1)), list(system.words(2))
+    ('αλφα', ['αλφα', 'λαμδα', 'φι', 'αλφα'])
+    >>> system.length(20), system.word(10 ** 9, 20)
+    (773239130761, 'λαμδα')
+    """
+
+    def __init__(self, rules: Dict[str, str] = None, axiom: str = 'α'):
+        self.rules = dict(alphabet_names if rules is None else rules)
+        self.axiom = axiom
+        # Number of letters in the expansion of each letter, at each depth.
+        self._lengths = [{}]
+
+    def _rewrite(self, letter: str) -> str:
+        return self.rules.get(letter, letter)
+
+    def _length(self, letter: str, depth: int) -> int:
+        while len(self._lengths) <= depth:
+            previous = self._lengths[-1]
+            self._lengths.append({x: sum(previous.get(y, 1) for y in word) for x, word in self.rules.items()})
+        return self._lengths[depth].get(letter, 1)
+
+    def length(self, depth: int) -> int:
+        """Number of letters of generation :code:`depth`."""
+        self._check_depth(depth)
+        return sum(self._length(letter, depth) for letter in self.axiom)
+
+    def letters(self, depth: int) -> Iterator[str]:
+        """
+        Letters of generation :code:`depth`, one at a time.
+        """
+        self._check_depth(depth)
+        stack = [iter(self.axiom)]
+        while stack:
+            letter = next(stack[-1], None)
+            if letter is None:
+                stack.pop()
+            elif len(stack) > depth:
+                yield letter
+            else:
+                stack.append(iter(self._rewrite(letter)))
+
+    def words(self, depth: int) -> Iterator[str]:
+        """
+        Words of generation :code:`depth`, which are the rewritten letters of generation :code:`depth - 1`, one at a
+        time.
+        """
+        self._check_depth(depth, 1)
+        for letter in self.letters(depth - 1):
+            yield self._rewrite(letter)
 
-    n2 = cycle(euclid(34, 21))
-    durations = ('4' if n == 2 else '8' for n in n2)
+    def letter(self, k: int, depth: int) -> str:
+        """
+        :code:`k`-th letter of generation :code:`depth`, found without expanding the letters before it.
+        """
+        if not 0 <= k < self.length(depth):
+            raise IndexError("Letter index out of range!")
+        word = self.axiom
+        while True:
+            for letter in word:
+                length = self._length(letter, depth)
+                if k < length:
+                    break
+                k -= length
+            if depth == 0:
+                return letter
+            word, depth = self._rewrite(letter), depth - 1
 
-    chords = [[alphabet.index(letter) for letter in word] for word in tree]
+    def word(self, k: int, depth: int) -> str:
+        """
+        :code:`k`-th word of generation :code:`depth`, found without expanding the words before it.
+        """
+        self._check_depth(depth, 1)
+        return self._rewrite(self.letter(k, depth - 1))
 
-    gen = 7
-    asd = [(p * gen) % 24 for p in range(24)]
-    if len(asd) != len(set(asd)):
-        raise ValueError
-    chords = [[notes[(p * gen) % 24] + '\'' for p in chord] for chord in chords]
+    @staticmethod
+    def _check_depth(depth: int, minimum: int = 0):
+        if depth < minimum:
+            raise ValueError(f"Depth must be at least {minimum}!")
 
-    result = ['<{}>'.format(' '.join(chord)) + duration for chord, duration in zip(chords, durations)]
 
-    text = ' '.join(result)
-    print(text)
+def durations() -> Iterator[str]:
+    """LilyPond durations, quarter notes for the 2s and eighth notes for the 1s of the Euclidean rhythm (34, 21)."""
+    return ('4' if n == 2 else '8' for n in cycle(euclid(34, 21)))
+
+
+def chords(words: Iterable[str], generator: int = 7) -> Iterator[List[str]]:
+    """
+    Chords of the letters of each word, one at a time. The position of a letter in the alphabet is mapped to a
+    quarter tone by :code:`EDO(24, generator)`.
+
+    >>> next(chords(['αβ']))
+    ["do'", "redsd'"]
+    """
+    edo = EDO(24, generator, notes, suffix="'")
+    positions = {letter: i for i, letter in enumerate(alphabet)}
+    return edo.names([positions[letter] for letter in word] for word in words)
+
+
+def write_lilypond(chords: Iterable[Iterable[str]], durations: Iterable[str], f: TextIO, score: bool = False,
+                   buffer_size: int = BUFFER_SIZE) -> int:
+    """
+    Write :code:`<chord>duration` tokens to a text file as they are generated. Tokens are collected and written about
+    :code:`buffer_size` characters at a time, so memory does not grow with the length of the piece.
+
+    :param chords: note names of each chord
+    :param durations: LilyPond duration of each chord
+    :param f: text file
+    :param score: wrap the tokens in a complete :code:`.ly` file, with Italian note names
+    :param buffer_size: about how many characters are written at a time
+    :return: number of chords written
+    """
+    if score:
+        f.write('\\version "2.24.0"\n\\language "italiano"\n\n{\n  ')
+    # Tokens are separated by spaces, so every chunk after the first one starts with a space.
+    separator, parts, size, n_chords = '', [], 0, 0
+    for chord, duration in zip(chords, durations):
+        token = '<{}>{}'.format(' '.join(chord), duration)
+        parts.append(token)
+        size += len(token) + 1
+        n_chords += 1
+        if size >= buffer_size:
+            f.write(separator + ' '.join(parts))
+            separator, parts, size = ' ', [], 0
+    if parts:
+        f.write(separator + ' '.join(parts))
+    f.write('\n}\n' if score else '\n')
+    return n_chords
+
+
+def main():
+    words = LSystem(alphabet_names, 'α').words(4)
+    write_lilypond(chords(words), durations(), sys.stdout)
 
 
 if __name__ == '__main__':
@@ -1,7 +1,12 @@
-from collections import deque
 from typing import List
 
-from pytom.libs.utils import reduce_with, lcm
+from pytom.libs import uglyness
+from pytom.libs.core import steps_to_durations, durations_to_steps, steps_to_indices, indices_and_n_steps_to_steps, \
+    steps_to_mask, mask_to_steps, mask_to_indices, _check_indices, _check_mask, _indices_to_durations, \
+    _durations_to_indices, _popcount
+from pytom.libs.euclid import euclidean_durations
+from pytom.libs.profiling import instrumented
+from pytom.libs.utils import lcm
 
 
 # TODO: offset does not work. Bjorklund should be immutable, maybe.
@@ -27,6 +32,8 @@ class Bjorklund:
     <3 2 3>
     >>> Bjorklund.from_indices_and_n_steps(indices=[0, 3, 5], n_steps=8)
     <3 2 3>
+    >>> Bjorklund.from_mask(mask=0b101001, n_steps=8)
+    <3 2 3>
     """
 
     @classmethod
@@ -45,6 +52,7 @@ class Bjorklund:
         return instance
 
     @classmethod
+    @instrumented('construction')
     def from_steps(cls, steps: List[int]):
         """
         Create a Bjorklund rhythm object by explicitly providing each step
@@ -55,11 +63,12 @@ class Bjorklund:
         >>> Bjorklund.from_steps([1, 0, 0, 0, 1, 0, 1, 0, 1])
         <4 2 2 1>
         """
-        instance = cls([])
+        instance = cls._new()
         instance.steps = steps
         return instance
 
     @classmethod
+    @instrumented('construction')
     def from_indices_and_n_steps(cls, indices: List[int], n_steps: int = 0):
         """
         Create a Bjorklund rhythm object from indices and number of steps.
@@ -71,14 +80,45 @@ class Bjorklund:
         >>> Bjorklund.from_indices_and_n_steps([1, 3, 6, 7], 8)
         <2 3 1 2> (offset: 1)
         """
-        instance = cls([])
-        instance.steps = indices_and_n_steps_to_steps(indices, n_steps)
+        _check_indices(indices, n_steps)
+        instance = cls._new()
+        instance.__reset(n_steps, indices=sorted(set(indices)))
+        return instance
+
+    @classmethod
+    @instrumented('construction')
+    def from_mask(cls, mask: int, n_steps: int):
+        """
+        Create a Bjorklund rhythm object from an integer bitmask, whose bit :code:`i` is step :code:`i`, and number of
+        steps.
+
+        :param mask: Bitmask of beats.
+        :param n_steps: Number of steps.
+        :return: Generated Bjorklund rhythm object.
+
+        >>> Bjorklund.from_mask(0b11001010, 8)
+        <2 3 1 2> (offset: 1)
+        """
+        instance = cls._new()
+        instance.__reset(n_steps, mask=0)
+        instance.mask = mask
         return instance
 
+    @classmethod
+    def _new(cls) -> 'Bjorklund':
+        # Empty rhythm, built without __init__, so that each construction is only counted once by the profiler.
+        instance = cls.__new__(cls)
+        instance.__reset(0)
+        return instance
+
+    @instrumented('construction')
     def __init__(self, durations: List[int], offset: int = 0):
         """
         Default initialization method for the Bjorklund object.
 
+        Only the representation the rhythm is created or modified with is stored. The others are computed on first
+        access and cached until the next modification.
+
         :param durations: List of durations of beats.
         :param offset: Offset of the first beat (number of silent beats before the start).
         :return: Generated Bjorklund rhythm object.
@@ -91,13 +131,27 @@ class Bjorklund:
         >>> print(x.steps)
         [0, 1, 0, 0, 1, 0, 1, 0]
         """
-        self.__durations = []
-        self.__steps = []
-        self.__indices = []
+        self.__durations = None
+        self.__offset = None
+        self.__steps = None
+        self.__indices = None
+        self.__mask = None
+        self.__n_steps = 0
 
         self.durations = durations
         self.offset = offset
 
+    def __reset(self, n_steps: int, durations=None, offset=None, steps=None, indices=None, mask=None):
+        """
+        Replace the authoritative representation and drop every cached one.
+        """
+        self.__n_steps = n_steps
+        self.__durations = durations
+        self.__offset = offset
+        self.__steps = steps
+        self.__indices = indices
+        self.__mask = mask
+
     @property
     def durations(self):
         """
@@ -109,13 +163,18 @@ class Bjorklund:
         >>> print(x.durations)
         [3, 2, 2, 2]
         """
+        if self.__durations is None:
+            if self.__indices is not None or self.__steps is None:
+                self.__durations = _indices_to_durations(self.indices, self.__n_steps)
+            else:
+                self.__durations = steps_to_durations(self.__steps)
         return self.__durations
 
     @durations.setter
     def durations(self, durations):
-        self.__durations = durations
-        self.__steps = durations_to_steps(durations)
-        self.__indices = steps_to_indices(self.steps)
+        if any(x <= 0 for x in durations):
+            raise ValueError("Negative or zero length durations do not make sense!")
+        self.__reset(sum(durations), durations=durations, offset=0)
 
     @property
     def offset(self):
@@ -128,24 +187,34 @@ class Bjorklund:
         >>> print(x.offset)
         2
         """
-        try:
-            return self.steps.index(1)
-        except ValueError:
-            return 0
+        if self.__offset is None:
+            if self.__indices is not None:
+                self.__offset = self.__indices[0] if self.__indices else 0
+            elif self.__steps is None:
+                mask = self.__mask
+                self.__offset = (mask & -mask).bit_length() - 1 if mask else 0
+            else:
+                try:
+                    self.__offset = self.__steps.index(1)
+                except ValueError:
+                    self.__offset = 0
+        return self.__offset
 
     @offset.setter
     def offset(self, offset):
-        if not self.steps:
+        if not self.n_steps:
+            return
+        if offset < 0:
+            self.rotate_steps(offset - self.offset)
             return
-        max_offset = self.durations[-1] - 1
+        durations = self.durations
+        max_offset = durations[-1] - 1
         # TODO: maybe raise exception
         if offset > max_offset:
             print(f"Not enough empty steps at the end! Setting offset to {max_offset} instead.")
             offset = max_offset
-        current_offset = self.offset
-        steps = deque(self.steps)
-        steps.rotate(offset - current_offset)
-        self.steps = list(steps)
+        if offset != self.offset:
+            self.__reset(self.__n_steps, durations=durations, offset=offset)
 
     @property
     def steps(self):
@@ -158,13 +227,26 @@ class Bjorklund:
         >>> print(x.steps)
         [1, 0, 0, 1, 0, 1, 0, 1, 0]
         """
+        if self.__steps is None:
+            if self.__indices is not None:
+                self.__steps = indices_and_n_steps_to_steps(self.__indices, self.__n_steps)
+            elif self.__mask is not None:
+                self.__steps = mask_to_steps(self.__mask, self.__n_steps)
+            else:
+                steps = durations_to_steps(self.__durations)
+                offset = self.__offset
+                self.__steps = steps[-offset:] + steps[:-offset] if offset else steps
         return self.__steps
 
     @steps.setter
     def steps(self, steps):
-        self.__steps = steps
-        self.__durations = steps_to_durations(steps)
-        self.__indices = steps_to_indices(steps)
+        if steps:
+            beats = steps.count(1)
+            if not beats:
+                raise ValueError("Steps must contain at leat one beat!")
+            if beats + steps.count(0) != len(steps):
+                raise ValueError("Steps can contain only beats (1) or rests (0)!")
+        self.__reset(len(steps), steps=steps)
 
     @property
     def indices(self):
@@ -177,13 +259,41 @@ class Bjorklund:
         >>> print(x.indices)
         [0, 3, 5, 7]
         """
+        if self.__indices is None:
+            if self.__durations is not None:
+                self.__indices = _durations_to_indices(self.__durations, self.offset)
+            elif self.__steps is not None:
+                self.__indices = steps_to_indices(self.__steps)
+            else:
+                self.__indices = mask_to_indices(self.__mask)
         return self.__indices
 
     @indices.setter
     def indices(self, indices):
-        self.__indices = indices
-        self.__steps = indices_and_n_steps_to_steps(indices, self.n_steps)
-        self.durations = steps_to_durations(self.steps)
+        _check_indices(indices, self.n_steps)
+        self.__reset(self.n_steps, indices=sorted(set(indices)))
+
+    @property
+    def mask(self) -> int:
+        """
+        Bitmask of beats, an integer whose bit :code:`i` is step :code:`i`.
+
+        :return: mask
+
+        >>> x = Bjorklund.from_n_steps_n_beats(9, 4)
+        >>> print(bin(x.mask))
+        0b10101001
+        """
+        if self.__mask is None:
+            self.__mask = steps_to_mask(self.steps)
+        return self.__mask
+
+    @mask.setter
+    def mask(self, mask):
+        _check_mask(mask, self.n_steps)
+        if self.n_steps and not mask:
+            raise ValueError("Steps must contain at leat one beat!")
+        self.__reset(self.n_steps, mask=mask)
 
     @property
     def n_steps(self):
@@ -196,7 +306,7 @@ class Bjorklund:
         >>> print(x.n_steps)
         7
         """
-        return len(self.steps)
+        return self.__n_steps
 
     @property
     def n_beats(self):
@@ -209,8 +319,15 @@ class Bjorklund:
         >>> print(x.n_beats)
         3
         """
-        return len(self.durations)
+        if self.__durations is not None:
+            return len(self.__durations)
+        if self.__indices is not None:
+            return len(self.__indices)
+        if self.__steps is not None:
+            return self.__steps.count(1)
+        return _popcount(self.__mask)
 
+    @instrumented('rotation')
     def rotate_steps(self, n: int):
         """
         Rotate rhythm stepwise. Same as :code:`deque.rotate`
@@ -233,10 +350,14 @@ class Bjorklund:
         >>> print(x)
         <3 3 2>
         """
-        steps = deque(self.steps)
-        steps.rotate(n)
-        self.steps = list(steps)
+        n_steps = self.n_steps
+        if n_steps:
+            # Step i moves to step i + n, which is a cyclic shift of the bitmask.
+            n %= n_steps
+            mask = self.mask
+            self.__reset(n_steps, mask=((mask << n) | (mask >> (n_steps - n))) & ((1 << n_steps) - 1))
 
+    @instrumented('rotation')
     def rotate_durations(self, n: int):
         """
         Rotate rhythm by durations. This does not effect the :code:`offset` of the rhythm.
@@ -266,37 +387,12 @@ class Bjorklund:
         >>> print(y)
         <4 3 2 5>
         """
-        durations = deque(self.durations)
-        durations.rotate(n)
-        offset = self.offset
-        self.durations = list(durations)
-        self.offset = offset
-
-    def __delta(self, j: int, i: int) -> int:
-        """
-        :math:`\delta_j(i)` as defined in Bjorklund (2003).
-
-        Forward distance between beat i and the jth beat after i.
-
-        :param j: distance from beat
-        :param i: index of beat
-
-        :return: :math:`\delta_j(i)`
-        """
-        return (self.indices[(i + j) % self.n_beats] - self.indices[i]) % self.n_steps
-
-    def __delta_bar(self, i) -> float:
-        """
-        :math:`\bar{\delta}_j(i)` as defined in Bjorklund (2003).
-
-        :param i: index of beat
-
-        :return: :math:`\bar{\delta}_j(i)`
-        """
-        result = 0
-        for j in range(1, self.n_beats):
-            result += self.__delta(j, i)
-        return result / (self.n_beats - 1)
+        durations = self.durations
+        if durations:
+            n %= len(durations)
+            offset = self.offset
+            self.__reset(self.n_steps, durations=durations[-n:] + durations[:-n] if n else durations[:], offset=0)
+            self.offset = offset
 
     def uglyness(self, i: int) -> float:
         """
@@ -312,10 +408,21 @@ class Bjorklund:
         >>> print([f"{x.uglyness(i):.2f}" for i in range(x.n_beats)])
         ['3.69', '5.00', '3.69', '2.19', '2.19']
         """
-        result = 0
-        for j in range(1, self.n_beats):
-            result += (self.__delta(j, i) - self.__delta_bar(i)) ** 2
-        return result / (self.n_beats - 1)
+        return uglyness.beat_uglyness(self.indices, self.n_steps, i)
+
+    def uglyness_profile(self) -> List[float]:
+        """
+        Uglyness of every beat of the pattern, computed in a single pass.
+
+        Same as :code:`[self.uglyness(i) for i in range(self.n_beats)]` but much faster for long patterns.
+
+        :return: list of uglyness of each beat
+
+        >>> x = Bjorklund.from_indices_and_n_steps([1, 2, 3, 5, 7], 8)
+        >>> print([f"{u:.2f}" for u in x.uglyness_profile()])
+        ['3.69', '5.00', '3.69', '2.19', '2.19']
+        """
+        return uglyness.uglyness_profile(self.indices, self.n_steps)
 
     def total_uglyness(self) -> float:
         """
@@ -334,11 +441,7 @@ class Bjorklund:
         >>> print(f"{y.total_uglyness():.2f}")
         0.00
         """
-        result = 0
-        for j in range(1, self.n_beats // 2 + 1):
-            for i in range(0, self.n_beats):
-                result += (self.__delta(j, i) - (j * self.n_steps) / self.n_beats) ** 2
-        return 2 * result / self.n_beats
+        return uglyness.total_uglyness(self.indices, self.n_steps)
 
     def is_bjorklund(self) -> bool:
         """
@@ -369,14 +472,12 @@ class Bjorklund:
         return Bjorklund([x + y for x, y in zip(self.durations * a, other.steps * b)])
 
     def __eq__(self, other):
-        my_durations = deque(self.durations)
-        other_durations = deque(other.durations)
-
-        for i in range(self.n_beats + 1):
-            if other_durations == my_durations:
-                return True
-            my_durations.rotate(1)
-        return False
+        if self.n_beats != other.n_beats or self.n_steps != other.n_steps:
+            return False
+        # Equal up to rotation: the bits of one mask appear in the bits of the other one written twice. The search
+        # runs in C.
+        width = f'0{self.n_steps}b'
+        return format(self.mask, width) in format(other.mask, width) * 2
 
     def __repr__(self):
         dur_reps = f"<{' '.join([str(i) for i in self.durations])}>"
@@ -391,98 +492,7 @@ class Bjorklund:
         return f"{dur_reps} (offset: {self.offset})"
 
 
-def steps_to_durations(steps: List[int]) -> List[int]:
-    """
-    Convert :code:`steps` representation of a Bjorklund into :code:`durations` representation
-
-    :param steps: list of steps. 1 where there is a beat 0 where there is silence
-    :return: list of durations.
-
-    >>> steps_to_durations([1, 0, 1, 0])
-    [2, 2]
-    """
-
-    @reduce_with(init=[])
-    def s_to_d(x, y):
-        if y == 0:
-            return x[:-1] + [x[-1] + 1]
-        if y == 1:
-            return x + [y]
-        if not x and not y:
-            return []
-        raise ValueError("Steps can contain only beats (1) or rests (0)!")
-
-    if not steps:
-        return []
-
-    if 1 not in steps:
-        raise ValueError("Steps must contain at leat one beat!")
-
-    index = steps.index(1)
-    return s_to_d(steps[index:] + steps[:index])
-
-
-def durations_to_steps(durations: List[int]) -> List[int]:
-    """
-    Convert :code:`durations` representation of a Bjorklund into :code:`steps` representation
-
-    :param durations: list of durations
-    :return: list of steps. 1 where there is a beat 0 where there is silence
-
-    >>> durations_to_steps([3, 2, 1])
-    [1, 0, 0, 1, 0, 1]
-    """
-    if any(x <= 0 for x in durations):
-        raise ValueError("Negative or zero length durations do not make sense!")
-
-    return sum([[1] + [0] * (x - 1) for x in durations], [])
-
-
-def steps_to_indices(steps: List[int]) -> List[int]:
-    """
-    Convert :code:`steps` representation of a Bjorklund into :code:`indices` representation
-
-    :param steps: list of steps. 1 where there is a beat 0 where there is silence
-    :return: list of indices of beats (indices of 1s in steps).
-
-    >>> steps_to_indices([0, 1, 1, 0, 0, 1])
-    [1, 2, 5]
-    """
-    return [index for index, value in enumerate(steps) if value == 1]
-
-
-def indices_and_n_steps_to_steps(indices: List[int], n_steps: int) -> List[int]:
-    """
-    Convert :code:`indices` representation of a Bjorklund into :code:`steps` representation
-
-    :param indices: list of indices of beats (indices of 1s in steps).
-    :param n_steps: number of steps
-    :return: list of steps. 1 where there is a beat 0 where there is silence
-
-    >>> indices_and_n_steps_to_steps([0, 2, 3], 8)
-    [1, 0, 1, 1, 0, 0, 0, 0]
-    """
-    if not indices:
-        if n_steps == 0:
-            return []
-        else:
-            raise ValueError("Indices list empty! There must be at least one beat.")
-
-    if any(x < 0 for x in indices):
-        raise ValueError("Indices of beats cannot be negative!")
-
-    if n_steps < max([max(indices) + 1, len(indices)]):
-        raise ValueError("These indices cannot fit into thi snumber of steps!")
-
-    # TODO: Maybe raise an exception
-    indices = sorted(list(set(indices)))
-
-    steps = [0] * n_steps
-    for index in indices:
-        steps[index] = 1
-    return steps
-
-
+@instrumented('construction')
 def bjorklund(n_steps: int, n_beats: int) -> Bjorklund:
     """ Calculates optimal distribution of a number of beats over a number of discrete steps.
 
@@ -503,14 +513,15 @@ def bjorklund(n_steps: int, n_beats: int) -> Bjorklund:
 
     >>> bjorklund(12, 5)
     <3 2 2 3 2>
+
+    Durations are memoized by :code:`pytom.libs.euclid.euclidean_durations`, which also shares the recursive
+    subproblems between calls.
     """
     if n_beats <= 0 or n_steps <= 0:
         raise ValueError("Negative or zero number of steps or beats do not make sense!")
     if n_beats > n_steps:
         raise ValueError("Number of beats cannot be more than the number of steps!")
 
-    quotient, remainder = divmod(n_steps, n_beats)
-    if remainder == 0:
-        return Bjorklund([quotient] * n_beats)
-
-    return Bjorklund([quotient] * n_beats) + bjorklund(n_beats, remainder)
+    instance = Bjorklund._new()
+    instance.durations = list(euclidean_durations(n_steps, n_beats))
+    return instance
@@ -0,0 +1,381 @@
+import sys
+from itertools import accumulate, compress
+from typing import List, Optional
+
+from pytom.libs.profiling import instrumented
+
+# Shared compute core of the rhythm front ends (Bjorklund, Rhythm, euclid.Euclid and algebraic.Euclid): the
+# conversions between representations and the uglyness kernels, with a pure Python and a numpy backend.
+
+# numpy is optional and only imported by _numpy(), the first time it is needed, so importing pytom stays fast.
+np = None
+_numpy_imported = False
+
+
+def _numpy():
+    global np, _numpy_imported
+    if not _numpy_imported:
+        _numpy_imported = True
+        try:
+            import numpy as np
+        except ImportError:  # pragma: no cover
+            np = None
+    return np
+
+
+def is_array(xs) -> bool:
+    """
+    Whether :code:`xs` is a numpy array, without importing numpy: an array can only exist once it is imported.
+    """
+    np = sys.modules.get('numpy')
+    return np is not None and isinstance(xs, np.ndarray)
+
+
+@instrumented('conversion')
+def _indices_to_durations(indices: List[int], n_steps: int) -> List[int]:
+    durations = [b - a for a, b in zip(indices, indices[1:])]
+    if indices:
+        durations.append(indices[0] + n_steps - indices[-1])
+    return durations
+
+
+@instrumented('conversion')
+def _durations_to_indices(durations: List[int], offset: int) -> List[int]:
+    indices = []
+    index = offset
+    for duration in durations:
+        indices.append(index)
+        index += duration
+    return indices
+
+
+def _check_indices(indices: List[int], n_steps: int):
+    if len(indices) == 0:
+        if n_steps == 0:
+            return
+        else:
+            raise ValueError("Indices list empty! There must be at least one beat.")
+
+    low, high = (indices.min(), indices.max()) if is_array(indices) else (min(indices), max(indices))
+    if low < 0:
+        raise ValueError("Indices of beats cannot be negative!")
+
+    if n_steps < max([high + 1, len(indices)]):
+        raise ValueError("These indices cannot fit into thi snumber of steps!")
+
+
+@instrumented('conversion')
+def steps_to_durations(steps: List[int]) -> List[int]:
+    """
+    Convert :code:`steps` representation of a Bjorklund into :code:`durations` representation
+
+    Runs in linear time. If :code:`steps` is a numpy array, the conversion is done in numpy and an array is returned.
+
+    :param steps: list of steps. 1 where there is a beat 0 where there is silence
+    :return: list of durations.
+
+    >>> steps_to_durations([1, 0, 1, 0])
+    [2, 2]
+    >>> steps_to_durations([0, 0, 1, 0, 1, 1])
+    [2, 1, 3]
+    """
+    if is_array(steps):
+        import numpy as np
+        if steps.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        indices = np.flatnonzero(steps == 1)
+        if indices.size == 0:
+            raise ValueError("Steps must contain at leat one beat!")
+        if ((steps != 0) & (steps != 1)).any():
+            raise ValueError("Steps can contain only beats (1) or rests (0)!")
+        return np.diff(indices, append=indices[0] + len(steps))
+
+    if not steps:
+        return []
+
+    indices = steps_to_indices(steps)
+    if not indices:
+        raise ValueError("Steps must contain at leat one beat!")
+    if len(indices) + steps.count(0) != len(steps):
+        raise ValueError("Steps can contain only beats (1) or rests (0)!")
+
+    durations = [b - a for a, b in zip(indices, indices[1:])]
+    durations.append(indices[0] + len(steps) - indices[-1])
+    return durations
+
+
+@instrumented('conversion')
+def durations_to_steps(durations: List[int]) -> List[int]:
+    """
+    Convert :code:`durations` representation of a Bjorklund into :code:`steps` representation
+
+    Runs in linear time. If :code:`durations` is a numpy array, the conversion is done in numpy and an array is
+    returned.
+
+    :param durations: list of durations
+    :return: list of steps. 1 where there is a beat 0 where there is silence
+
+    >>> durations_to_steps([3, 2, 1])
+    [1, 0, 0, 1, 0, 1]
+    """
+    if is_array(durations):
+        import numpy as np
+        if (durations <= 0).any():
+            raise ValueError("Negative or zero length durations do not make sense!")
+        steps = np.zeros(durations.sum(), dtype=np.int8)
+        steps[np.cumsum(durations) - durations] = 1
+        return steps
+
+    if any(x <= 0 for x in durations):
+        raise ValueError("Negative or zero length durations do not make sense!")
+
+    steps = [0] * sum(durations)
+    index = 0
+    for duration in durations:
+        steps[index] = 1
+        index += duration
+    return steps
+
+
+@instrumented('conversion')
+def steps_to_indices(steps: List[int]) -> List[int]:
+    """
+    Convert :code:`steps` representation of a Bjorklund into :code:`indices` representation
+
+    If :code:`steps` is a numpy array, the conversion is done in numpy and an array is returned.
+
+    :param steps: list of steps. 1 where there is a beat 0 where there is silence
+    :return: list of indices of beats (indices of 1s in steps).
+
+    >>> steps_to_indices([0, 1, 1, 0, 0, 1])
+    [1, 2, 5]
+    """
+    if is_array(steps):
+        import numpy as np
+        return np.flatnonzero(steps == 1)
+
+    return [index for index, value in enumerate(steps) if value == 1]
+
+
+@instrumented('conversion')
+def indices_and_n_steps_to_steps(indices: List[int], n_steps: int) -> List[int]:
+    """
+    Convert :code:`indices` representation of a Bjorklund into :code:`steps` representation
+
+    If :code:`indices` is a numpy array, the conversion is done in numpy and an array is returned.
+
+    :param indices: list of indices of beats (indices of 1s in steps).
+    :param n_steps: number of steps
+    :return: list of steps. 1 where there is a beat 0 where there is silence
+
+    >>> indices_and_n_steps_to_steps([0, 2, 3], 8)
+    [1, 0, 1, 1, 0, 0, 0, 0]
+    """
+    _check_indices(indices, n_steps)
+
+    # TODO: Maybe raise an exception. Duplicate indices are silently merged.
+    if is_array(indices):
+        import numpy as np
+        if len(indices) == 0:
+            return np.zeros(0, dtype=np.int8)
+        steps = np.zeros(n_steps, dtype=np.int8)
+        steps[indices] = 1
+        return steps
+
+    if len(indices) == 0:
+        return []
+
+    steps = [0] * n_steps
+    for index in indices:
+        steps[index] = 1
+    return steps
+
+
+# Steps as bytes, to and from the digits of a binary number.
+_TO_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+_FROM_DIGITS = bytes.maketrans(b'01', b'\x00\x01')
+
+
+@instrumented('conversion')
+def steps_to_mask(steps: List[int]) -> int:
+    """
+    Convert :code:`steps` representation of a Bjorklund into :code:`mask` representation, an integer whose bit
+    :code:`i` is step :code:`i`. The number of steps is not part of the mask.
+
+    The steps are turned into the digits of a binary number in a single pass in C. If :code:`steps` is a numpy array,
+    they are packed with numpy.
+
+    :param steps: list of steps. 1 where there is a beat 0 where there is silence
+    :return: integer bitmask of beats
+
+    >>> bin(steps_to_mask([1, 0, 0, 1, 0, 1, 0, 0]))
+    '0b101001'
+    """
+    if len(steps) == 0:
+        return 0
+    if is_array(steps):
+        import numpy as np
+        packed = np.packbits(np.asarray(steps[::-1], dtype=np.uint8))
+        # Bits are packed from the last step, and the last byte is padded with zeros.
+        return int.from_bytes(packed.tobytes(), 'big') >> (-len(steps) % 8)
+
+    return int(bytes(reversed(steps)).translate(_TO_DIGITS), 2)
+
+
+@instrumented('conversion')
+def mask_to_steps(mask: int, n_steps: int) -> List[int]:
+    """
+    Convert :code:`mask` representation of a Bjorklund into :code:`steps` representation
+
+    :param mask: integer whose bit :code:`i` is step :code:`i`
+    :param n_steps: number of steps
+    :return: list of steps. 1 where there is a beat 0 where there is silence
+
+    >>> mask_to_steps(0b101001, 8)
+    [1, 0, 0, 1, 0, 1, 0, 0]
+    """
+    _check_mask(mask, n_steps)
+    if not n_steps:
+        return []
+    return list(format(mask, f'0{n_steps}b')[::-1].encode().translate(_FROM_DIGITS))
+
+
+@instrumented('conversion')
+def mask_to_indices(mask: int) -> List[int]:
+    """
+    Convert :code:`mask` representation of a Bjorklund into :code:`indices` representation
+
+    Set bits are selected with :code:`itertools.compress`, without a Python loop.
+
+    :param mask: integer whose bit :code:`i` is step :code:`i`
+    :return: list of indices of beats (indices of set bits).
+
+    >>> mask_to_indices(0b101001)
+    [0, 3, 5]
+    """
+    if mask < 0:
+        raise ValueError("Masks cannot be negative!")
+    bits = format(mask, 'b')[::-1].encode().translate(_FROM_DIGITS)
+    return list(compress(range(len(bits)), bits)) if mask else []
+
+
+def _check_mask(mask: int, n_steps: int):
+    if mask < 0:
+        raise ValueError("Masks cannot be negative!")
+    if mask >> n_steps:
+        raise ValueError("Mask has beats beyond the number of steps!")
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def _fits_int64(kernel: str, n_beats: int, n_steps: int) -> bool:
+    # Prefix sums of squares over two cycles are below 8 k n^2. The uglyness profile also multiplies sums of k
+    # squared spans by k, and squares sums of k spans, which are both up to (k n)^2.
+    if 8 * n_beats * n_steps * n_steps >= 2 ** 62:
+        return False
+    return kernel != 'uglyness_profile' or n_beats * n_steps < 2 ** 31
+
+
+class PythonBackend:
+    """
+    Uglyness kernels in pure Python. Exact for any size and fastest for short rhythms.
+
+    Kernels take :code:`unrolled`, the indices of two consecutive cycles of a rhythm, so that
+    :math:`\\delta_j(i)` is :code:`unrolled[i + j] - unrolled[i]`.
+    """
+    name = 'python'
+
+    @staticmethod
+    def uglyness_profile(unrolled: List[int], n_beats: int) -> List[float]:
+        m = n_beats - 1
+        p1 = [0] + list(accumulate(unrolled))
+        p2 = [0] + list(accumulate(x * x for x in unrolled))
+        result = []
+        for i in range(n_beats):
+            origin = unrolled[i]
+            s1 = p1[i + n_beats] - p1[i + 1]
+            s2 = p2[i + n_beats] - p2[i + 1]
+            sum_d = s1 - m * origin
+            sum_d2 = s2 - 2 * origin * s1 + m * origin * origin
+            result.append((m * sum_d2 - sum_d * sum_d) / (m * m))
+        return result
+
+    @staticmethod
+    def squared_spans(unrolled: List[int], n_beats: int) -> List[int]:
+        """:math:`\\sum_i \\delta_j(i)^2` for :math:`j = 1 .. \\lfloor n\\_beats / 2 \\rfloor`."""
+        origin = unrolled[:n_beats]
+        return [sum((b - a) ** 2 for a, b in zip(origin, unrolled[j:j + n_beats])) for j in range(1, n_beats // 2 + 1)]
+
+
+class NumpyBackend:
+    """
+    Uglyness kernels in numpy, on int64 arrays. Only used when the sums cannot overflow.
+    """
+    name = 'numpy'
+
+    @staticmethod
+    def uglyness_profile(unrolled: List[int], n_beats: int) -> List[float]:
+        np = _numpy()
+        m = n_beats - 1
+        e = np.asarray(unrolled, dtype=np.int64)
+        p1 = np.concatenate(([0], np.cumsum(e)))
+        p2 = np.concatenate(([0], np.cumsum(e * e)))
+        origin = e[:n_beats]
+        s1 = p1[n_beats:2 * n_beats] - p1[1:n_beats + 1]
+        s2 = p2[n_beats:2 * n_beats] - p2[1:n_beats + 1]
+        sum_d = s1 - m * origin
+        sum_d2 = s2 - 2 * origin * s1 + m * origin * origin
+        return ((m * sum_d2 - sum_d * sum_d) / (m * m)).tolist()
+
+    @staticmethod
+    def squared_spans(unrolled: List[int], n_beats: int) -> List[int]:
+        np = _numpy()
+        e = np.asarray(unrolled, dtype=np.int64)
+        origin = e[:n_beats]
+        # Row j of `windows` is a read-only view of e[j:j + n_beats]. Blocks of rows keep temporaries bounded.
+        half = n_beats // 2
+        windows = np.lib.stride_tricks.as_strided(e, shape=(half + 1, n_beats), strides=(e.strides[0],) * 2,
+                                                  writeable=False)
+        block = max(1, 2 ** 20 // n_beats)
+        result = []
+        for start in range(1, half + 1, block):
+            deltas = windows[start:start + block] - origin
+            result.extend(np.einsum('ij,ij->i', deltas, deltas).tolist())
+        return result
+
+
+BACKENDS = {backend.name: backend for backend in [PythonBackend, NumpyBackend]}
+
+# Below this many beats, the pure Python kernels are faster than numpy's per-call overhead.
+NUMPY_MIN_BEATS = {'uglyness_profile': 40, 'squared_spans': 16}
+
+_backend = None
+
+
+def set_backend(name: Optional[str]):
+    """
+    Always use the backend :code:`name` (:code:`'python'` or :code:`'numpy'`), or choose it by input size again if
+    :code:`name` is :code:`None`. The numpy backend still falls back to pure Python when int64 could overflow.
+    """
+    if name is not None and name not in BACKENDS:
+        raise ValueError(f"Unknown backend! Choose one of {', '.join(BACKENDS)}.")
+    if name == 'numpy' and _numpy() is None:
+        raise ImportError("The numpy backend needs numpy! Install pytom with the 'numpy' extra.")
+    global _backend
+    _backend = name
+
+
+def select_backend(kernel: str, n_beats: int, n_steps: int):
+    """
+    Backend to run :code:`kernel` on a rhythm of :code:`n_beats` beats and :code:`n_steps` steps.
+
+    >>> select_backend('squared_spans', 8, 16).name
+    'python'
+    """
+    if _backend == 'python' or not _fits_int64(kernel, n_beats, n_steps):
+        return PythonBackend
+    if _backend == 'numpy' or (n_beats >= NUMPY_MIN_BEATS[kernel] and _numpy() is not None):
+        return NumpyBackend
+    return PythonBackend
@@ -1,16 +1,9 @@
-from typing import List, Union
+from typing import Iterator, List, Tuple, Union
 from math import gcd
 
-
-def steps_from_beat_durations(durations: List[int]) -> List[int]:
-    if any(x <= 0 for x in durations):
-        raise ValueError("Negative or zero length durations do not make sense!")
-
-    return sum([[1] + [0] * (x - 1) for x in durations], [])
-
-
-def indices_from_steps(steps: List[int]) -> List[int]:
-    return [index for index, value in enumerate(steps) if value == 1]
+from pytom.libs import uglyness
+from pytom.libs.core import durations_to_steps as steps_from_beat_durations, steps_to_indices as indices_from_steps
+from pytom.libs.utils import memoize
 
 
 def distribute_remainder(duration: int, remainder: Union[int, List[int]]) -> List[int]:
@@ -23,7 +16,18 @@ def distribute_remainder(duration: int, remainder: Union[int, List[int]]) -> Lis
     return [x + y for x, y in zip(durations, remainder_steps)]
 
 
-def euclid(n_steps: int, n_beats: int) -> List[int]:
+@memoize(maxsize=1024)
+def euclidean_durations(n_steps: int, n_beats: int) -> Tuple[int, ...]:
+    """
+    Durations of the Euclidean rhythm with :code:`n_steps` steps and :code:`n_beats` beats.
+
+    Shared, memoized core of :code:`euclid` and :code:`bjorklund`. The recursion goes through the cache, so the
+    :code:`(n_beats, remainder)` subproblems are shared between calls. Use :code:`euclidean_durations.cache_info()`
+    for hit and miss counters and :code:`euclidean_durations.set_maxsize()` to change the size bound.
+
+    >>> euclidean_durations(12, 5)
+    (3, 2, 2, 3, 2)
+    """
     if n_beats <= 0 or n_steps <= 0:
         raise ValueError("Negative or zero number of steps or beats do not make sense!")
     if n_beats > n_steps:
@@ -31,9 +35,18 @@ def euclid(n_steps: int, n_beats: int) -> List[int]:
 
     quotient, remainder = divmod(n_steps, n_beats)
     if remainder == 0:
-        return [quotient] * n_beats
+        return (quotient,) * n_beats
 
-    return distribute_remainder(quotient, euclid(n_beats, remainder))
+    durations = [quotient] * n_beats
+    index = 0
+    for duration in euclidean_durations(n_beats, remainder):
+        durations[index] += 1
+        index += duration
+    return tuple(durations)
+
+
+def euclid(n_steps: int, n_beats: int) -> List[int]:
+    return list(euclidean_durations(n_steps, n_beats))
 
 
 class Euclid:
@@ -46,24 +59,83 @@ class Euclid:
         self.steps = steps_from_beat_durations(self.beat_durations)
         self.indices = indices_from_steps(self.steps)
 
-    def __delta(self, j: int, i: int) -> int:
-        return (self.indices[(i + j) % self.n_beats] - self.indices[i]) % self.n_steps
-
-    def __delta_bar(self, i) -> float:
-        result = 0
-        for j in range(1, self.n_beats):
-            result += self.__delta(j, i)
-        return result / (self.n_beats - 1)
-
     def uglyness(self, i: int) -> float:
-        result = 0
-        for j in range(1, self.n_beats):
-            result += (self.__delta(j, i) - self.__delta_bar(i)) ** 2
-        return result / (self.n_beats - 1)
+        return uglyness.beat_uglyness(self.indices, self.n_steps, i)
 
     def total_uglyness(self) -> float:
-        result = 0
-        for j in range(1, self.n_beats // 2 + 1):
-            for i in range(0, self.n_beats):
-                result += (self.__delta(j, i) - (j * self.n_steps) / self.n_beats) ** 2
-        return 2 * result / self.n_beats
+        return uglyness.total_uglyness(self.indices, self.n_steps)
+
+
+def bjorklund_phase(n_steps: int, n_beats: int) -> int:
+    """
+    Phase of the Euclidean rhythm generated by :code:`bjorklund(n_steps, n_beats)`.
+
+    Unrolling the recursion of :code:`bjorklund` gives a closed form for the index of every beat,
+    :code:`(i * n_steps + phase) // n_beats`. Each level of the recursion flips the phase of the level below it, so
+    the phase is an alternating sum of the divisors of the Euclidean algorithm, i.e. of the denominators of the
+    continued fraction expansion of :code:`n_steps / n_beats`.
+
+    :param n_steps: number of steps
+    :param n_beats: number of beats
+    :return: phase, between 0 and :code:`n_beats - 1`
+
+    >>> bjorklund_phase(8, 3)
+    1
+    >>> [(i * 8 + 1) // 3 for i in range(3)]
+    [0, 3, 5]
+    """
+    if n_beats <= 0 or n_steps <= 0:
+        raise ValueError("Negative or zero number of steps or beats do not make sense!")
+    if n_beats > n_steps:
+        raise ValueError("Number of beats cannot be more than the number of steps!")
+
+    phase, sign = 0, 1
+    remainder = n_steps % n_beats
+    while remainder:
+        phase += sign * (n_beats - 1)
+        sign = -sign
+        n_steps, n_beats = n_beats, remainder
+        remainder = n_steps % n_beats
+    return phase
+
+
+def iter_euclid(n_steps: int, n_beats: int) -> Iterator[int]:
+    """
+    Iterate over the durations of the Euclidean rhythm with :code:`n_steps` steps and :code:`n_beats` beats.
+
+    Yields the same durations as :code:`euclid` and :code:`bjorklund`, but without recursion or intermediate lists.
+    Only the phase is computed up front (in :math:`O(\\log n\\_steps)`), then each duration is the difference of two
+    consecutive beat indices, so memory stays constant however many steps there are.
+
+    >>> list(iter_euclid(12, 5))
+    [3, 2, 2, 3, 2]
+    >>> sum(iter_euclid(10 ** 7, 10 ** 6 + 1))
+    10000000
+    """
+    # The phase is computed here, not in the generator, so invalid arguments raise when it is called.
+    return _iter_euclid(n_steps, n_beats, bjorklund_phase(n_steps, n_beats))
+
+
+def _iter_euclid(n_steps: int, n_beats: int, phase: int) -> Iterator[int]:
+    index = 0
+    for i in range(1, n_beats + 1):
+        next_index = (i * n_steps + phase) // n_beats
+        yield next_index - index
+        index = next_index
+
+
+def iter_euclid_steps(n_steps: int, n_beats: int) -> Iterator[int]:
+    """
+    Iterate over the steps of the Euclidean rhythm with :code:`n_steps` steps and :code:`n_beats` beats.
+
+    >>> list(iter_euclid_steps(8, 3))
+    [1, 0, 0, 1, 0, 1, 0, 0]
+    """
+    return _iter_euclid_steps(iter_euclid(n_steps, n_beats))
+
+
+def _iter_euclid_steps(durations: Iterator[int]) -> Iterator[int]:
+    for duration in durations:
+        yield 1
+        for _ in range(duration - 1):
+            yield 0
@@ -0,0 +1,229 @@
+from typing import BinaryIO, Iterable, List, Sequence, Tuple, Union
+
+from pytom.libs.bjorklund import Bjorklund
+from pytom.libs.core import _numpy
+from pytom.libs.polyrhythm import Polyrhythm
+from pytom.libs.utils import lcm
+
+# Ticks per quarter note of written files.
+PPQ = 480
+
+# General MIDI percussion, one instrument per voice: kick, snare, closed and open hi-hat, clap, rim shot, low and high
+# tom, crash, ride, cowbell, claves, wood blocks, cuica and triangle.
+DRUMS = [36, 38, 42, 46, 39, 37, 45, 50, 49, 51, 56, 75, 76, 77, 78, 81]
+
+Patterns = Union[Bjorklund, Polyrhythm, Iterable[Bjorklund]]
+
+
+def _voices(patterns: Patterns) -> List[Bjorklund]:
+    if isinstance(patterns, Polyrhythm):
+        if not all(patterns.masks):
+            # A voice is a pattern of notes, and dropping a silent layer would give the next ones its pitch.
+            raise ValueError("Every layer of a polyrhythm must have at least one beat to be played!")
+        return [Bjorklund.from_mask(mask, period) for mask, period in zip(patterns.masks, patterns.periods)]
+    voices = [patterns] if isinstance(patterns, Bjorklund) else list(patterns)
+    if not voices or any(not voice.n_steps for voice in voices):
+        raise ValueError("There must be at least one voice, and voices cannot be empty!")
+    return voices
+
+
+def _cycle(voices: List[Bjorklund], n_steps) -> int:
+    if n_steps is None:
+        n_steps = 1
+        for voice in voices:
+            n_steps = lcm(n_steps, voice.n_steps)
+    if n_steps < 0:
+        raise ValueError("Number of steps cannot be negative!")
+    return n_steps
+
+
+def _step_event_arrays(voices: List[Bjorklund], n_steps: int):
+    # The same events as `step_events`, as NumPy arrays.
+    np = _numpy()
+    onsets, durations, numbers = [], [], []
+    for number, voice in enumerate(voices):
+        period = voice.n_steps
+        cycles = -(-n_steps // period)
+        voice_onsets = (np.arange(cycles, dtype=np.int64)[:, None] * period + voice.indices).ravel()
+        keep = voice_onsets < n_steps
+        onsets.append(voice_onsets[keep])
+        durations.append(np.tile(np.asarray(voice.durations, dtype=np.int64), cycles)[keep])
+        numbers.append(np.full(keep.sum(), number, dtype=np.int64))
+    onsets, durations, numbers = np.concatenate(onsets), np.concatenate(durations), np.concatenate(numbers)
+    order = np.lexsort((numbers, onsets))
+    onsets, durations, numbers = onsets[order], durations[order], numbers[order]
+    return onsets, np.minimum(durations, n_steps - onsets), numbers
+
+
+def step_events(patterns: Patterns, n_steps: int = None) -> Tuple[List[int], List[int], List[int]]:
+    """
+    Notes of one or more voices repeated over :code:`n_steps` steps, sorted by onset, then voice. A note lasts until
+    the next beat of its voice, and the last ones are cut at :code:`n_steps`.
+
+    :param patterns: a :code:`Bjorklund`, a list of them or a :code:`Polyrhythm`
+    :param n_steps: number of steps, default the common cycle of the voices
+    :return: onset and duration in steps, and voice of every note
+
+    >>> onsets, durations, voices = step_events([Bjorklund([2, 1]), Bjorklund([1, 1])])
+    >>> onsets
+    [0, 0, 1, 2, 2, 3, 3, 4, 5, 5]
+    >>> durations
+    [2, 1, 1, 1, 1, 2, 1, 1, 1, 1]
+    >>> voices
+    [0, 1, 1, 0, 1, 0, 1, 1, 0, 1]
+    """
+    voices = _voices(patterns)
+    n_steps = _cycle(voices, n_steps)
+    if _numpy() is not None:
+        return tuple(array.tolist() for array in _step_event_arrays(voices, n_steps))
+
+    events = []
+    for number, voice in enumerate(voices):
+        indices, durations = voice.indices, voice.durations
+        for start in range(0, n_steps, voice.n_steps):
+            for index, duration in zip(indices, durations):
+                onset = start + index
+                if onset >= n_steps:
+                    break
+                events.append((onset, number, min(duration, n_steps - onset)))
+    events.sort()
+    return ([onset for onset, _, _ in events], [duration for _, _, duration in events],
+            [number for _, number, _ in events])
+
+
+def render(patterns: Patterns, tempo: float = 120, subdivision: int = 4,
+           n_steps: int = None) -> Tuple[List[float], List[float], List[int]]:
+    """
+    Absolute onset times and durations, in seconds, of the notes of one or more voices.
+
+    :param patterns: a :code:`Bjorklund`, a list of them or a :code:`Polyrhythm`
+    :param tempo: quarter notes per minute
+    :param subdivision: steps per quarter note
+    :param n_steps: number of steps, default the common cycle of the voices
+    :return: onset and duration in seconds, and voice of every note, sorted by onset then voice
+
+    >>> render(Bjorklund([3, 2, 3]), tempo=60, subdivision=2)
+    ([0.0, 1.5, 2.5], [1.5, 1.0, 1.5], [0, 0, 0])
+    """
+    if tempo <= 0 or subdivision <= 0:
+        raise ValueError("Tempo and subdivision must be positive!")
+    seconds = 60 / (tempo * subdivision)
+    onsets, durations, voices = step_events(patterns, n_steps)
+    return [onset * seconds for onset in onsets], [duration * seconds for duration in durations], voices
+
+
+def _vlq(value: int) -> bytes:
+    # Variable-length quantity: 7 bits per byte, most significant first, continuation bit on all but the last.
+    data = [value & 0x7F]
+    value >>= 7
+    while value:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    return bytes(reversed(data))
+
+
+def _encode_events(times, notes, velocities, status: int) -> bytes:
+    """
+    Note events with their delta times, in one pre-sized buffer. Every event is a note on, and note offs have zero
+    velocity, so the status byte is only written once (running status).
+    """
+    np = _numpy()
+    if np is None:
+        data = bytearray()
+        previous = 0
+        for i, (time, note, velocity) in enumerate(zip(times, notes, velocities)):
+            data += _vlq(time - previous)
+            if not i:
+                data.append(status)
+            data.append(note)
+            data.append(velocity)
+            previous = time
+        return bytes(data)
+
+    deltas = np.diff(times, prepend=0)
+    lengths = 1 + (deltas >= 1 << 7) + (deltas >= 1 << 14) + (deltas >= 1 << 21)
+    sizes = lengths + 2
+    sizes[:1] += 1
+    starts = np.cumsum(sizes) - sizes
+    data = np.empty(int(sizes.sum()), dtype=np.uint8)
+    for byte in range(4):
+        has_byte = lengths > byte
+        remaining = lengths[has_byte] - 1 - byte
+        value = (deltas[has_byte] >> (7 * remaining)) & 0x7F | np.where(remaining > 0, 0x80, 0)
+        data[starts[has_byte] + byte] = value
+    positions = starts + lengths
+    if len(positions):
+        data[positions[0]] = status
+        positions[0] += 1
+    data[positions] = notes
+    data[positions + 1] = velocities
+    return data.tobytes()
+
+
+def write_midi(f: BinaryIO, patterns: Patterns, tempo: float = 120, subdivision: int = 4, n_steps: int = None,
+               pitches: Sequence[int] = None, velocity: int = 100, channel: int = 9, ppq: int = PPQ) -> int:
+    """
+    Write one or more voices as a Standard MIDI File (format 0).
+
+    Note ons and offs are sorted and encoded all at once, with NumPy when it is installed, into a single buffer that
+    is written with one call. Hundreds of thousands of notes take a fraction of a second.
+
+    :param f: binary file
+    :param patterns: a :code:`Bjorklund`, a list of them or a :code:`Polyrhythm`
+    :param tempo: quarter notes per minute
+    :param subdivision: steps per quarter note, :code:`ppq` must be a multiple of it
+    :param n_steps: number of steps, default the common cycle of the voices
+    :param pitches: MIDI note of each voice, default General MIDI drums
+    :param velocity: velocity of every note
+    :param channel: MIDI channel, from 0, default the percussion channel
+    :param ppq: ticks per quarter note
+    :return: number of notes written
+    """
+    voices = _voices(patterns)
+    n_steps = _cycle(voices, n_steps)
+    pitches = DRUMS if pitches is None else list(pitches)
+    if tempo <= 0 or subdivision <= 0:
+        raise ValueError("Tempo and subdivision must be positive!")
+    if not 0 < ppq < 1 << 15 or ppq % subdivision:
+        raise ValueError("Ticks per quarter note must be a multiple of the subdivision, below 32768!")
+    if len(pitches) < len(voices) or any(not 0 <= pitch < 128 for pitch in pitches):
+        raise ValueError("There must be a pitch from 0 to 127 for each voice!")
+    if not 0 < velocity < 128 or not 0 <= channel < 16:
+        raise ValueError("Velocity must be from 1 to 127 and channel from 0 to 15!")
+    microseconds = round(60000000 / tempo)
+    if not 0 < microseconds < 1 << 24:
+        raise ValueError("Tempo is out of the range of MIDI files!")
+    ticks = ppq // subdivision
+    # Events are never further apart than the longest note.
+    if max(max(voice.durations) for voice in voices) * ticks >= 1 << 28:
+        raise ValueError("Notes are too long for MIDI delta times!")
+
+    np = _numpy()
+    if np is not None:
+        onsets, durations, numbers = _step_event_arrays(voices, n_steps)
+        notes = np.asarray(pitches, dtype=np.int64)[numbers]
+        # Note offs come before note ons at the same time.
+        times = np.concatenate(((onsets + durations) * ticks, onsets * ticks))
+        kinds = np.concatenate((np.zeros(len(onsets), dtype=np.int64), np.ones(len(onsets), dtype=np.int64)))
+        order = np.lexsort((kinds, times))
+        times, notes, velocities = times[order], np.concatenate((notes, notes))[order], (kinds * velocity)[order]
+        n_notes = len(onsets)
+    else:
+        onsets, durations, numbers = step_events(voices, n_steps)
+        events = sorted([((onset + duration) * ticks, 0, pitches[number]) for onset, duration, number in
+                         zip(onsets, durations, numbers)] +
+                        [(onset * ticks, velocity, pitches[number]) for onset, number in zip(onsets, numbers)],
+                        key=lambda event: (event[0], event[1] > 0))
+        times, velocities, notes = [x for x, _, _ in events], [x for _, x, _ in events], [x for _, _, x in events]
+        n_notes = len(onsets)
+
+    track = b''.join([
+        b'\x00\xff\x51\x03', microseconds.to_bytes(3, 'big'),
+        _encode_events(times, notes, velocities, 0x90 | channel),
+        b'\x00\xff\x2f\x00',
+    ])
+    f.write(b''.join([
+        b'MThd', (6).to_bytes(4, 'big'), (0).to_bytes(2, 'big'), (1).to_bytes(2, 'big'), ppq.to_bytes(2, 'big'),
+        b'MTrk', len(track).to_bytes(4, 'big'), track,
+    ]))
+    return n_notes
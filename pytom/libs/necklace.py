@@ -0,0 +1,103 @@
+from typing import Iterator, List, Optional, Tuple
+
+
+def _bitmap_to_durations(bitmap: int, n_steps: int) -> List[int]:
+    indices = [i for i in range(n_steps) if bitmap >> i & 1]
+    durations = [b - a for a, b in zip(indices, indices[1:])]
+    durations.append(indices[0] + n_steps - indices[-1])
+    return durations
+
+
+def necklaces(n_steps: int, n_beats: int, after: Optional[int] = None,
+              shard: Tuple[int, int] = (0, 1)) -> Iterator[int]:
+    """
+    Iterate over every rhythm with :code:`n_steps` steps and :code:`n_beats` beats, up to rotation.
+
+    Each rhythm is yielded exactly once, as an integer bitmap of its steps (bit :code:`i` is step :code:`i`), in the
+    rotation whose durations are lexicographically least. Durations are generated in lexicographic order with the
+    Fredricksen-Kessler-Maiorana rule, restricted to sequences that sum to :code:`n_steps`, on an explicit stack, so
+    each rhythm costs amortized constant work plus the bitmap update.
+
+    :param n_steps: number of steps
+    :param n_beats: number of beats
+    :param after: resume after this previously yielded bitmap (a checkpoint)
+    :param shard: :code:`(index, count)`. Only yield the rhythms of this shard. The shards of a given count are
+        disjoint, and together they yield every rhythm.
+    :return: iterator of step bitmaps
+
+    >>> [bin(x) for x in necklaces(6, 3)]
+    ['0b111', '0b1011', '0b10011', '0b10101']
+    >>> [bin(x) for x in necklaces(6, 3, after=0b1011)]
+    ['0b10011', '0b10101']
+    """
+    if n_beats <= 0 or n_steps <= 0:
+        raise ValueError("Negative or zero number of steps or beats do not make sense!")
+    if n_beats > n_steps:
+        raise ValueError("Number of beats cannot be more than the number of steps!")
+    index, count = shard
+    if not 0 <= index < count:
+        raise ValueError("Shard index must be between 0 and the number of shards!")
+
+    if after is not None and not (0 < after < 1 << n_steps and bin(after).count('1') == n_beats):
+        raise ValueError("Checkpoint must be a bitmap of the given number of steps and beats!")
+
+    n, k = n_steps, n_beats
+    if k == 1:
+        if index == 0 and after is None:
+            yield 1
+        return
+
+    checkpoint = [0] + _bitmap_to_durations(after, n) if after is not None else None
+    on_path = 0 if checkpoint is not None else -1
+
+    # a[t] is the duration of beat t (1-based), period[t] the length of the longest Lyndon prefix of a[1..t].
+    # rem, position and mask are the remaining steps, the onset of beat t and the bitmap before beat t.
+    a = [0] * (k + 1)
+    period = [1] * (k + 1)
+    rem = [n] + [0] * k
+    position = [0] * (k + 1)
+    mask = [0] * (k + 1)
+    key = [0] * (k + 1)
+    split = min(3, k - 1)
+
+    t = 1
+    rem[1] = n
+    while t >= 1:
+        if a[t] == 0:
+            if on_path == t - 1:
+                a[t] = checkpoint[t]
+            else:
+                a[t] = 1 if t == 1 else a[t - period[t - 1]]
+        else:
+            a[t] += 1
+            if on_path >= t:
+                on_path = t - 1
+
+        high = n // k if t == 1 else rem[t] - (k - t) * a[1]
+        if a[t] > high:
+            a[t] = 0
+            t -= 1
+            continue
+
+        if on_path == t - 1 and a[t] == checkpoint[t]:
+            on_path = t
+        if t > 1:
+            period[t] = period[t - 1] if a[t] == a[t - period[t - 1]] else t
+        key[t] = key[t - 1] * (n + 1) + a[t]
+        if t == split and key[t] % count != index:
+            continue
+
+        rem[t + 1] = rem[t] - a[t]
+        position[t + 1] = position[t] + a[t]
+        mask[t + 1] = mask[t] | 1 << position[t]
+
+        if t + 1 == k:
+            last, reference = rem[k], a[k - period[k - 1]]
+            if on_path == k - 1:
+                continue
+            if last > reference or (last == reference and k % period[k - 1] == 0):
+                yield mask[k] | 1 << position[k]
+            continue
+
+        t += 1
+        a[t] = 0
@@ -0,0 +1,259 @@
+import io
+import re
+from fractions import Fraction
+from functools import reduce
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+from pytom.libs.algebraic import Euclid, RhythmTree
+from pytom.libs.utils import lcm
+
+# Characters read from, or written to, a file at a time.
+CHUNK_SIZE = 1 << 16
+
+_token = re.compile(r'[()]|[^\s()]+')
+
+
+def _tokens(f: TextIO, chunk_size: int) -> Iterator[str]:
+    """Parentheses and atoms of an s-expression, read a chunk at a time. An atom cut at the end of a chunk is kept
+    until the next one."""
+    pending = ''
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        text = pending + chunk
+        pending = ''
+        for match in _token.finditer(text):
+            if match.end() == len(text) and match.group() not in '()':
+                pending = match.group()
+            else:
+                yield match.group()
+    if pending:
+        yield pending
+
+
+def _next(tokens: Iterator[str]) -> str:
+    token = next(tokens, None)
+    if token is None:
+        raise ValueError("Unexpected end of rhythm tree!")
+    return token
+
+
+def _expect(token: str, expected: str):
+    if token != expected:
+        raise ValueError(f"Expected '{expected}' but found '{token}'!")
+
+
+def _duration(token: str) -> Tuple[Optional[Fraction], Optional[Tuple[int, int]]]:
+    # Duration and time signature of the root. '?' is neither, it is computed from the children.
+    if token in '()':
+        raise ValueError(f"Expected a duration but found '{token}'!")
+    if token == '?':
+        return None, None
+    match = re.fullmatch(r'(\d+)/(\d+)', token)
+    if match:
+        return None, (int(match.group(1)), int(match.group(2)))
+    try:
+        return Fraction(token), None
+    except ValueError:
+        raise ValueError(f"'{token}' is not a duration!")
+
+
+def _weight(token: str) -> int:
+    if token in '()':
+        raise ValueError(f"Expected a weight but found '{token}'!")
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    if re.fullmatch(r'[+-]?\d+\.\d*', token):
+        raise ValueError("Tied notes (float weights) are not supported!")
+    raise ValueError(f"'{token}' is not a weight!")
+
+
+def _signature(token: str, tokens: Iterator[str]) -> Optional[Tuple[int, int]]:
+    # Time signature of a measure, 4//4 or (4 4), or None if the token is a weight.
+    if token == '(':
+        signature = _weight(_next(tokens)), _weight(_next(tokens))
+        _expect(_next(tokens), ')')
+    else:
+        match = re.fullmatch(r'(\d+)//(\d+)', token)
+        if not match:
+            return None
+        signature = int(match.group(1)), int(match.group(2))
+    if min(signature) <= 0:
+        raise ValueError("Time signatures must be positive!")
+    return signature
+
+
+def _read_tree(tokens: Iterator[str]) -> Optional[RhythmTree]:
+    token = next(tokens, None)
+    if token is None:
+        return None
+    _expect(token, '(')
+    duration, signature = _duration(_next(tokens))
+    _expect(_next(tokens), '(')
+    # (parent, weight, signature) of every node but the root, in order. The weights of measures are only known once
+    # all of them are read.
+    nodes: List[tuple] = []
+    # Nodes whose subdivisions are being read.
+    stack = [0]
+    while stack:
+        token = _next(tokens)
+        if token == ')':
+            # End of the subdivisions, then of the (duration subdivisions) pair.
+            stack.pop()
+            _expect(_next(tokens), ')')
+        elif token == '(':
+            token = _next(tokens)
+            measure = _signature(token, tokens)
+            if measure is not None and stack[-1] != 0:
+                raise ValueError("Only the children of the root can be measures!")
+            nodes.append((stack[-1], None if measure else _weight(token), measure))
+            _expect(_next(tokens), '(')
+            stack.append(len(nodes))
+        else:
+            nodes.append((stack[-1], _weight(token), None))
+
+    measures = [measure for _, _, measure in nodes if measure]
+    if measures:
+        if len(measures) != sum(parent == 0 for parent, _, _ in nodes):
+            raise ValueError("Children of the root must be either all measures or none!")
+        # Measures divide the root in proportion to their signatures.
+        scale = reduce(lcm, [denominator for _, denominator in measures])
+        nodes = [(parent, measure[0] * (scale // measure[1]) if measure else weight, measure)
+                 for parent, weight, measure in nodes]
+    if duration is None and signature is None:
+        if measures:
+            duration = sum(Fraction(*measure) for measure in measures)
+        else:
+            duration = sum(abs(weight) for parent, weight, _ in nodes if parent == 0)
+    tree = RhythmTree(duration, signature)
+    for parent, weight, measure in nodes:
+        tree.add(parent, weight, measure)
+    return tree
+
+
+def iter_load(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[RhythmTree]:
+    """
+    Read rhythm trees in OpenMusic's RT notation :code:`(duration (subdivisions))` from a text file, one after the
+    other. The file is read a chunk at a time and only the tree being read is kept in memory.
+
+    Durations are integers, decimals, ratios like :code:`6/8`, which are kept as they are written, or :code:`?`, which
+    is the sum of the durations of the children. Subdivisions are integer weights, negative for rests, or
+    :code:`(weight (subdivisions))` subtrees. The children of the root can also be the measures of a voice,
+    :code:`(4//4 (subdivisions))` or :code:`((4 4) (subdivisions))`, whose durations are their time signatures. Tied
+    notes are not supported.
+
+    :param f: text file
+    :param chunk_size: characters read at a time
+    :return: iterator of :code:`RhythmTree`
+    """
+    tokens = _tokens(f, chunk_size)
+    while True:
+        tree = _read_tree(tokens)
+        if tree is None:
+            return
+        yield tree
+
+
+def load(f: TextIO, chunk_size: int = CHUNK_SIZE) -> RhythmTree:
+    """
+    Read a single rhythm tree from a text file. See :code:`iter_load`.
+    """
+    trees = iter_load(f, chunk_size)
+    tree = next(trees, None)
+    if tree is None:
+        raise ValueError("There is no rhythm tree!")
+    if next(trees, None) is not None:
+        raise ValueError("There is more than one rhythm tree!")
+    return tree
+
+
+def loads(text: str) -> RhythmTree:
+    """
+    Parse a single rhythm tree.
+
+    >>> loads('(2 (1 (2 (3 2 3)) -1))').flatten(exact=False)
+    ([0.0, 0.5, 0.875, 1.125], [0.5, 0.375, 0.25, 0.375])
+    >>> tree = loads('(? ((4//4 (1 1 1 1)) (6//8 (3 3))))')
+    >>> tree.duration, tree.signature(6)
+    (Fraction(7, 4), (6, 8))
+    """
+    return load(io.StringIO(text))
+
+
+def _format_duration(tree: RhythmTree) -> str:
+    signature = tree.signature(0)
+    if signature is not None:
+        return f"{signature[0]}/{signature[1]}"
+    measures = [tree.signature(node) for node in tree.children(0)]
+    if measures and all(measures) and tree.duration == sum(Fraction(*measure) for measure in measures):
+        # As OpenMusic writes voices.
+        return '?'
+    duration = tree.duration
+    return str(duration.numerator) if duration.denominator == 1 else f"{duration.numerator}/{duration.denominator}"
+
+
+def dump(tree: Union[RhythmTree, Euclid], f: TextIO, chunk_size: int = CHUNK_SIZE):
+    """
+    Write a rhythm tree in OpenMusic's RT notation to a text file. The tree is traversed without recursion and written
+    a chunk at a time, so the whole text is never built. A :code:`Euclid` proportion is written as a tree of duration 1
+    subdivided by its beat durations. Time signatures are written as they were read, and measures as :code:`4//4`.
+
+    :param tree: :code:`RhythmTree` or :code:`Euclid`
+    :param f: text file
+    :param chunk_size: about how many characters are written at a time
+    """
+    if isinstance(tree, Euclid):
+        tree = RhythmTree.from_nested((1, tree))
+    parts = ['(', _format_duration(tree), ' (']
+    size = 0
+    stack = [iter(tree.children(0))]
+    first = True
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            parts.append('))')
+            first = False
+            continue
+        if not first:
+            parts.append(' ')
+        signature = tree.signature(node)
+        if signature is None and tree.is_leaf(node):
+            parts.append(str(tree.weight(node)))
+            first = False
+        else:
+            head = tree.weight(node) if signature is None else f"{signature[0]}//{signature[1]}"
+            parts.append(f"({head} (")
+            stack.append(iter(tree.children(node)))
+            first = True
+        size += len(parts[-1]) + 1
+        if size >= chunk_size:
+            f.write(''.join(parts))
+            parts, size = [], 0
+    f.write(''.join(parts))
+
+
+def dump_all(trees: Iterable[Union[RhythmTree, Euclid]], f: TextIO, chunk_size: int = CHUNK_SIZE):
+    """
+    Write rhythm trees one per line, as they come. They can be read back with :code:`iter_load`.
+    """
+    for tree in trees:
+        dump(tree, f, chunk_size)
+        f.write('\n')
+
+
+def dumps(tree: Union[RhythmTree, Euclid]) -> str:
+    """
+    Rhythm tree in OpenMusic's RT notation.
+
+    >>> dumps(RhythmTree.from_nested((2, [1, (2, Euclid(8, 3)), -1])))
+    '(2 (1 (2 (3 2 3)) -1))'
+    >>> dumps(Euclid(5, 2))
+    '(1 (3 2))'
+    """
+    f = io.StringIO()
+    dump(tree, f)
+    return f.getvalue()
@@ -0,0 +1,156 @@
+from collections.abc import Sequence
+from itertools import repeat
+from typing import Iterator
+
+from pytom.libs.bjorklund import Bjorklund
+from pytom.libs.euclid import bjorklund_phase
+
+
+class EuclideanPattern(Sequence):
+    """
+    EuclideanPattern(n_steps, n_beats, rotation=0)
+
+    Read-only, virtual sequence of the steps of :code:`bjorklund(n_steps, n_beats)`, rotated like
+    :code:`Bjorklund.rotate_steps(rotation)`. Steps are never materialized: every query is answered from the closed
+    form of the beat indices, :code:`(j * n_steps + phase) // n_beats`, so memory stays constant however long the
+    pattern is.
+
+    >>> x = EuclideanPattern(8, 3)
+    >>> list(x)
+    [1, 0, 0, 1, 0, 1, 0, 0]
+    >>> y = EuclideanPattern(10 ** 9, 10 ** 6 + 1, rotation=5)
+    >>> y[123456789], y.onset(1000), y.n_beats
+    (0, 1000004, 1000001)
+    """
+
+    def __init__(self, n_steps: int, n_beats: int, rotation: int = 0):
+        self.__phase = bjorklund_phase(n_steps, n_beats)
+        self.__n_steps = n_steps
+        self.__n_beats = n_beats
+        self.__rotation = rotation % n_steps
+
+    @property
+    def n_steps(self) -> int:
+        return self.__n_steps
+
+    @property
+    def n_beats(self) -> int:
+        return self.__n_beats
+
+    @property
+    def rotation(self) -> int:
+        return self.__rotation
+
+    def rotate_steps(self, n: int) -> 'EuclideanPattern':
+        """
+        Pattern rotated stepwise. Same as :code:`Bjorklund.rotate_steps`, but returns a new pattern.
+
+        >>> EuclideanPattern(8, 3).rotate_steps(1)[:]
+        [0, 1, 0, 0, 1, 0, 1, 0]
+        """
+        return EuclideanPattern(self.__n_steps, self.__n_beats, self.__rotation + n)
+
+    def __unrotated_onset(self, j: int) -> int:
+        return (j * self.__n_steps + self.__phase) // self.__n_beats
+
+    def __unrotated_rank(self, step: int) -> int:
+        # Number of beats before `step` in the unrotated pattern, ceil((step * n_beats - phase) / n_steps).
+        return -((self.__phase - step * self.__n_beats) // self.__n_steps)
+
+    def rank(self, step: int) -> int:
+        """
+        Number of beats before :code:`step`.
+
+        >>> EuclideanPattern(8, 3).rank(4)
+        2
+        """
+        n_steps, rotation = self.__n_steps, self.__rotation
+        if not 0 <= step <= n_steps:
+            raise IndexError("Step out of range!")
+        wrapped = self.__n_beats - self.__unrotated_rank(n_steps - rotation)
+        if step < rotation:
+            return self.__unrotated_rank(step + n_steps - rotation) - (self.__n_beats - wrapped)
+        return wrapped + self.__unrotated_rank(step - rotation)
+
+    def onset(self, j: int) -> int:
+        """
+        Index of the step of the :code:`j`th beat.
+
+        >>> EuclideanPattern(8, 3).rotate_steps(4).onset(0)
+        1
+        """
+        n_beats, n_steps, rotation = self.__n_beats, self.__n_steps, self.__rotation
+        if j < 0:
+            j += n_beats
+        if not 0 <= j < n_beats:
+            raise IndexError("Beat index out of range!")
+        wrapped = n_beats - self.__unrotated_rank(n_steps - rotation)
+        if j < wrapped:
+            return self.__unrotated_onset(n_beats - wrapped + j) + rotation - n_steps
+        return self.__unrotated_onset(j - wrapped) + rotation
+
+    def onsets(self, start: int = 0, stop: int = None) -> Iterator[int]:
+        """
+        Iterate over the step indices of the beats in :code:`range(start, stop)`.
+
+        >>> list(EuclideanPattern(8, 3).onsets(1, 8))
+        [3, 5]
+        """
+        stop = self.__n_steps if stop is None else stop
+        for j in range(self.rank(start), self.rank(stop)):
+            yield self.onset(j)
+
+    def __is_onset(self, step: int) -> bool:
+        step = (step - self.__rotation) % self.__n_steps
+        # The only beat that can fall on `step` is the first one at or after it.
+        j = self.__unrotated_rank(step)
+        return j < self.__n_beats and self.__unrotated_onset(j) == step
+
+    def __len__(self):
+        return self.__n_steps
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, stride = item.indices(self.__n_steps)
+            if stride != 1:
+                return [int(self.__is_onset(i)) for i in range(start, stop, stride)]
+            steps = [0] * max(0, stop - start)
+            for onset in self.onsets(start, max(start, stop)):
+                steps[onset - start] = 1
+            return steps
+
+        if item < 0:
+            item += self.__n_steps
+        if not 0 <= item < self.__n_steps:
+            raise IndexError("Step index out of range!")
+        return int(self.__is_onset(item))
+
+    def __iter__(self):
+        previous = 0
+        for onset in self.onsets():
+            yield from repeat(0, onset - previous)
+            yield 1
+            previous = onset + 1
+        yield from repeat(0, self.__n_steps - previous)
+
+    def __contains__(self, value):
+        return value == 1 or (value == 0 and self.__n_beats < self.__n_steps)
+
+    def count(self, value) -> int:
+        if value == 1:
+            return self.__n_beats
+        if value == 0:
+            return self.__n_steps - self.__n_beats
+        return 0
+
+    def to_bjorklund(self) -> Bjorklund:
+        """
+        Materialize the pattern.
+
+        >>> EuclideanPattern(8, 3, rotation=1).to_bjorklund()
+        <3 2 3> (offset: 1)
+        """
+        return Bjorklund.from_steps(self[:])
+
+    def __repr__(self):
+        return f"EuclideanPattern({self.__n_steps}, {self.__n_beats}, rotation={self.__rotation})"
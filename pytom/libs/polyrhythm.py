@@ -0,0 +1,159 @@
+from functools import reduce
+from typing import Iterable, Iterator, List, Tuple, Union
+
+from pytom.libs.bjorklund import Bjorklund
+from pytom.libs.core import mask_to_steps, steps_to_mask, _numpy, _popcount
+from pytom.libs.utils import lcm
+
+# Steps of the common cycle combined at a time by `chunks` and `histogram`.
+CHUNK_SIZE = 1 << 20
+
+
+class Polyrhythm:
+    """
+    Layers of rhythms played together, each one repeated over their common cycle of :code:`lcm` steps.
+
+    Each layer is kept as an integer bitset, like :code:`Bjorklund.mask`, where bit :code:`i` is step :code:`i`. A
+    window of the cycle is a rotation of the bitset, doubled until it is long enough, so union and intersection are a
+    few big-integer operations per layer. Coincidence counts are added up in bit planes, like a binary adder working on
+    all steps at once, and unpacked with NumPy when it is installed. Long cycles are processed a chunk at a time.
+
+    :param layers: :code:`Bjorklund` rhythms or lists of steps
+
+    >>> layers = Polyrhythm([Bjorklund([2, 1]), [1, 0], [1, 0, 0, 1]])
+    >>> layers.n_steps, layers.union(), layers.intersection()
+    (12, [1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1], [1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0])
+    >>> layers.coincidences()
+    [3, 0, 2, 2, 2, 1, 2, 1, 3, 1, 1, 2]
+    >>> layers.histogram()
+    [1, 4, 5, 2]
+    """
+
+    def __init__(self, layers: Iterable[Union[Bjorklund, List[int]]]):
+        self.periods = []
+        self.masks = []
+        for layer in layers:
+            if isinstance(layer, Bjorklund):
+                period, mask = layer.n_steps, layer.mask
+            else:
+                steps = list(layer)
+                if any(step not in (0, 1) for step in steps):
+                    raise ValueError("Layers must be non-empty lists of 0s and 1s!")
+                period, mask = len(steps), steps_to_mask(steps)
+            if not period:
+                raise ValueError("Layers must be non-empty lists of 0s and 1s!")
+            self.periods.append(period)
+            self.masks.append(mask)
+        if not self.masks:
+            raise ValueError("There must be at least one layer!")
+        self.n_steps = reduce(lcm, self.periods)
+
+    @property
+    def n_layers(self) -> int:
+        return len(self.masks)
+
+    def _windows(self, start: int, size: int) -> List[int]:
+        # Bitsets of every layer over steps start, ..., start + size - 1.
+        windows = []
+        for mask, period in zip(self.masks, self.periods):
+            shift = start % period
+            window = (mask >> shift) | ((mask & ((1 << shift) - 1)) << (period - shift))
+            width = period
+            while width < size:
+                window |= window << width
+                width *= 2
+            windows.append(window & ((1 << size) - 1))
+        return windows
+
+    def _planes(self, start: int, size: int) -> List[int]:
+        # Bit j of every step's coincidence count, for each j.
+        planes = []
+        for carry in self._windows(start, size):
+            for j, plane in enumerate(planes):
+                planes[j], carry = plane ^ carry, plane & carry
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+        return planes
+
+    def _size(self, size):
+        if size is None:
+            return self.n_steps
+        if size < 0:
+            raise ValueError("Size of a window cannot be negative!")
+        return size
+
+    def union(self, start: int = 0, size: int = None) -> List[int]:
+        """
+        Steps where at least one layer has a beat.
+
+        :param start: first step of the window
+        :param size: number of steps of the window, default one cycle
+        """
+        size = self._size(size)
+        return mask_to_steps(reduce(int.__or__, self._windows(start, size)), size)
+
+    def intersection(self, start: int = 0, size: int = None) -> List[int]:
+        """
+        Steps where every layer has a beat. Parameters are the same as :code:`union`.
+        """
+        size = self._size(size)
+        return mask_to_steps(reduce(int.__and__, self._windows(start, size)), size)
+
+    def coincidences(self, start: int = 0, size: int = None) -> List[int]:
+        """
+        Number of layers that have a beat on each step. Parameters are the same as :code:`union`.
+        """
+        size = self._size(size)
+        planes = self._planes(start, size)
+        np = _numpy()
+        if np is None:
+            counts = [0] * size
+            for j, plane in enumerate(planes):
+                for i, bit in enumerate(mask_to_steps(plane, size)):
+                    if bit:
+                        counts[i] += 1 << j
+            return counts
+
+        counts = np.zeros(size, dtype=np.int64)
+        n_bytes = (size + 7) // 8
+        for j, plane in enumerate(planes):
+            bits = np.unpackbits(np.frombuffer(plane.to_bytes(n_bytes, 'big'), dtype=np.uint8))[::-1][:size]
+            counts += bits.astype(np.int64) << j
+        return counts.tolist()
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[int, List[int]]]:
+        """
+        Coincidence counts of one cycle, a chunk at a time, so cycles too long to hold in memory can be streamed.
+
+        :param chunk_size: number of steps of each chunk
+        :return: iterator of :code:`(start, coincidences)`
+        """
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive!")
+        for start in range(0, self.n_steps, chunk_size):
+            yield start, self.coincidences(start, min(chunk_size, self.n_steps - start))
+
+    def histogram(self, chunk_size: int = CHUNK_SIZE) -> List[int]:
+        """
+        Number of steps of one cycle where exactly :code:`k` layers have a beat, for :code:`k` from 0 to
+        :code:`n_layers`. Counted from the bit planes a chunk at a time, without unpacking the steps.
+
+        :param chunk_size: number of steps of each chunk
+        """
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive!")
+        histogram = [0] * (self.n_layers + 1)
+        for start in range(0, self.n_steps, chunk_size):
+            size = min(chunk_size, self.n_steps - start)
+            full = (1 << size) - 1
+            planes = self._planes(start, size)
+            for k in range(self.n_layers + 1):
+                if k >> len(planes):
+                    break
+                equal = full
+                for j, plane in enumerate(planes):
+                    equal &= plane if k >> j & 1 else ~plane
+                histogram[k] += _popcount(equal)
+        return histogram
@@ -0,0 +1,110 @@
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from typing import Dict
+
+CallStats = namedtuple('CallStats', ['category', 'calls', 'seconds'])
+
+# Instrumentation is off by default. Instrumented functions then only pay for a check of this flag.
+_enabled = False
+# Name of the instrumented function -> [category, calls, seconds]
+_stats = {}
+
+
+def instrumented(category: str):
+    """
+    Count the calls of a function and time them, while instrumentation is enabled.
+
+    Times are inclusive: an instrumented function that calls another one is also timed while the other one runs.
+
+    :param category: group of the function in reports, like :code:`'conversion'` or :code:`'uglyness'`
+
+    >>> @instrumented('example')
+    ... def square(x):
+    ...     return x * x
+    >>> with profile() as stats:
+    ...     _ = [square(x) for x in range(10)]
+    >>> stats()['profiling.square'].calls
+    10
+    """
+
+    def decorator(f_):
+        name = f"{f_.__module__.rsplit('.', 1)[-1]}.{f_.__qualname__}"
+
+        @wraps(f_)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return f_(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return f_(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                entry = _stats.get(name)
+                if entry is None:
+                    entry = _stats[name] = [category, 0, 0.0]
+                entry[1] += 1
+                entry[2] += elapsed
+
+        return wrapper
+
+    return decorator
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    _stats.clear()
+
+
+def stats() -> Dict[str, CallStats]:
+    """
+    Counters of every instrumented function that was called while instrumentation was enabled.
+
+    :return: dictionary of function names to :code:`CallStats(category, calls, seconds)`
+    """
+    return {name: CallStats(*entry) for name, entry in _stats.items()}
+
+
+@contextmanager
+def profile():
+    """
+    Reset the counters and enable instrumentation inside a :code:`with` block. Yields :code:`stats`.
+    """
+    was_enabled = _enabled
+    reset()
+    enable()
+    try:
+        yield stats
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def report() -> str:
+    """
+    Table of the counters, grouped by category, slowest first.
+
+    >>> with profile():
+    ...     pass
+    >>> print(report())
+    category     function                                   calls       total ms
+    """
+    lines = [f"{'category':<13}{'function':<40}{'calls':>8}{'total ms':>15}"]
+    rows = sorted(stats().items(), key=lambda item: (item[1].category, -item[1].seconds))
+    for name, (category, calls, seconds) in rows:
+        lines.append(f"{category:<13}{name:<40}{calls:>8}{seconds * 1e3:>15.3f}")
+    return '\n'.join(lines)
@@ -0,0 +1,187 @@
+from typing import List, Tuple
+
+from pytom.libs import uglyness
+from pytom.libs.bjorklund import Bjorklund, steps_to_durations, durations_to_steps
+from pytom.libs.profiling import instrumented
+from pytom.libs.utils import least_rotation
+
+
+class Rhythm:
+    """
+    Rhythm(durations, offset=0)
+
+    Immutable, hashable rhythmic pattern. Two rhythms are equal if their durations are rotations of each other,
+    just like :code:`Bjorklund` objects. The least rotation of the durations (the canonical form of the necklace) is
+    found once, in linear time, when the rhythm is created, so rhythms can be used in sets and as dictionary keys.
+
+    >>> Rhythm([3, 2, 3])
+    Rhythm(<3 2 3>)
+    >>> Rhythm([3, 2, 3]) == Rhythm([2, 3, 3], offset=1)
+    True
+    >>> len({Rhythm([3, 3, 2]), Rhythm([3, 2, 3]), Rhythm([2, 3, 3])})
+    1
+    >>> Rhythm([3, 2, 3]).canonical
+    (2, 3, 3)
+    """
+    __slots__ = ('_durations', '_offset', '_rotation', '_hash')
+
+    @instrumented('construction')
+    def __init__(self, durations: List[int], offset: int = 0):
+        durations = tuple(durations)
+        if any(x <= 0 for x in durations):
+            raise ValueError("Negative or zero length durations do not make sense!")
+        if offset < 0 or (durations and offset >= durations[-1]) or (not durations and offset):
+            raise ValueError("Offset must be less than the last duration!")
+
+        rotation = least_rotation(durations)
+        self.__setstate__((durations, offset, rotation, hash(durations[rotation:] + durations[:rotation])))
+
+    @classmethod
+    def from_steps(cls, steps: List[int]):
+        """
+        Create a rhythm from steps.
+
+        :param steps: list of steps. 1 where there is a beat 0 where there is silence
+        :return: Generated rhythm.
+
+        >>> Rhythm.from_steps([0, 1, 0, 0, 1, 0, 1, 0])
+        Rhythm(<3 2 3> (offset: 1))
+        """
+        offset = steps.index(1) if 1 in steps else 0
+        return cls(steps_to_durations(list(steps)), offset)
+
+    @classmethod
+    def from_bjorklund(cls, bjorklund: Bjorklund):
+        """
+        Create an immutable copy of a :code:`Bjorklund`.
+
+        >>> Rhythm.from_bjorklund(Bjorklund.from_n_steps_n_beats(8, 3))
+        Rhythm(<3 2 3>)
+        """
+        return cls(bjorklund.durations, bjorklund.offset)
+
+    def to_bjorklund(self) -> Bjorklund:
+        """
+        Create a mutable :code:`Bjorklund` with the same durations and offset.
+
+        >>> Rhythm([3, 2, 3], 1).to_bjorklund()
+        <3 2 3> (offset: 1)
+        """
+        return Bjorklund(list(self._durations), self._offset)
+
+    @property
+    def durations(self) -> Tuple[int, ...]:
+        return self._durations
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+    @property
+    def canonical(self) -> Tuple[int, ...]:
+        """
+        Least rotation of the durations. Equal rhythms have the same canonical durations.
+        """
+        return self._durations[self._rotation:] + self._durations[:self._rotation]
+
+    @property
+    def steps(self) -> Tuple[int, ...]:
+        """
+        >>> Rhythm([3, 2, 3], 1).steps
+        (0, 1, 0, 0, 1, 0, 1, 0)
+        """
+        steps = durations_to_steps(self._durations)
+        offset = self._offset
+        return tuple(steps[-offset:] + steps[:-offset] if offset else steps)
+
+    @property
+    def indices(self) -> Tuple[int, ...]:
+        """
+        >>> Rhythm([3, 2, 3], 1).indices
+        (1, 4, 6)
+        """
+        indices = []
+        index = self._offset
+        for duration in self._durations:
+            indices.append(index)
+            index += duration
+        return tuple(indices)
+
+    @property
+    def n_steps(self) -> int:
+        return sum(self._durations)
+
+    @property
+    def n_beats(self) -> int:
+        return len(self._durations)
+
+    @instrumented('rotation')
+    def rotate_durations(self, n: int) -> 'Rhythm':
+        """
+        Rhythm with durations rotated. Same as :code:`Bjorklund.rotate_durations`, but returns a new rhythm.
+
+        >>> Rhythm([3, 2, 5, 4]).rotate_durations(1)
+        Rhythm(<4 3 2 5>)
+        """
+        durations = self._durations
+        if not durations:
+            return self
+        n %= len(durations)
+        rotated = durations[-n:] + durations[:-n] if n else durations
+        return Rhythm(rotated, min(self._offset, rotated[-1] - 1))
+
+    @instrumented('rotation')
+    def rotate_steps(self, n: int) -> 'Rhythm':
+        """
+        Rhythm with steps rotated. Same as :code:`Bjorklund.rotate_steps`, but returns a new rhythm.
+
+        >>> Rhythm([3, 2, 3], 1).rotate_steps(-1)
+        Rhythm(<3 2 3>)
+        """
+        steps = list(self.steps)
+        if not steps:
+            return self
+        n %= len(steps)
+        return Rhythm.from_steps(steps[-n:] + steps[:-n] if n else steps)
+
+    def uglyness_profile(self) -> List[float]:
+        """
+        Uglyness of every beat as defined in Bjorklund (2003).
+        """
+        return uglyness.uglyness_profile(self.indices, self.n_steps)
+
+    def total_uglyness(self) -> float:
+        """
+        Total uglyness of the rhythm as defined in Bjorklund (2003). Equal rhythms have the same total uglyness.
+        """
+        return uglyness.total_uglyness(self.indices, self.n_steps)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable!")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{type(self).__name__} is immutable!")
+
+    def __getstate__(self):
+        return self._durations, self._offset, self._rotation, self._hash
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, Rhythm):
+            return NotImplemented
+        return self._hash == other._hash and self.canonical == other.canonical
+
+    def __len__(self):
+        return self.n_steps
+
+    def __repr__(self):
+        dur_reps = f"<{' '.join([str(i) for i in self._durations])}>"
+        if self._offset:
+            dur_reps = f"{dur_reps} (offset: {self._offset})"
+        return f"Rhythm({dur_reps})"
@@ -0,0 +1,279 @@
+import heapq
+from itertools import accumulate, count
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pytom.libs import uglyness
+from pytom.libs.bjorklund import Bjorklund
+from pytom.libs.utils import least_rotation
+
+
+def _sum_of_squared_spans(indices: List[int], n_steps: int) -> int:
+    """
+    :math:`\\sum_{j=1}^{\\lfloor k/2 \\rfloor} \\sum_i \\delta_j(i)^2`, the only part of the total uglyness that depends
+    on where the beats are.
+    """
+    n_beats = len(indices)
+    unrolled = list(indices) + [index + n_steps for index in indices]
+    return sum((unrolled[i + j] - unrolled[i]) ** 2 for j in range(1, n_beats // 2 + 1) for i in range(n_beats))
+
+
+def _spans_form(n_steps: int, n_beats: int) -> List[List[int]]:
+    """
+    :math:`S` as a quadratic form of :math:`(x_0, \\dots, x_{k-1}, 1)`, where :math:`x_i` is the step of beat :math:`i`.
+    """
+    k = n_beats
+    form = [[0] * (k + 1) for _ in range(k + 1)]
+    for j in range(1, k // 2 + 1):
+        for i in range(k):
+            # delta_j(i) = x_{i+j} - x_i, plus a cycle when it wraps around.
+            terms = [((i + j) % k, 1), (i, -1)] + ([(k, n_steps)] if i + j >= k else [])
+            for a, x in terms:
+                for b, y in terms:
+                    form[a][b] += x * y
+    return form
+
+
+def _relaxation(form: List[List[int]], pinned: Dict[int, int]) -> Tuple[float, list]:
+    """
+    Least :math:`S` when the beats that are not pinned can be put on any real position, and how it grows as they are
+    placed from left to right.
+
+    The beats that are not pinned are eliminated from the quadratic form, the last one first. This writes :math:`S` as
+    :math:`c + \\sum_t D_t (x_t + \\sum_s L_{ts} x_s + L_t)^2`, where :math:`s` are the earlier and the pinned beats.
+    When the beats up to :math:`t` are placed, the terms of the next ones can all be made zero, so :math:`c` plus the
+    terms up to :math:`t` is a lower bound of :math:`S`. If beat 0 is not pinned, nothing is, and moving every beat by
+    the same amount does not change :math:`S`, so it does not appear in :math:`c`.
+
+    :return: :math:`c`, and :math:`(D_t, L_t, [(s, L_{ts}), \\dots])` for each beat :math:`t` that is not pinned
+    """
+    k = len(form) - 1
+    q = [[float(x) for x in row] for row in form]
+    terms = [None] * k
+    remaining = list(range(k + 1))
+    for t in range(k - 1, 0, -1):
+        if t in pinned:
+            continue
+        remaining.remove(t)
+        pivot, qt = q[t][t], q[t]
+        terms[t] = (pivot, qt[k] / pivot, [(s, qt[s] / pivot) for s in remaining if s != k and qt[s]])
+        for a in remaining:
+            factor = q[a][t] / pivot
+            if factor:
+                qa = q[a]
+                for b in remaining:
+                    qa[b] -= factor * qt[b]
+    values = dict(pinned)
+    values[k] = 1
+    least = sum(q[a][b] * values.get(a, 0) * values.get(b, 0) for a in remaining for b in remaining)
+    return least, terms
+
+
+def least_ugly(n_steps: int, n_beats: int, fixed: Iterable[int] = (), forbidden: Iterable[int] = (),
+               min_duration: int = 1, max_duration: Optional[int] = None,
+               top: int = 1) -> List[Tuple[float, Bjorklund]]:
+    """
+    Find the rhythms with the least total uglyness, as defined in Bjorklund (2003), under constraints.
+
+    Total uglyness only depends on :math:`S = \\sum_j \\sum_i \\delta_j(i)^2`, a quadratic function of the positions
+    of the beats. Its least value over real positions, with some beats pinned, is a tight lower bound, and it can be
+    updated in :math:`O(n\\_beats)` as the other beats are placed (see :code:`_relaxation`).
+
+    The search is a branch and bound on two levels. The cycle is rotated so that the first fixed step is beat 0. Then
+    the beat of each of the other fixed steps is chosen, best bound first, and for each choice the remaining beats are
+    placed from left to right, closest to their real optimum first. Branches whose bound cannot beat the current
+    :code:`top` results are pruned. Placements are also pruned with an integer bound: since the :math:`\\delta_j(i)`
+    always sum to :math:`j \\cdot n\\_steps`, the unknown ones contribute at least as much as what is left split as
+    evenly as possible between them, and single durations are split segment by segment between the fixed steps. This
+    one is exact for evenly spaced rhythms, where the real one is not.
+
+    The real bound costs :math:`O(n\\_beats^3)` for a choice of beats and :math:`O(n\\_beats)` for a placed beat. The
+    worst case is still exponential, but as the bounds are usually within a few units of the optimum, only a few
+    choices and placements are explored.
+
+    Without :code:`fixed` and :code:`forbidden` steps, rotations are equivalent. The first beat is put on step 0 and
+    each rhythm is only reported once, in the rotation whose durations are lexicographically least.
+
+    :param n_steps: number of steps
+    :param n_beats: number of beats
+    :param fixed: steps that must be beats
+    :param forbidden: steps that must be rests
+    :param min_duration: smallest allowed duration, including the one that wraps around
+    :param max_duration: largest allowed duration, including the one that wraps around
+    :param top: number of results
+    :return: list of :code:`(total_uglyness, rhythm)`, least ugly first
+
+    >>> least_ugly(8, 3)
+    [(0.4444444444444444, <2 3 3>)]
+    >>> [(f"{score:.2f}", rhythm) for score, rhythm in least_ugly(16, 5, fixed=[0, 1], top=2)]
+    [('5.60', <1 4 3 3 5>), ('5.60', <1 4 3 4 4>)]
+    """
+    fixed, forbidden = sorted(set(fixed)), set(forbidden)
+    max_duration = n_steps if max_duration is None else max_duration
+    if n_beats <= 0 or n_steps <= 0:
+        raise ValueError("Negative or zero number of steps or beats do not make sense!")
+    if n_beats > n_steps:
+        raise ValueError("Number of beats cannot be more than the number of steps!")
+    if any(not 0 <= x < n_steps for x in fixed) or any(not 0 <= x < n_steps for x in forbidden):
+        raise ValueError("Fixed and forbidden steps must be between 0 and n_steps!")
+    if forbidden.intersection(fixed):
+        raise ValueError("A step cannot be both fixed and forbidden!")
+    if len(fixed) > n_beats:
+        raise ValueError("There are more fixed steps than beats!")
+    if top <= 0:
+        raise ValueError("Number of results must be positive!")
+
+    n, k = n_steps, n_beats
+    half = k // 2
+    symmetric = not fixed and not forbidden
+    shift = fixed[0] if fixed else 0
+    fixed = [x - shift for x in fixed]
+    forbidden = {(x - shift) % n for x in forbidden}
+    # allowed[x] is the number of steps before x that are not forbidden.
+    allowed = [0]
+    for x in range(n):
+        allowed.append(allowed[-1] + (x not in forbidden))
+    form = _spans_form(n, k)
+    results = []
+    kept = set()
+    tie_breaker = count()
+
+    def threshold() -> float:
+        return -results[0][0] if len(results) == top else float('inf')
+
+    def explore(bound: float) -> bool:
+        # Leaves some room for rounding errors of the bound.
+        return bound < threshold() * (1 + 1e-9)
+
+    def fits(first: int, start: int, last: int, end: int) -> bool:
+        # Whether beats first, ..., last can be on steps start, ..., end.
+        m = last - first
+        return m * min_duration <= end - start <= m * max_duration and allowed[end] - allowed[start + 1] >= m - 1
+
+    def even_split(length: int, parts: int) -> int:
+        # Least sum of squares of `parts` positive integers that add up to `length`.
+        quotient, remainder = divmod(length, parts)
+        return parts * quotient * quotient + remainder * (2 * quotient + 1)
+
+    def durations_bound(positions: List[int], t: int) -> int:
+        # The fixed beats split the rest of the cycle into segments that each get at least one of the remaining
+        # durations. Since even_split is convex, spreading the durations greedily gives the least sum of squares.
+        boundaries = [x for x in fixed if x > positions[t]] + [n + positions[0]]
+        lengths = [b - a for a, b in zip([positions[t]] + boundaries, boundaries)]
+        parts = [1] * len(lengths)
+        gains = [(even_split(length, 2) - even_split(length, 1), i) for i, length in enumerate(lengths) if length > 1]
+        heapq.heapify(gains)
+        for _ in range(k - t - len(lengths)):
+            _, i = heapq.heappop(gains)
+            parts[i] += 1
+            if parts[i] < lengths[i]:
+                heapq.heappush(gains, (even_split(lengths[i], parts[i] + 1) - even_split(lengths[i], parts[i]), i))
+        return sum(even_split(length, part) for length, part in zip(lengths, parts))
+
+    def keep(positions: List[int]):
+        score = _sum_of_squared_spans(positions, n)
+        if not min_duration <= n + positions[0] - positions[-1] <= max_duration or score >= threshold():
+            return
+        rhythm = tuple(positions)
+        if symmetric:
+            # Rotations of the same rhythm have the same score, only its least rotation is kept.
+            durations = [b - a for a, b in zip(positions, positions[1:])] + [n - positions[-1]]
+            r = least_rotation(durations)
+            rhythm = (0,) + tuple(accumulate((durations[r:] + durations[:r])[:-1]))
+            if rhythm in kept:
+                return
+        item = (-score, -next(tie_breaker), rhythm)
+        if len(results) == top:
+            kept.discard(heapq.heapreplace(results, item)[2])
+        else:
+            heapq.heappush(results, item)
+        kept.add(rhythm)
+
+    def place(pinned: Dict[int, int]):
+        least, terms = _relaxation(form, pinned)
+        positions = [pinned.get(t, 0) for t in range(k)]
+        next_pinned = [k] * k
+        for t in range(k - 2, -1, -1):
+            next_pinned[t] = t + 1 if t + 1 in pinned else next_pinned[t + 1]
+        # Known window sums of each length j (windows that do not wrap around), their count and their squares.
+        known = [0] * (half + 1)
+        known_sum = [0] * (half + 1)
+        known_squares = [0] * (half + 1)
+
+        def spans_bound(t: int) -> int:
+            # The window sums of each length j always add up to j * n_steps, so the unknown ones contribute at least
+            # as much as what is left of it split as evenly as possible between them.
+            total = known_squares[1] + durations_bound(positions, t)
+            for j in range(2, half + 1):
+                total += known_squares[j] + even_split(j * n - known_sum[j], k - known[j])
+            return total
+
+        def candidates(t: int, bound: float) -> List[Tuple[int, float]]:
+            # Steps of beat t, with their relaxation bound, closest to the real optimum first.
+            if t in pinned:
+                return [(pinned[t], bound)]
+            if t == 0:
+                return [(step, bound) for step in range(0, 1 if symmetric else n - k + 1) if step not in forbidden]
+            previous, target = positions[t - 1], next_pinned[t]
+            end = positions[target] if target < k else positions[0] + n
+            low = max(previous + min_duration, end - (target - t) * max_duration)
+            high = min(previous + max_duration, end - (target - t) * min_duration, n - k + t)
+            pivot, offset, row = terms[t]
+            centre = -offset - sum(l * positions[s] for s, l in row)
+            steps = []
+            for step in sorted(range(low, high + 1), key=lambda x: abs(x - centre)):
+                step_bound = bound + pivot * (step - centre) ** 2
+                if not explore(step_bound):
+                    break
+                if step not in forbidden and step not in fixed:
+                    steps.append((step, step_bound))
+            return steps
+
+        def search(t: int, bound: float):
+            for step, step_bound in candidates(t, bound):
+                if not explore(step_bound):
+                    break
+                positions[t] = step
+                for j in range(1, min(t, half) + 1):
+                    span = step - positions[t - j]
+                    known[j] += 1
+                    known_sum[j] += span
+                    known_squares[j] += span * span
+
+                if t == k - 1:
+                    keep(positions)
+                elif spans_bound(t) < threshold():
+                    search(t + 1, step_bound)
+
+                for j in range(1, min(t, half) + 1):
+                    span = step - positions[t - j]
+                    known[j] -= 1
+                    known_sum[j] -= span
+                    known_squares[j] -= span * span
+
+        search(0, least)
+
+    # Choices of the beats of the fixed steps, best bound first.
+    choices = [(0.0, 0, (0,) if fixed else ())]
+    order = count(1)
+    while choices:
+        bound, _, indices = heapq.heappop(choices)
+        if not explore(bound):
+            break
+        a = len(indices)
+        if a == len(fixed):
+            place(dict(zip(indices, fixed)))
+            continue
+        for index in range(indices[-1] + 1, k - len(fixed) + a + 1):
+            if not fits(indices[-1], fixed[a - 1], index, fixed[a]):
+                continue
+            if a == len(fixed) - 1 and not fits(index, fixed[a], k, n):
+                continue
+            pinned = dict(zip(indices + (index,), fixed))
+            least, _ = _relaxation(form, pinned)
+            if explore(least):
+                heapq.heappush(choices, (least, next(order), indices + (index,)))
+
+    found = sorted(results, key=lambda item: (-item[0], -item[1]))
+    rhythms = [sorted((x + shift) % n for x in positions) for _, _, positions in found]
+    return [(uglyness.total_uglyness(indices, n), Bjorklund.from_indices_and_n_steps(indices, n))
+            for indices in rhythms]
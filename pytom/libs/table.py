@@ -0,0 +1,148 @@
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+class EuclideanTable(NamedTuple):
+    """
+    Every Euclidean rhythm of a triangular grid of :code:`(n_steps, n_beats)` pairs, stored in packed arrays.
+
+    Patterns are ordered by :code:`n_steps`, then by :code:`n_beats`. Pattern :code:`p` has its beats in
+    :code:`durations[beat_offsets[p]:beat_offsets[p + 1]]` and :code:`indices[beat_offsets[p]:beat_offsets[p + 1]]`,
+    and its steps in the bits of :code:`steps[p]` (least significant bit of the first byte is the first step).
+    """
+    n_steps: 'np.ndarray'
+    n_beats: 'np.ndarray'
+    beat_offsets: 'np.ndarray'
+    durations: 'np.ndarray'
+    indices: 'np.ndarray'
+    steps: 'np.ndarray'
+
+    @property
+    def n_patterns(self) -> int:
+        """
+        Number of patterns in the table.
+        """
+        return len(self.n_steps)
+
+    def row(self, n_steps: int, n_beats: int) -> int:
+        """
+        Position of a pattern in the table.
+
+        :param n_steps: number of steps
+        :param n_beats: number of beats
+        :return: row of the pattern
+
+        >>> table = euclidean_table(8)
+        >>> table.row(8, 3)
+        30
+        >>> table.durations_of(30).tolist()
+        [3, 2, 3]
+        """
+        min_steps = int(self.n_steps[0])
+        if not min_steps <= n_steps <= int(self.n_steps[-1]) or not 1 <= n_beats <= n_steps:
+            raise ValueError("This pattern is not in the table!")
+        before = (n_steps * (n_steps - 1) - min_steps * (min_steps - 1)) // 2
+        return before + n_beats - 1
+
+    def durations_of(self, row: int) -> 'np.ndarray':
+        """
+        Durations of the pattern at :code:`row`.
+        """
+        return self.durations[self.beat_offsets[row]:self.beat_offsets[row + 1]]
+
+    def indices_of(self, row: int) -> 'np.ndarray':
+        """
+        Indices of the beats of the pattern at :code:`row`.
+        """
+        return self.indices[self.beat_offsets[row]:self.beat_offsets[row + 1]]
+
+    def steps_of(self, row: int) -> 'np.ndarray':
+        """
+        Unpacked steps of the pattern at :code:`row`.
+
+        >>> euclidean_table(8).steps_of(30).tolist()
+        [1, 0, 0, 1, 0, 1, 0, 0]
+        """
+        bits = np.unpackbits(self.steps[row], bitorder='little')
+        return bits[:self.n_steps[row]]
+
+
+def euclidean_table(max_steps: int, min_steps: int = 1) -> EuclideanTable:
+    """
+    Generate every Euclidean rhythm with :code:`min_steps <= n_steps <= max_steps` and
+    :code:`1 <= n_beats <= n_steps` at once.
+
+    Results are identical to calling :code:`bjorklund(n_steps, n_beats)` for each pair, but the beats are computed
+    from the closed form given by :code:`pytom.libs.euclid.bjorklund_phase`, one :code:`n_steps` row of the grid at
+    a time, and no Python object is created per pattern.
+
+    :param max_steps: largest number of steps
+    :param min_steps: smallest number of steps
+    :return: packed table of patterns
+
+    >>> table = euclidean_table(8)
+    >>> table.n_patterns
+    36
+    >>> table.indices_of(table.row(8, 3)).tolist()
+    [0, 3, 5]
+    """
+    if np is None:
+        raise ImportError("euclidean_table needs numpy! Install pytom with the 'numpy' extra.")
+    if min_steps <= 0 or max_steps < min_steps:
+        raise ValueError("Number of steps must be positive and max_steps cannot be less than min_steps!")
+
+    all_steps = np.arange(min_steps, max_steps + 1, dtype=np.int64)
+    n_steps = np.repeat(all_steps, all_steps)
+    n_beats = np.arange(len(n_steps), dtype=np.int64) - np.repeat(np.cumsum(all_steps) - all_steps, all_steps) + 1
+
+    # Vectorized bjorklund_phase over the whole grid.
+    phase = np.zeros_like(n_beats)
+    sign = 1
+    a, b = n_steps.copy(), n_beats.copy()
+    active = np.ones(len(a), dtype=bool)
+    while True:
+        remainder = a % b
+        active &= remainder != 0
+        if not active.any():
+            break
+        phase += np.where(active, sign * (b - 1), 0)
+        sign = -sign
+        a, b = b, np.where(active, remainder, 1)
+
+    beat_offsets = np.zeros(len(n_beats) + 1, dtype=np.int64)
+    np.cumsum(n_beats, out=beat_offsets[1:])
+
+    dtype = np.int16 if max_steps < 2 ** 15 else np.int32 if max_steps < 2 ** 31 else np.int64
+    durations = np.empty(beat_offsets[-1], dtype=dtype)
+    indices = np.empty(beat_offsets[-1], dtype=dtype)
+    steps = np.zeros((len(n_steps), (max_steps + 7) // 8), dtype=np.uint8)
+
+    first = 0
+    for n in range(min_steps, max_steps + 1):
+        rows = slice(first, first + n)
+        ks, phases = n_beats[rows], phase[rows]
+        start, stop = beat_offsets[first], beat_offsets[first + n]
+
+        local_starts = beat_offsets[rows] - start
+        pattern = np.repeat(np.arange(n), ks)
+        i = np.arange(stop - start) - local_starts[pattern]
+        onsets = (i * n + phases[pattern]) // ks[pattern]
+
+        following = np.empty_like(onsets)
+        following[:-1] = onsets[1:]
+        following[local_starts[1:] - 1] = n
+        following[-1] = n
+
+        indices[start:stop] = onsets
+        durations[start:stop] = following - onsets
+
+        bits = np.zeros((n, max_steps), dtype=np.uint8)
+        bits[pattern, onsets] = 1
+        steps[rows] = np.packbits(bits, axis=1, bitorder='little')
+        first += n
+
+    return EuclideanTable(n_steps, n_beats, beat_offsets, durations, indices, steps)
@@ -0,0 +1,80 @@
+from math import gcd
+from typing import Iterable, Iterator, List, Sequence
+
+from pytom.libs.core import is_array
+
+
+class EDO:
+    """
+    EDO(n=24, generator=7, names=None, reference=6000, suffix='')
+
+    Equal division of the octave in :code:`n` steps, where index :code:`i` is mapped to the step
+    :code:`(i * generator) % n`. The mapping is a permutation when :code:`generator` and :code:`n` are coprime, which
+    is checked once, and the step, name and MIDI cents of every index are computed once into lookup tables.
+
+    Indices are taken modulo :code:`n`. Lists are mapped with the tables, NumPy arrays of any shape with a single
+    :code:`take`, including names, which come from a table of strings.
+
+    :param n: number of steps in an octave
+    :param generator: step of consecutive indices
+    :param names: name of each step, default their number
+    :param reference: MIDI cents of step 0, default middle C
+    :param suffix: added to every name, like an octave mark
+
+    >>> edo = EDO(12, 7, ['c', 'cis', 'd', 'dis', 'e', 'f', 'fis', 'g', 'gis', 'a', 'ais', 'b'])
+    >>> edo.degrees([0, 1, 2]), edo.cents([0, 1, 2])
+    ([0, 7, 2], [6000.0, 6700.0, 6200.0])
+    >>> list(edo.names([[0, 1], [2]]))
+    [['c', 'g'], ['d']]
+    >>> import numpy as np
+    >>> edo.names(np.array([[0, 1], [2, 3]])).tolist()
+    [['c', 'g'], ['d', 'a']]
+    """
+
+    def __init__(self, n: int = 24, generator: int = 7, names: Sequence[str] = None, reference: float = 6000,
+                 suffix: str = ''):
+        if n <= 0:
+            raise ValueError("Number of steps in an octave must be positive!")
+        if gcd(generator, n) != 1:
+            raise ValueError("Generator must be coprime with the number of steps, or steps would be repeated!")
+        names = [str(i) for i in range(n)] if names is None else list(names)
+        if len(names) != n:
+            raise ValueError("There must be one name for each step!")
+
+        self.n = n
+        self.generator = generator
+        self.degree_table = [(i * generator) % n for i in range(n)]
+        self.name_table = [names[degree] + suffix for degree in self.degree_table]
+        self.cents_table = [reference + degree * 1200 / n for degree in self.degree_table]
+        self._arrays = None
+
+    def _array_tables(self):
+        if self._arrays is None:
+            import numpy as np
+            self._arrays = np.array(self.degree_table), np.array(self.cents_table), np.array(self.name_table)
+        return self._arrays
+
+    def degrees(self, indices):
+        """Steps of the indices. Returns an array if :code:`indices` is a NumPy array."""
+        if is_array(indices):
+            return self._array_tables()[0].take(indices % self.n)
+        table, n = self.degree_table, self.n
+        return [table[i % n] for i in indices]
+
+    def cents(self, indices):
+        """MIDI cents of the indices. Returns an array if :code:`indices` is a NumPy array."""
+        if is_array(indices):
+            return self._array_tables()[1].take(indices % self.n)
+        table, n = self.cents_table, self.n
+        return [table[i % n] for i in indices]
+
+    def names(self, chords: Iterable[Iterable[int]]) -> Iterator[List[str]]:
+        """
+        Names of the indices of each chord, one chord at a time. Returns an array of the same shape if :code:`chords` is
+        a NumPy array, and chords that are arrays give arrays.
+        """
+        if is_array(chords):
+            return self._array_tables()[2].take(chords % self.n)
+        table, n = self.name_table, self.n
+        return (self._array_tables()[2].take(chord % n) if is_array(chord) else [table[i % n] for i in chord]
+                for chord in chords)
@@ -0,0 +1,98 @@
+from typing import List
+
+from pytom.libs import core
+from pytom.libs.profiling import instrumented
+
+
+def _unrolled(indices: List[int], n_steps: int) -> List[int]:
+    """
+    Indices of two consecutive cycles of a rhythm.
+
+    With :code:`e = _unrolled(indices, n_steps)`, :math:`\\delta_j(i)` is simply :code:`e[i + j] - e[i]`.
+
+    >>> _unrolled([0, 3, 5], 8)
+    [0, 3, 5, 8, 11, 13]
+    """
+    return list(indices) + [index + n_steps for index in indices]
+
+
+@instrumented('uglyness')
+def beat_uglyness(indices: List[int], n_steps: int, i: int) -> float:
+    """
+    Uglyness of a single beat as defined in Bjorklund (2003).
+
+    This is the variance of :math:`\\delta_j(i)` over :math:`j`, which only needs a single pass over the beats.
+
+    :param indices: sorted list of indices of beats
+    :param n_steps: number of steps
+    :param i: index of beat
+    :return: uglyness of beat
+
+    >>> print(f"{beat_uglyness([1, 2, 3, 5, 7], 8, 1):.2f}")
+    5.00
+    """
+    n_beats = len(indices)
+    if n_beats < 2:
+        raise ZeroDivisionError("Uglyness of a beat needs at least two beats!")
+    if not -n_beats <= i < n_beats:
+        raise IndexError("Beat index out of range!")
+
+    origin = indices[i % n_beats]
+    deltas = [(indices[(i + j) % n_beats] - origin) % n_steps for j in range(1, n_beats)]
+    s1 = sum(deltas)
+    s2 = sum(d * d for d in deltas)
+    return ((n_beats - 1) * s2 - s1 * s1) / (n_beats - 1) ** 2
+
+
+@instrumented('uglyness')
+def uglyness_profile(indices: List[int], n_steps: int) -> List[float]:
+    """
+    Uglyness of every beat of a rhythm as defined in Bjorklund (2003).
+
+    Uses prefix sums over two unrolled cycles of :code:`indices`, so the whole profile costs :math:`O(n\\_beats)`
+    instead of calling :code:`beat_uglyness` once per beat. Sums are kept in integers, so the result does not
+    depend on the backend chosen by :code:`core.select_backend`.
+
+    :param indices: sorted list of indices of beats
+    :param n_steps: number of steps
+    :return: list of uglyness of each beat
+
+    >>> print([f"{x:.2f}" for x in uglyness_profile([1, 2, 3, 5, 7], 8)])
+    ['3.69', '5.00', '3.69', '2.19', '2.19']
+    """
+    n_beats = len(indices)
+    if n_beats < 2:
+        raise ZeroDivisionError("Uglyness of a beat needs at least two beats!")
+
+    backend = core.select_backend('uglyness_profile', n_beats, n_steps)
+    return backend.uglyness_profile(_unrolled(indices, n_steps), n_beats)
+
+
+@instrumented('uglyness')
+def total_uglyness(indices: List[int], n_steps: int) -> float:
+    """
+    Total uglyness of a rhythm as defined in Bjorklund (2003).
+
+    :math:`\\sum_i \\delta_j(i)` is always :math:`j \\cdot n\\_steps`, so only the sums of squared distances have to
+    be computed, one :math:`j` at a time, which keeps memory bounded for long patterns. The backend is chosen by
+    :code:`core.select_backend`.
+
+    :param indices: sorted list of indices of beats
+    :param n_steps: number of steps
+    :return: total uglyness
+
+    >>> print(f"{total_uglyness([1, 2, 3, 5, 7], 8):.2f}")
+    1.60
+    >>> print(f"{total_uglyness([0, 2, 4, 6], 8):.2f}")
+    0.00
+    """
+    n_beats = len(indices)
+    if n_beats == 0:
+        raise ZeroDivisionError("Total uglyness needs at least one beat!")
+
+    backend = core.select_backend('squared_spans', n_beats, n_steps)
+    squares = backend.squared_spans(_unrolled(indices, n_steps), n_beats)
+
+    # sum_i (d - j n / k)^2 == (k sum_i d^2 - (j n)^2) / k, accumulated exactly before the final division.
+    numerator = sum(n_beats * s - (j * n_steps) ** 2 for j, s in enumerate(squares, 1))
+    return 2 * numerator / n_beats ** 2
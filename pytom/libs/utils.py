@@ -1,5 +1,9 @@
+from collections import OrderedDict, namedtuple
 from functools import reduce, wraps
 from math import gcd
+from threading import Lock
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
 
 
 def reduce_with(init):
@@ -16,6 +20,71 @@ def reduce_with(init):
     return reduce_with_
 
 
+def memoize(maxsize=128):
+    """
+    Least recently used cache for functions of hashable positional arguments.
+
+    Unlike :code:`functools.lru_cache`, the size bound can be changed at runtime with :code:`set_maxsize`.
+    :code:`None` means unbounded and :code:`0` disables caching. Hits and misses are reported by
+    :code:`cache_info` and reset by :code:`cache_clear`.
+
+    >>> @memoize(maxsize=2)
+    ... def square(x):
+    ...     return x * x
+    >>> [square(x) for x in [1, 2, 1, 3, 1, 2]]
+    [1, 4, 1, 9, 1, 4]
+    >>> square.cache_info()
+    CacheInfo(hits=2, misses=4, maxsize=2, currsize=2)
+    """
+
+    def memoize_(f_):
+        cache = OrderedDict()
+        lock = Lock()
+        stats = {'hits': 0, 'misses': 0, 'maxsize': maxsize}
+
+        def evict():
+            if stats['maxsize'] is not None:
+                while len(cache) > stats['maxsize']:
+                    cache.popitem(last=False)
+
+        @wraps(f_)
+        def wrapper(*args):
+            with lock:
+                if args in cache:
+                    stats['hits'] += 1
+                    cache.move_to_end(args)
+                    return cache[args]
+                stats['misses'] += 1
+
+            result = f_(*args)
+
+            with lock:
+                cache[args] = result
+                evict()
+            return result
+
+        def cache_info():
+            with lock:
+                return CacheInfo(stats['hits'], stats['misses'], stats['maxsize'], len(cache))
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+                stats['hits'] = stats['misses'] = 0
+
+        def set_maxsize(size):
+            with lock:
+                stats['maxsize'] = size
+                evict()
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        wrapper.set_maxsize = set_maxsize
+        return wrapper
+
+    return memoize_
+
+
 def flip(func):
     @wraps(func)
     def newfunc(x, y):
@@ -37,3 +106,32 @@ def lcm(a, b):
 
 def is_sorted(xs):
     return all(xs[i] <= xs[i + 1] for i in range(len(xs) - 1))
+
+
+def least_rotation(xs):
+    """
+    Index of the lexicographically least rotation of a sequence, using Booth's algorithm in linear time.
+
+    >>> least_rotation([3, 2, 3])
+    1
+    >>> least_rotation([2, 2, 2])
+    0
+    """
+    n = len(xs)
+    doubled = list(xs) * 2
+    failure = [-1] * (2 * n)
+    k = 0
+    for j in range(1, 2 * n):
+        xj = doubled[j]
+        i = failure[j - k - 1]
+        while i != -1 and xj != doubled[k + i + 1]:
+            if xj < doubled[k + i + 1]:
+                k = j - i - 1
+            i = failure[i]
+        if xj != doubled[k + i + 1]:
+            if xj < doubled[k]:
+                k = j
+            failure[j - k] = -1
+        else:
+            failure[j - k] = i + 1
+    return k % n if n else 0
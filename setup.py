@@ -15,10 +15,12 @@ requirements = ['Click>=6.0', ]
 
 setup_requirements = ['pytest-runner', ]
 
-test_requirements = ['pytest', 'hypothesis', ]
+test_requirements = ['pytest', 'hypothesis', 'numpy', ]
 
 doc_requirements = ['Sphinx==1.7.1', ]
 
+numpy_requirements = ['numpy>=1.17', ]
+
 setup(
     author="Sahin Kureta",
     author_email='skureta@gmail.com',
@@ -27,7 +29,8 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
         'Natural Language :: English',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
     ],
     description="Collection of tools for Ircam's OpenMusic.",
     entry_points={
@@ -37,7 +40,8 @@ setup(
     },
     install_requires=requirements,
     extras_require={
-        'docs': doc_requirements
+        'docs': doc_requirements,
+        'numpy': numpy_requirements,
     },
     license="GNU General Public License v3",
     long_description=readme + '\n\n' + history,
@@ -45,6 +49,7 @@ setup(
     keywords='pytom',
     name='pytom',
     packages=find_packages(include=['pytom']),
+    python_requires='>=3.7',
     setup_requires=setup_requirements,
     test_suite='tests',
     tests_require=test_requirements,
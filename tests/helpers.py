@@ -0,0 +1,37 @@
+"""Hypothesis strategies and reference implementations shared by the tests."""
+
+from fractions import Fraction
+
+import hypothesis.strategies as st
+
+from pytom.libs.algebraic import Euclid
+
+
+def reference_uglyness(indices, n_steps, i):
+    n_beats = len(indices)
+
+    def delta(j, i_):
+        return (indices[(i_ + j) % n_beats] - indices[i_]) % n_steps
+
+    delta_bar = sum(delta(j, i) for j in range(1, n_beats)) / (n_beats - 1)
+    return sum((delta(j, i) - delta_bar) ** 2 for j in range(1, n_beats)) / (n_beats - 1)
+
+
+def reference_total_uglyness(indices, n_steps):
+    n_beats = len(indices)
+    result = 0
+    for j in range(1, n_beats // 2 + 1):
+        for i in range(0, n_beats):
+            result += ((indices[(i + j) % n_beats] - indices[i]) % n_steps - (j * n_steps) / n_beats) ** 2
+    return 2 * result / n_beats
+
+
+def nested_trees(max_leaves=40):
+    weights = st.integers(min_value=-4, max_value=6).filter(bool)
+    euclids = st.builds(Euclid, st.integers(min_value=1, max_value=16), st.integers(min_value=1, max_value=4)).filter(
+        lambda x: x.n_beats <= x.n_steps)
+    subdivisions = st.recursive(
+        st.lists(weights, min_size=1, max_size=5) | euclids,
+        lambda children: st.lists(weights | st.tuples(weights, children) | euclids, min_size=1, max_size=5),
+        max_leaves=max_leaves)
+    return st.tuples(st.fractions(min_value=Fraction(1, 8), max_value=8), subdivisions)
@@ -0,0 +1,136 @@
+import copy
+import pickle
+import unittest
+from fractions import Fraction
+
+import hypothesis.strategies as st
+from hypothesis import given, settings
+
+from pytom.libs.algebraic import Euclid, RhythmTree
+from pytom.libs.bjorklund import bjorklund
+from tests.helpers import nested_trees
+
+
+def reference_flatten(tree):
+    """Recursive flattening of a nested tree, leaves with signed durations."""
+    def walk(onset, duration, subdivisions, rest):
+        if isinstance(subdivisions, Euclid):
+            subdivisions = subdivisions.beat_durations
+        subdivisions = [(1, x) if isinstance(x, Euclid) else x for x in subdivisions]
+        total = sum(abs(x[0] if isinstance(x, tuple) else x) for x in subdivisions)
+        for x in subdivisions:
+            weight = x[0] if isinstance(x, tuple) else x
+            child = duration * abs(weight) / total
+            if isinstance(x, tuple):
+                yield from walk(onset, child, x[1], rest or weight < 0)
+            else:
+                yield onset, -child if rest or weight < 0 else child
+            onset += child
+
+    duration, subdivisions = tree
+    return list(walk(Fraction(0), Fraction(duration), subdivisions, False))
+
+
+class RhythmTreeTest(unittest.TestCase):
+
+    @settings(deadline=None)
+    @given(nested_trees())
+    def test_flatten(self, nested):
+        tree = RhythmTree.from_nested(nested)
+        expected = reference_flatten(nested)
+        onsets, durations = tree.flatten(rests=True)
+        self.assertEqual(list(zip(onsets, durations)), expected)
+        self.assertTrue(all(isinstance(x, Fraction) for x in onsets + durations))
+
+        onsets, durations = tree.flatten()
+        self.assertEqual(list(zip(onsets, durations)), [(a, d) for a, d in expected if d > 0])
+
+        onsets, durations = tree.flatten(exact=False, rests=True)
+        self.assertEqual(len(onsets), len(expected))
+        for onset, duration, (expected_onset, expected_duration) in zip(onsets, durations, expected):
+            self.assertAlmostEqual(onset, float(expected_onset))
+            self.assertAlmostEqual(duration, float(expected_duration))
+
+    def test_build(self):
+        # Nodes added out of time order are still flattened in time order.
+        tree = RhythmTree(Euclid(3, 2))
+        a, b = tree.subdivide(0, [1, -1])
+        c, d, e = tree.subdivide(b, Euclid(5, 3))
+        tree.subdivide(a, [1, 1])
+        self.assertEqual(tree.children(0), [a, b])
+        self.assertEqual(tree.children(b), [c, d, e])
+        self.assertEqual((tree.parent(c), tree.weight(d), tree.is_leaf(b), tree.is_rest(b)), (b, 1, False, True))
+        # The children of a rest are rests too.
+        expected = ([0, Fraction(3, 8), Fraction(3, 4), Fraction(21, 20), Fraction(6, 5)],
+                    [Fraction(3, 8), Fraction(3, 8), -Fraction(3, 10), -Fraction(3, 20), -Fraction(3, 10)])
+        self.assertEqual(tree.flatten(rests=True), expected)
+        self.assertEqual(tree.flatten(exact=False, rests=True), tuple([float(x) for x in xs] for xs in expected))
+        self.assertEqual(tree.flatten(), ([0, Fraction(3, 8)], [Fraction(3, 8), Fraction(3, 8)]))
+        self.assertEqual(tree.flatten(exact=False), ([0.0, 0.375], [0.375, 0.375]))
+        tree.subdivide(d, [-1, 2])
+        self.assertEqual(tree.flatten(rests=True)[1][3:5], [-Fraction(1, 20), -Fraction(1, 10)])
+        for duration, expected in zip(tree.flatten(exact=False, rests=True)[1][3:5], [-0.05, -0.1]):
+            self.assertAlmostEqual(duration, expected)
+        self.assertEqual(RhythmTree().flatten(), ([0], [1]))
+
+    def test_deep(self):
+        # Deeper than the recursion limit.
+        tree = RhythmTree()
+        node = 0
+        for _ in range(5000):
+            node, _ = tree.subdivide(node, [1, 1])
+        onsets, durations = tree.flatten()
+        self.assertEqual(onsets[0], 0)
+        self.assertEqual(durations[0], Fraction(1, 2 ** 5000))
+        self.assertEqual(sum(durations), 1)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, RhythmTree, 0)
+        tree = RhythmTree()
+        self.assertRaises(ValueError, tree.add, 1, 1)
+        self.assertRaises(ValueError, tree.add, 0, 0)
+        self.assertRaises(ValueError, tree.add, 0, 1.5)
+        self.assertRaises(ValueError, tree.add, 0, 1, (4, 0))
+        self.assertRaises(ValueError, RhythmTree, signature=(4, 4, 4))
+        self.assertEqual(RhythmTree(signature=(6, 8)).duration, Fraction(3, 4))
+
+
+class EuclidTest(unittest.TestCase):
+
+    @given(st.integers(min_value=1, max_value=64), st.integers(min_value=1, max_value=64),
+           st.integers(min_value=1, max_value=64), st.integers(min_value=1, max_value=64))
+    def test_arithmetic(self, a, b, c, d):
+        x, y = Euclid(a, b), Euclid(c, d)
+        for result, expected in [(x + y, Fraction(a, b) + Fraction(c, d)), (x - y, Fraction(a, b) - Fraction(c, d)),
+                                 (x * y, Fraction(a, b) * Fraction(c, d)), (x / y, Fraction(a, b) / Fraction(c, d)),
+                                 (1 + x, 1 + Fraction(a, b)), (2 * x, 2 * Fraction(a, b)), (-x, -Fraction(a, b)),
+                                 (+x, Fraction(a, b)), (abs(-x), Fraction(a, b)),
+                                 (x % y, Fraction(a, b) % Fraction(c, d)), (3 % x, 3 % Fraction(a, b)),
+                                 (divmod(x, y)[1], Fraction(a, b) % Fraction(c, d)), (x ** 2, Fraction(a, b) ** 2),
+                                 (x ** -1, Fraction(b, a)), (round(x, 1), round(Fraction(a, b), 1))]:
+            self.assertIsInstance(result, Euclid)
+            self.assertEqual(result, expected)
+            self.assertEqual((result.n_steps, result.n_beats), (expected.numerator, expected.denominator))
+        self.assertIsInstance(x + 0.5, float)
+        self.assertEqual(divmod(x, y)[0], a * d // (b * c))
+        for result in [x // y, round(x), divmod(x, y)[0]]:
+            self.assertIs(type(result), int)
+        self.assertRaises(TypeError, divmod, x, 'a')
+
+    @given(st.integers(min_value=1, max_value=64), st.integers(min_value=1, max_value=64))
+    def test_lazy_pattern(self, n_steps, n_beats):
+        x = Euclid(n_steps, n_beats)
+        self.assertFalse(hasattr(x, '__dict__'))
+        if x.n_beats > x.n_steps:
+            # Proportions that are not rhythms only fail when their pattern is read.
+            self.assertRaises(ValueError, lambda: x.steps)
+            return
+        expected = bjorklund(x.n_steps, x.n_beats)
+        self.assertEqual(x.indices, expected.indices)
+        self.assertEqual(x.steps, expected.steps)
+        self.assertEqual(x.beat_durations, expected.durations)
+        self.assertIs(x.steps, x.steps)
+
+        for y in [pickle.loads(pickle.dumps(x)), copy.deepcopy(x), x + 0]:
+            self.assertEqual(y, x)
+            self.assertEqual(y.steps, x.steps)
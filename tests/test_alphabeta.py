@@ -0,0 +1,81 @@
+import io
+import unittest
+from itertools import islice
+
+import hypothesis.strategies as st
+from hypothesis import given
+
+from pytom.libs.alphabeta import BUFFER_SIZE, LSystem, alphabet_names, chords, durations, write_lilypond
+
+
+def generation(rules, axiom, depth):
+    for _ in range(depth):
+        axiom = ''.join(rules.get(letter, letter) for letter in axiom)
+    return axiom
+
+
+class LSystemTest(unittest.TestCase):
+
+    @given(st.dictionaries(st.sampled_from('abcd'), st.text('abcde', max_size=3)), st.text('abcde', max_size=4),
+           st.integers(min_value=0, max_value=6))
+    def test_letters(self, rules, axiom, depth):
+        system = LSystem(rules, axiom)
+        expected = generation(rules, axiom, depth)
+        self.assertEqual(''.join(system.letters(depth)), expected)
+        self.assertEqual(system.length(depth), len(expected))
+        self.assertEqual([system.letter(k, depth) for k in range(len(expected))], list(expected))
+        self.assertRaises(IndexError, system.letter, len(expected), depth)
+        self.assertRaises(IndexError, system.letter, -1, depth)
+        if depth:
+            words = [rules.get(letter, letter) for letter in generation(rules, axiom, depth - 1)]
+            self.assertEqual(list(system.words(depth)), words)
+            self.assertEqual([system.word(k, depth) for k in range(len(words))], words)
+
+    def test_alphabeta(self):
+        system = LSystem()
+        seed, words = 'α', []
+        for _ in range(4):
+            words = [alphabet_names[letter] for letter in seed]
+            seed = ''.join(words)
+        self.assertEqual(list(system.words(4)), words)
+
+        # Deep generations are streamed and indexed without being built.
+        self.assertEqual(len(list(zip(range(1000), system.words(200)))), 1000)
+        self.assertEqual(system.word(system.length(199) - 1, 200), 'αλφα')
+
+    def test_invalid(self):
+        system = LSystem()
+        self.assertRaises(ValueError, system.length, -1)
+        self.assertRaises(ValueError, lambda: list(system.words(0)))
+        self.assertRaises(ValueError, system.word, 0, 0)
+
+
+class LilyPondTest(unittest.TestCase):
+
+    def reference(self):
+        words = LSystem().words(4)
+        tokens = ['<{}>'.format(' '.join(chord)) + duration for chord, duration in zip(chords(words), durations())]
+        return ' '.join(tokens)
+
+    def test_write(self):
+        expected = self.reference()
+        for buffer_size in [1, 10, BUFFER_SIZE]:
+            f = io.StringIO()
+            n_chords = write_lilypond(chords(LSystem().words(4)), durations(), f, buffer_size=buffer_size)
+            self.assertEqual(f.getvalue(), expected + '\n')
+            self.assertEqual(n_chords, LSystem().length(3))
+
+        f = io.StringIO()
+        write_lilypond(chords(LSystem().words(4)), durations(), f, score=True)
+        self.assertEqual(f.getvalue(), '\\version "2.24.0"\n\\language "italiano"\n\n{\n  ' + expected + '\n}\n')
+
+    def test_stream(self):
+        # Chords are pulled from the generators as they are written, so a deep generation can be cut short.
+        words = LSystem().words(50)
+        f = io.StringIO()
+        self.assertEqual(write_lilypond(chords(islice(words, 1000)), durations(), f, buffer_size=100), 1000)
+        self.assertEqual(f.getvalue().count('>'), 1000)
+        self.assertEqual(next(words), LSystem().word(1000, 50))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, chords, [], 2)
@@ -1,9 +1,16 @@
+import re
 import unittest
 
 import hypothesis.strategies as st
 from hypothesis import given, assume
 
-from pytom.libs.bjorklund import Bjorklund
+import numpy as np
+
+from pytom.libs import core, uglyness
+from pytom.libs.euclid import euclidean_durations
+from pytom.libs.bjorklund import (Bjorklund, steps_to_durations, durations_to_steps, steps_to_indices,
+                                  indices_and_n_steps_to_steps, steps_to_mask, mask_to_steps, mask_to_indices)
+from tests.helpers import reference_uglyness, reference_total_uglyness
 
 
 def reference_bjorklund(steps, beats):
@@ -83,6 +90,32 @@ class BjorklundTest(unittest.TestCase):
         b1 = Bjorklund.from_indices_and_n_steps(indices, n_steps)
         self.assertEqual((b1.indices, b1.n_steps), (indices, n_steps))
 
+    @given(st.lists(st.integers(min_value=0, max_value=1), max_size=256))
+    def test_from_mask(self, steps):
+        mask = sum(step << i for i, step in enumerate(steps))
+        self.assertEqual(steps_to_mask(steps), mask)
+        self.assertEqual(mask_to_steps(mask, len(steps)), steps)
+        self.assertEqual(mask_to_indices(mask), steps_to_indices(steps))
+        if 1 not in steps and steps:
+            self.assertRaises(ValueError, Bjorklund.from_mask, mask, len(steps))
+            return
+        b1 = Bjorklund.from_mask(mask, len(steps))
+        offset = steps.index(1) if steps else 0
+        self.assertEqual((b1.mask, b1.n_steps, b1.n_beats, b1.offset), (mask, len(steps), steps.count(1), offset))
+        self.assertEqual(b1.steps, steps)
+        self.assertEqual(Bjorklund.from_steps(steps).mask, mask)
+        self.assertRaises(ValueError, Bjorklund.from_mask, mask | 1 << len(steps), len(steps))
+        self.assertRaises(ValueError, Bjorklund.from_mask, -1, len(steps))
+
+    @given(st.lists(st.integers(min_value=1, max_value=8), min_size=1, max_size=32), st.integers(), st.data())
+    def test___eq__(self, durations, n, data):
+        b1, b2 = Bjorklund(durations), Bjorklund(durations)
+        b2.rotate_steps(n)
+        self.assertEqual(b1, b2)
+        other = data.draw(st.lists(st.integers(min_value=1, max_value=8), min_size=1, max_size=32))
+        rotations = [other[i:] + other[:i] for i in range(len(other))]
+        self.assertEqual(b1 == Bjorklund(other), durations in rotations)
+
     @given(st.lists(st.integers(min_value=-256, max_value=256), max_size=256),
            st.integers(min_value=-256, max_value=256))
     def test_from_indices_and_n_steps_exceptions(self, indices, n_steps):
@@ -118,3 +151,78 @@ class BjorklundTest(unittest.TestCase):
             self.assertIsInstance(b1, Bjorklund)
             self.assertEqual(b1.durations, durations)
             self.assertEqual(b1.offset, result_offset)
+
+    @given(st.lists(st.integers(min_value=0, max_value=256), min_size=2, max_size=64, unique=True),
+           st.integers(min_value=0, max_value=8))
+    def test_uglyness(self, indices, tail):
+        indices = sorted(indices)
+        n_steps = max(indices) + 1 + tail
+        b1 = Bjorklund.from_indices_and_n_steps(indices, n_steps)
+        reference = [reference_uglyness(indices, n_steps, i) for i in range(len(indices))]
+        profile = b1.uglyness_profile()
+        for i, expected in enumerate(reference):
+            self.assertAlmostEqual(profile[i], expected)
+            self.assertAlmostEqual(b1.uglyness(i), expected)
+            self.assertAlmostEqual(b1.uglyness(i - len(indices)), expected)
+        self.assertRaises(IndexError, b1.uglyness, len(indices))
+        self.assertRaises(IndexError, b1.uglyness, -len(indices) - 1)
+        self.assertAlmostEqual(b1.total_uglyness(), reference_total_uglyness(indices, n_steps))
+
+    @given(st.lists(st.integers(min_value=0, max_value=4096), min_size=2, max_size=64, unique=True))
+    def test_uglyness_backends(self, indices):
+        indices = sorted(indices)
+        n_steps = max(indices) + 1
+        try:
+            core.set_backend('numpy')
+            numpy_profile = uglyness.uglyness_profile(indices, n_steps)
+            numpy_total = uglyness.total_uglyness(indices, n_steps)
+            core.set_backend('python')
+            self.assertEqual(uglyness.uglyness_profile(indices, n_steps), numpy_profile)
+            self.assertEqual(uglyness.total_uglyness(indices, n_steps), numpy_total)
+        finally:
+            core.set_backend(None)
+
+    @given(st.lists(st.integers(min_value=0, max_value=2), max_size=256))
+    def test_converters_numpy(self, steps):
+        try:
+            expected = steps_to_durations(steps)
+        except ValueError as error:
+            with self.assertRaisesRegex(ValueError, re.escape(str(error))):
+                steps_to_durations(np.array(steps))
+            return
+        self.assertEqual(steps_to_durations(np.array(steps)).tolist(), expected)
+        self.assertEqual(steps_to_indices(np.array(steps)).tolist(), steps_to_indices(steps))
+        self.assertEqual(steps_to_mask(np.array(steps)), steps_to_mask(steps))
+        if expected:
+            self.assertEqual(durations_to_steps(np.array(expected)).tolist(), durations_to_steps(expected))
+            indices = steps_to_indices(steps)
+            self.assertEqual(indices_and_n_steps_to_steps(np.array(indices), len(steps)).tolist(), steps)
+
+    @given(st.lists(st.integers(min_value=1, max_value=8), min_size=1, max_size=32),
+           st.lists(st.tuples(st.sampled_from(['steps', 'durations', 'offset']), st.integers(-16, 16)), max_size=8))
+    def test_representations_in_sync(self, durations, rotations):
+        b1 = Bjorklund(durations)
+        for kind, n in rotations:
+            if kind == 'steps':
+                b1.rotate_steps(n)
+            elif kind == 'durations':
+                b1.rotate_durations(n)
+            else:
+                b1.offset = min(abs(n), b1.durations[-1] - 1)
+            indices, offset, durations = b1.indices, b1.offset, b1.durations
+            steps = b1.steps
+            self.assertEqual(durations, steps_to_durations(steps))
+            self.assertEqual(indices, steps_to_indices(steps))
+            self.assertEqual(offset, steps.index(1))
+            self.assertEqual(b1.mask, steps_to_mask(steps))
+            self.assertEqual((b1.n_steps, b1.n_beats), (len(steps), steps.count(1)))
+
+    def test_bjorklund_memoized(self):
+        euclidean_durations.cache_clear()
+        first = Bjorklund.from_n_steps_n_beats(13, 5)
+        first.rotate_durations(1)
+        first.durations.append(7)
+        second = Bjorklund.from_n_steps_n_beats(13, 5)
+        self.assertEqual(second.durations, [3, 2, 3, 3, 2])
+        self.assertGreater(euclidean_durations.cache_info().hits, 0)
+        self.assertTrue(second.is_bjorklund())
@@ -3,10 +3,18 @@
 
 """Tests for `pytom.cli` module."""
 
+import csv
+import io
+import json
+import subprocess
+import sys
+from itertools import count, islice
+
 from click.testing import CliRunner
 
 from pytom import cli
-from pytom.libs.bjorklund import bjorklund
+from pytom.libs import profiling
+from pytom.libs.bjorklund import Bjorklund, bjorklund
 
 
 def test_command_line_interface():
@@ -18,3 +26,141 @@ def test_command_line_interface():
     help_result = runner.invoke(cli.main, ['euclidean', '--help'])
     assert help_result.exit_code == 0
     assert '--steps-beats <int> <int>  Number of steps and number of pulses' in help_result.output
+
+
+def test_euclidean_batch():
+    """Test streaming many pairs, in input order, with and without workers."""
+    runner = CliRunner()
+    pairs = [(13, 5), (8, 3), (3, 5), (100, 7), (9, 9)]
+    text = '# steps beats\n' + '\n'.join(f'{n_steps},{n_beats}' for n_steps, n_beats in pairs) + '\n\n'
+    expected = None
+    for jobs in ['1', '3']:
+        result = runner.invoke(cli.main, ['euclidean', '--input', '-', '--jobs', jobs, '--chunk-size', '2'], input=text)
+        assert result.exit_code == 0
+        rows = [json.loads(line) for line in result.output.splitlines()]
+        assert [(row['n_steps'], row['n_beats']) for row in rows] == pairs
+        assert rows[0]['durations'] == bjorklund(13, 5).durations
+        assert 'error' in rows[2]
+        assert expected is None or rows == expected
+        expected = rows
+
+    result = runner.invoke(cli.main, ['euclidean', '--input', '-', '--format', 'csv'], input=text)
+    assert result.exit_code == 0
+    rows = list(csv.DictReader(io.StringIO(result.output)))
+    assert rows[1] == {'n_steps': '8', 'n_beats': '3', 'durations': '3 2 3', 'error': ''}
+    assert rows[2]['error']
+
+    for jobs in ['1', '2']:
+        result = runner.invoke(cli.main, ['euclidean', '--input', '-', '--jobs', jobs], input='8 3\n8\n5 2\n')
+        assert result.exit_code == 0
+        rows = [json.loads(line) for line in result.output.splitlines()]
+        assert rows == [{'n_steps': 8, 'n_beats': 3, 'durations': [3, 2, 3]},
+                        {'error': 'Line 2: expected two integers!'},
+                        {'n_steps': 5, 'n_beats': 2, 'durations': [3, 2]}]
+    assert runner.invoke(cli.main, ['euclidean']).exit_code != 0
+    result = runner.invoke(cli.main, ['euclidean', '--steps-beats', '8', '3', '--input', '-'], input='5 2\n')
+    assert result.exit_code == 2
+    assert '--steps-beats and --input are mutually exclusive!' in result.output
+
+
+def test_euclidean_stream():
+    """Test that workers only read the input a few chunks ahead, so an endless stream can be stopped."""
+    pairs = ((n_steps, 1, None) for n_steps in count(1))
+    rows = cli._euclidean_rows(pairs, 2, 4)
+    assert [row['n_steps'] for row in islice(rows, 10)] == list(range(1, 11))
+    rows.close()
+    assert next(pairs)[0] < 100
+
+
+def test_pattern_commands():
+    """Test the analysis commands on several patterns at once, in every notation."""
+    runner = CliRunner()
+    patterns = [[3, 3, 2], [1, 3, 4], [2, 2, 2, 3]]
+    text = '\n'.join(' '.join(map(str, durations)) for durations in patterns) + '\n# comment\n0 1\n'
+
+    result = runner.invoke(cli.main, ['uglyness'], input=text)
+    assert result.exit_code == 0
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert [row['line'] for row in rows] == [1, 2, 3, 5]
+    for row, durations in zip(rows, patterns):
+        assert row['durations'] == durations
+        assert row['uglyness'] == Bjorklund(durations).uglyness_profile()
+        assert row['total_uglyness'] == Bjorklund(durations).total_uglyness()
+    assert 'error' in rows[3]
+
+    result = runner.invoke(cli.main, ['is-bjorklund', '--notation', 'steps', '--format', 'csv', '10010100', '1 1 0 0'])
+    assert result.exit_code == 0
+    rows = list(csv.DictReader(io.StringIO(result.output)))
+    assert [row['is_bjorklund'] for row in rows] == ['true', 'false']
+
+    result = runner.invoke(cli.main, ['convert', '--notation', 'indices', '1 4 6 / 8', '0 1'])
+    assert result.exit_code == 0
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    x = Bjorklund([3, 2, 3], 1)
+    assert rows[0] == {'line': 1, 'durations': x.durations, 'offset': 1, 'steps': x.steps, 'indices': x.indices,
+                       'n_steps': 8}
+    assert 'error' in rows[1]
+
+    result = runner.invoke(cli.main, ['rotate', '--steps', '-1', '--durations', '1', '--to', 'steps', '3 2 3 / 1'])
+    assert result.exit_code == 0
+    x.rotate_durations(1)
+    x.rotate_steps(-1)
+    assert json.loads(result.output) == {'line': 1, 'steps': x.steps}
+
+    # Offsets that do not fit are errors of their row, and nothing else is written to the output.
+    result = runner.invoke(cli.main, ['rotate', '--durations', '1', '4 2 3 / 2', '5 / 9', '3 2 3 / 1'])
+    assert result.exit_code == 0
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert [row['line'] for row in rows] == [1, 2, 3]
+    assert 'error' in rows[0] and 'error' in rows[1]
+    assert rows[2]['durations'] == [3, 3, 2]
+    result = runner.invoke(cli.main, ['convert', '3 2 3 / 5', '--format', 'csv'])
+    assert result.exit_code == 0
+    rows = list(csv.DictReader(io.StringIO(result.output)))
+    assert rows[0]['error'] == 'Offset must be at least 0 and less than the last duration!'
+    result = runner.invoke(cli.main, ['convert', '--input', '-'], input='2 2 / -1\n2 2 / 1\n')
+    assert result.exit_code == 0
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert rows[0] == {'line': 1, 'error': 'Offset must be at least 0 and less than the last duration!'}
+    assert rows[1]['offset'] == 1 and 'error' not in rows[1]
+
+
+def test_profile():
+    """Test that --profile reports the counters of a command."""
+    runner = CliRunner()
+    result = runner.invoke(cli.main, ['--profile', 'uglyness', '3 3 2', '1 3 4'])
+    assert result.exit_code == 0
+    assert 'uglyness.total_uglyness' in result.output
+    assert 'bjorklund.Bjorklund.__init__' in result.output
+    assert not profiling.is_enabled()
+
+
+# Cumulative import time budget of `pytom.cli`, in microseconds. Most of it is click.
+IMPORT_TIME_BUDGET = 150000
+
+
+def imported_modules(*args):
+    """Run the console script with `python -X importtime` and return the cumulative import times by module."""
+    code = f"import sys; sys.argv = ['pytom'] + {list(args)!r}; from pytom.cli import main; main()"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    assert result.returncode == 0, result.stderr
+    modules = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def test_import_time():
+    """Test that the console script only imports what a command needs."""
+    modules = imported_modules('--help')
+    assert modules['pytom.cli'] < IMPORT_TIME_BUDGET
+    assert not {'numpy', 'anytree', 'pytom.libs.bjorklund', 'pytom.libs.euclid'} & set(modules)
+
+    modules = imported_modules('euclidean', '--steps-beats', '8', '3')
+    assert modules['pytom.cli'] < IMPORT_TIME_BUDGET
+    assert 'pytom.libs.bjorklund' in modules
+    assert not {'numpy', 'anytree', 'multiprocessing'} & set(modules)
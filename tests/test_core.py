@@ -0,0 +1,61 @@
+import unittest
+
+import hypothesis.strategies as st
+from hypothesis import given
+
+from pytom.libs import core, uglyness
+from pytom.libs.algebraic import Euclid as AlgebraicEuclid
+from pytom.libs.bjorklund import bjorklund
+from pytom.libs.euclid import Euclid
+from tests.helpers import reference_uglyness, reference_total_uglyness
+
+
+class CoreTest(unittest.TestCase):
+
+    def tearDown(self):
+        core.set_backend(None)
+
+    def test_select_backend(self):
+        for kernel, min_beats in core.NUMPY_MIN_BEATS.items():
+            self.assertIs(core.select_backend(kernel, min_beats - 1, 1000), core.PythonBackend)
+            self.assertIs(core.select_backend(kernel, min_beats, 1000), core.NumpyBackend)
+            # Sums that could overflow int64 always use Python integers.
+            self.assertIs(core.select_backend(kernel, 1000, 10 ** 9), core.PythonBackend)
+        core.set_backend('numpy')
+        self.assertIs(core.select_backend('squared_spans', 2, 8), core.NumpyBackend)
+        self.assertIs(core.select_backend('squared_spans', 1000, 10 ** 9), core.PythonBackend)
+        core.set_backend('python')
+        self.assertIs(core.select_backend('squared_spans', 1000, 10 ** 4), core.PythonBackend)
+        self.assertRaises(ValueError, core.set_backend, 'fortran')
+
+    def test_large_rhythms(self):
+        # The sums of the uglyness profile only fit in int64 for the first one, squared spans fit for both.
+        for n_steps, n_beats in [(70000, 30011), (10 ** 6, 30011)]:
+            pattern = bjorklund(n_steps, n_beats)
+            self.assertIs(core.select_backend('squared_spans', n_beats, n_steps), core.NumpyBackend)
+            profiles = []
+            for backend in ['python', 'numpy']:
+                core.set_backend(backend)
+                profiles.append(uglyness.uglyness_profile(pattern.indices, n_steps))
+            self.assertLess(max(abs(a - b) / a for a, b in zip(*profiles)), 1e-12)
+        self.assertIs(core.select_backend('uglyness_profile', 30011, 10 ** 6), core.PythonBackend)
+        self.assertAlmostEqual(profiles[0][0], 83327779784.48, places=2)
+
+    @given(st.integers(min_value=2, max_value=96), st.data())
+    def test_front_ends(self, n_steps, data):
+        n_beats = data.draw(st.integers(min_value=2, max_value=n_steps))
+        pattern = bjorklund(n_steps, n_beats)
+        # Both Euclid classes reduce the ratio, Bjorklund does not.
+        euclid, algebraic = Euclid(n_steps, n_beats), AlgebraicEuclid(n_steps, n_beats)
+        self.assertEqual(euclid.indices, algebraic.indices)
+        i = data.draw(st.integers(min_value=0, max_value=euclid.n_beats - 1))
+        for backend in ['python', 'numpy']:
+            core.set_backend(backend)
+            self.assertAlmostEqual(pattern.total_uglyness(), reference_total_uglyness(pattern.indices, n_steps))
+            expected = reference_total_uglyness(euclid.indices, euclid.n_steps)
+            self.assertAlmostEqual(euclid.total_uglyness(), expected)
+            self.assertAlmostEqual(algebraic.total_uglyness(), expected)
+            if euclid.n_beats > 1:
+                expected = reference_uglyness(euclid.indices, euclid.n_steps, i)
+                self.assertAlmostEqual(euclid.uglyness(i), expected)
+                self.assertAlmostEqual(algebraic.uglyness(i), expected)
@@ -0,0 +1,26 @@
+import unittest
+
+import hypothesis.strategies as st
+from hypothesis import given
+
+from pytom.libs.bjorklund import bjorklund
+from pytom.libs.euclid import euclid, iter_euclid, iter_euclid_steps
+
+
+class EuclidTest(unittest.TestCase):
+
+    @given(st.integers(min_value=-8, max_value=512), st.integers(min_value=-8, max_value=512))
+    def test_iter_euclid(self, n_steps, n_beats):
+        if n_steps <= 0 or n_beats <= 0 or n_beats > n_steps:
+            # Arguments are checked by the call, before anything is iterated.
+            self.assertRaises(ValueError, iter_euclid, n_steps, n_beats)
+            self.assertRaises(ValueError, iter_euclid_steps, n_steps, n_beats)
+        else:
+            self.assertEqual(list(iter_euclid(n_steps, n_beats)), euclid(n_steps, n_beats))
+            self.assertEqual(list(iter_euclid_steps(n_steps, n_beats)), bjorklund(n_steps, n_beats).steps)
+
+    def test_iter_euclid_large(self):
+        n_steps, n_beats = 3 * 10 ** 6 + 7, 1234567
+        durations = iter_euclid(n_steps, n_beats)
+        self.assertEqual(sum(durations), n_steps)
+        self.assertEqual(list(iter_euclid(n_steps, n_beats)), euclid(n_steps, n_beats))
@@ -0,0 +1,116 @@
+import io
+import unittest
+from unittest import mock
+
+import hypothesis.strategies as st
+from hypothesis import given, settings
+
+from pytom.libs import midi
+from pytom.libs.bjorklund import Bjorklund
+from pytom.libs.midi import render, step_events, write_midi
+from pytom.libs.polyrhythm import Polyrhythm
+
+voices = st.lists(st.lists(st.integers(min_value=1, max_value=6), min_size=1, max_size=6).map(Bjorklund),
+                  min_size=1, max_size=4)
+
+
+def read_vlq(data, i):
+    value = 0
+    while True:
+        value = value << 7 | data[i] & 0x7F
+        i += 1
+        if not data[i - 1] & 0x80:
+            return value, i
+
+
+def read_midi(data):
+    """Tempo, ticks per quarter note and (tick, status, note, velocity) events of a format 0 file."""
+    assert data[:4] == b'MThd' and int.from_bytes(data[4:8], 'big') == 6
+    assert int.from_bytes(data[8:10], 'big') == 0 and int.from_bytes(data[10:12], 'big') == 1
+    ppq = int.from_bytes(data[12:14], 'big')
+    assert data[14:18] == b'MTrk' and int.from_bytes(data[18:22], 'big') == len(data) - 22
+    i, time, status, tempo, events = 22, 0, None, None, []
+    while True:
+        delta, i = read_vlq(data, i)
+        time += delta
+        if data[i] == 0xFF:
+            kind, length = data[i + 1], data[i + 2]
+            if kind == 0x51:
+                tempo = int.from_bytes(data[i + 3:i + 6], 'big')
+            i += 3 + length
+            if kind == 0x2F:
+                assert i == len(data)
+                return tempo, ppq, events
+            continue
+        if data[i] & 0x80:
+            status, i = data[i], i + 1
+        events.append((time, status, data[i], data[i + 1]))
+        i += 2
+
+
+class MidiTest(unittest.TestCase):
+
+    @given(voices, st.integers(min_value=0, max_value=60))
+    def test_step_events(self, patterns, n_steps):
+        expected = sorted((start + index, number, min(duration, n_steps - start - index))
+                          for number, pattern in enumerate(patterns)
+                          for start in range(0, n_steps, pattern.n_steps)
+                          for index, duration in zip(pattern.indices, pattern.durations) if start + index < n_steps)
+        expected = ([x for x, _, _ in expected], [x for _, _, x in expected], [x for _, x, _ in expected])
+        self.assertEqual(step_events(patterns, n_steps), expected)
+        with mock.patch.object(midi, '_numpy', lambda: None):
+            self.assertEqual(step_events(patterns, n_steps), expected)
+
+        onsets, durations, numbers = render(patterns, tempo=90, subdivision=3, n_steps=n_steps)
+        self.assertEqual(numbers, expected[2])
+        for seconds, steps in zip(onsets + durations, expected[0] + expected[1]):
+            self.assertAlmostEqual(seconds, steps * 60 / 90 / 3)
+
+    @settings(deadline=None)
+    @given(voices, st.integers(min_value=0, max_value=200), st.sampled_from([1, 2, 3, 4, 6, 8]),
+           st.integers(min_value=20, max_value=300))
+    def test_write_midi(self, patterns, n_steps, subdivision, tempo):
+        f = io.BytesIO()
+        n_notes = write_midi(f, patterns, tempo, subdivision, n_steps, pitches=[60, 62, 64, 65], channel=2)
+        with mock.patch.object(midi, '_numpy', lambda: None):
+            g = io.BytesIO()
+            write_midi(g, patterns, tempo, subdivision, n_steps, pitches=[60, 62, 64, 65], channel=2)
+        self.assertEqual(f.getvalue(), g.getvalue())
+
+        microseconds, ppq, events = read_midi(f.getvalue())
+        self.assertEqual((microseconds, ppq), (round(60000000 / tempo), 480))
+        self.assertTrue(all(status == 0x92 for _, status, _, _ in events))
+        ticks = 480 // subdivision
+        onsets, durations, numbers = step_events(patterns, n_steps)
+        self.assertEqual(n_notes, len(onsets))
+        notes = sorted([(onset * ticks, 1, 100, [60, 62, 64, 65][number]) for onset, number in zip(onsets, numbers)] +
+                       [((onset + duration) * ticks, 0, 0, [60, 62, 64, 65][number])
+                        for onset, duration, number in zip(onsets, durations, numbers)])
+        self.assertEqual(sorted((time, velocity > 0, velocity, note) for time, _, note, velocity in events), notes)
+        # Every note is released before it is played again.
+        playing = set()
+        for _, _, note, velocity in events:
+            if velocity:
+                self.assertNotIn(note, playing)
+                playing.add(note)
+            else:
+                playing.remove(note)
+
+    def test_polyrhythm(self):
+        layers = [Bjorklund([3, 2, 3]), Bjorklund([2, 1])]
+        self.assertEqual(step_events(Polyrhythm(layers)), step_events(layers))
+        f = io.BytesIO()
+        self.assertEqual(write_midi(f, Polyrhythm(layers), n_steps=24 * 1000), 1000 * (3 * 3 + 2 * 8))
+        self.assertEqual(write_midi(io.BytesIO(), Bjorklund([1]), n_steps=0), 0)
+
+    def test_invalid(self):
+        f = io.BytesIO()
+        for kwargs in [{'tempo': 0}, {'subdivision': 7}, {'ppq': 1 << 15}, {'pitches': [128]}, {'pitches': []},
+                       {'velocity': 0}, {'channel': 16}, {'tempo': 1}, {'n_steps': -1}]:
+            self.assertRaises(ValueError, write_midi, f, Bjorklund([3, 2, 3]), **kwargs)
+        self.assertRaises(ValueError, write_midi, f, [Bjorklund([1 << 20])], subdivision=1)
+        self.assertRaises(ValueError, step_events, [])
+        self.assertRaises(ValueError, step_events, Bjorklund([]))
+        self.assertRaises(ValueError, write_midi, f, Bjorklund([]))
+        self.assertRaises(ValueError, step_events, Polyrhythm([[1, 0], [0, 0, 0]]))
+        self.assertRaises(ValueError, render, Bjorklund([1]), tempo=-1)
@@ -0,0 +1,46 @@
+import unittest
+from itertools import combinations
+
+import hypothesis.strategies as st
+from hypothesis import given
+
+from pytom.libs.necklace import necklaces
+from pytom.libs.rhythm import Rhythm
+
+
+def bitmap_to_rhythm(bitmap, n_steps):
+    return Rhythm.from_steps([bitmap >> i & 1 for i in range(n_steps)])
+
+
+class NecklaceTest(unittest.TestCase):
+
+    @given(st.integers(min_value=1, max_value=12), st.integers(min_value=1, max_value=12))
+    def test_necklaces(self, n_steps, n_beats):
+        if n_beats > n_steps:
+            self.assertRaises(ValueError, list, necklaces(n_steps, n_beats))
+            return
+        rhythms = [bitmap_to_rhythm(bitmap, n_steps) for bitmap in necklaces(n_steps, n_beats)]
+        reference = {Rhythm.from_steps([int(i in beats) for i in range(n_steps)])
+                     for beats in combinations(range(n_steps), n_beats)}
+        self.assertEqual(len(rhythms), len(reference))
+        self.assertEqual(set(rhythms), reference)
+
+    @given(st.integers(min_value=1, max_value=14), st.integers(min_value=1, max_value=14),
+           st.integers(min_value=1, max_value=5), st.data())
+    def test_shards_and_checkpoints(self, n_steps, n_beats, count, data):
+        if n_beats > n_steps:
+            return
+        everything = list(necklaces(n_steps, n_beats))
+        shards = [list(necklaces(n_steps, n_beats, shard=(index, count))) for index in range(count)]
+        self.assertEqual(sorted(sum(shards, [])), sorted(everything))
+
+        index = data.draw(st.integers(min_value=0, max_value=count - 1))
+        if shards[index]:
+            position = data.draw(st.integers(min_value=0, max_value=len(shards[index]) - 1))
+            resumed = necklaces(n_steps, n_beats, after=shards[index][position], shard=(index, count))
+            self.assertEqual(list(resumed), shards[index][position + 1:])
+
+    def test_invalid_checkpoints(self):
+        for after in [0, -1, 0b1011, 0b1000000, 0b1000001]:
+            self.assertRaises(ValueError, list, necklaces(6, 2, after=after))
+        self.assertRaises(ValueError, list, necklaces(6, 1, after=0))
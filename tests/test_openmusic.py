@@ -0,0 +1,82 @@
+import io
+import unittest
+from fractions import Fraction
+
+import hypothesis.strategies as st
+from hypothesis import given, settings
+
+from pytom.libs import openmusic
+from pytom.libs.algebraic import Euclid, RhythmTree
+from tests.helpers import nested_trees
+
+
+def structure(tree):
+    return [(tree.parent(node), tree.weight(node)) for node in range(len(tree))]
+
+
+class OpenMusicTest(unittest.TestCase):
+
+    @settings(deadline=None)
+    @given(nested_trees(), st.integers(min_value=1, max_value=16))
+    def test_round_trip(self, nested, chunk_size):
+        tree = RhythmTree.from_nested(nested)
+        text = openmusic.dumps(tree)
+        self.assertEqual(text.count('('), text.count(')'))
+
+        f = io.StringIO()
+        openmusic.dump(tree, f, chunk_size)
+        self.assertEqual(f.getvalue(), text)
+
+        parsed = openmusic.load(io.StringIO(text), chunk_size)
+        self.assertEqual(parsed.duration, tree.duration)
+        self.assertEqual(structure(parsed), structure(tree))
+        self.assertEqual(parsed.flatten(rests=True), tree.flatten(rests=True))
+
+    def test_stream(self):
+        trees = [RhythmTree.from_nested((n, Euclid(2 * n + 1, n))) for n in range(1, 50)]
+        f = io.StringIO()
+        openmusic.dump_all(trees, f, chunk_size=8)
+        f.seek(0)
+        parsed = list(openmusic.iter_load(f, chunk_size=5))
+        self.assertEqual([structure(tree) for tree in parsed], [structure(tree) for tree in trees])
+        self.assertEqual([tree.duration for tree in parsed], list(range(1, 50)))
+
+    def test_notation(self):
+        tree = openmusic.loads('''
+            (4/4 ((1 (1 1 1))
+                   -2 3))
+        ''')
+        self.assertEqual((tree.duration, tree.signature(0)), (1, (4, 4)))
+        self.assertEqual(openmusic.dumps(tree), '(4/4 ((1 (1 1 1)) -2 3))')
+        self.assertEqual(openmusic.dumps(openmusic.loads('(6/8 (1 1))')), '(6/8 (1 1))')
+        self.assertEqual(openmusic.dumps(openmusic.loads('(1/2 ())')), '(1/2 ())')
+        self.assertEqual(openmusic.loads('(1.5 (1 1))').duration, 1.5)
+        self.assertEqual(openmusic.dumps(openmusic.loads('(? (1 -2 (1 (1 1))))')), '(4 (1 -2 (1 (1 1))))')
+
+    def test_voice(self):
+        # Exported from OpenMusic: a voice in 4/4, 3/4 and 6/8 with a rest, a triplet and a nested group.
+        text = '(? ((4//4 (1 1 1 1)) (3//4 (-1 (1 (1 1 1)) 1)) (6//8 (3 (3 (1 -1 (1 (1 1))))))))'
+        tree = openmusic.loads(text)
+        self.assertEqual(openmusic.dumps(tree), text)
+        self.assertEqual(tree.duration, Fraction(5, 2))
+        self.assertEqual([tree.signature(node) for node in tree.children(0)], [(4, 4), (3, 4), (6, 8)])
+        onsets, durations = tree.flatten(rests=True)
+        self.assertEqual(onsets[4:9], [1, Fraction(5, 4), Fraction(4, 3), Fraction(17, 12), Fraction(3, 2)])
+        self.assertEqual(durations[4:9], [-Fraction(1, 4), Fraction(1, 12), Fraction(1, 12), Fraction(1, 12),
+                                          Fraction(1, 4)])
+        self.assertEqual(onsets[9:], [Fraction(7, 4), Fraction(17, 8), Fraction(9, 4), Fraction(19, 8),
+                                      Fraction(39, 16)])
+        self.assertEqual(sum(abs(x) for x in durations), Fraction(5, 2))
+
+        # Older versions write time signatures as lists.
+        tree = openmusic.loads('(? (((4 4) (1 1 1 1)) ((6 8) (1 1))))')
+        self.assertEqual(openmusic.dumps(tree), '(? ((4//4 (1 1 1 1)) (6//8 (1 1))))')
+        self.assertEqual(tree.flatten()[0], [0, Fraction(1, 4), Fraction(1, 2), Fraction(3, 4), 1, Fraction(11, 8)])
+        # With a duration, measures are proportions.
+        self.assertEqual(openmusic.loads('(2 ((4//4 (1)) (4//4 (1))))').flatten()[0], [0, 1])
+
+    def test_invalid(self):
+        for text in ['', '(1 (1 1)) (1 (1))', '(1 (1 1)', '(1 1 1)', '1 (1 1)', '(? ())', '(1 (1.0 1))',
+                     '(1 (a 1))', '(0 (1))', '(1 (0 1))', '(1 ((1 1)))', '(1 (1 1)))', '(0/4 (1))', '(? ((4//0 (1))))',
+                     '(? ((4//4 (1)) 1))', '(? ((1 ((4//4 (1))))))', '(? (((4 a) (1))))', '(? (((4) (1))))']:
+            self.assertRaises(ValueError, openmusic.loads, text)
@@ -0,0 +1,40 @@
+import unittest
+
+import hypothesis.strategies as st
+from hypothesis import given
+
+from pytom.libs.bjorklund import bjorklund
+from pytom.libs.pattern import EuclideanPattern
+
+
+class EuclideanPatternTest(unittest.TestCase):
+
+    @given(st.integers(min_value=1, max_value=128), st.integers(min_value=1, max_value=128),
+           st.integers(min_value=-256, max_value=256), st.integers(-160, 160), st.integers(-160, 160),
+           st.sampled_from([None, 1, 2, 3, -1, -2]))
+    def test_consistent_with_bjorklund(self, n_steps, n_beats, rotation, start, stop, stride):
+        if n_beats > n_steps:
+            self.assertRaises(ValueError, EuclideanPattern, n_steps, n_beats)
+            return
+        pattern = EuclideanPattern(n_steps, n_beats, rotation)
+        reference = bjorklund(n_steps, n_beats)
+        reference.rotate_steps(rotation)
+        steps = reference.steps
+
+        self.assertEqual(list(pattern), steps)
+        self.assertEqual(pattern[start:stop:stride], steps[start:stop:stride])
+        self.assertEqual([pattern.onset(j) for j in range(n_beats)], reference.indices)
+        self.assertEqual(pattern.to_bjorklund().steps, steps)
+        self.assertEqual((pattern.n_beats, pattern.count(0)), (reference.n_beats, steps.count(0)))
+        if -n_steps <= start < n_steps:
+            self.assertEqual(pattern[start], steps[start])
+        else:
+            self.assertRaises(IndexError, pattern.__getitem__, start)
+
+    def test_huge_pattern(self):
+        n_steps, n_beats = 10 ** 9, 999983
+        pattern = EuclideanPattern(n_steps, n_beats, rotation=12345)
+        onsets = [pattern.onset(j) for j in range(n_beats - 3, n_beats)] + [pattern.onset(0) + n_steps]
+        self.assertTrue(all(pattern[onset % n_steps] == 1 for onset in onsets))
+        self.assertEqual({b - a for a, b in zip(onsets, onsets[1:])} - {1000, 1001}, set())
+        self.assertEqual(pattern.rank(n_steps), n_beats)
@@ -0,0 +1,56 @@
+import unittest
+from unittest import mock
+
+import hypothesis.strategies as st
+from hypothesis import given
+
+from pytom.libs import polyrhythm
+from pytom.libs.bjorklund import Bjorklund, bjorklund
+from pytom.libs.polyrhythm import Polyrhythm
+
+layers = st.lists(st.lists(st.integers(min_value=0, max_value=1), min_size=1, max_size=9), min_size=1, max_size=6)
+
+
+class PolyrhythmTest(unittest.TestCase):
+
+    @given(layers, st.integers(min_value=-50, max_value=50), st.integers(min_value=0, max_value=100))
+    def test_window(self, steps, start, size):
+        combined = Polyrhythm(steps)
+        columns = [[layer[i % len(layer)] for layer in steps] for i in range(start, start + size)]
+        expected = [sum(column) for column in columns]
+        self.assertEqual(combined.coincidences(start, size), expected)
+        with mock.patch.object(polyrhythm, '_numpy', lambda: None):
+            self.assertEqual(combined.coincidences(start, size), expected)
+        self.assertEqual(combined.union(start, size), [int(any(column)) for column in columns])
+        self.assertEqual(combined.intersection(start, size), [int(all(column)) for column in columns])
+
+    @given(layers, st.integers(min_value=1, max_value=50))
+    def test_cycle(self, steps, chunk_size):
+        combined = Polyrhythm(steps)
+        coincidences = combined.coincidences()
+        self.assertEqual(len(coincidences), combined.n_steps)
+        self.assertTrue(all(combined.n_steps % len(layer) == 0 for layer in steps))
+        self.assertEqual([x for _, chunk in combined.chunks(chunk_size) for x in chunk], coincidences)
+        self.assertEqual([start for start, _ in combined.chunks(chunk_size)],
+                         list(range(0, combined.n_steps, chunk_size)))
+        self.assertEqual(combined.histogram(chunk_size),
+                         [coincidences.count(k) for k in range(combined.n_layers + 1)])
+
+    def test_euclidean_layers(self):
+        # Coprime layers have a cycle that is too long to unpack, but can be counted a chunk at a time.
+        rhythms = [bjorklund(n, n // 2) for n in [7, 9, 10, 11, 13, 17, 19]]
+        combined = Polyrhythm(rhythms)
+        self.assertEqual(combined.n_steps, 7 * 9 * 10 * 11 * 13 * 17 * 19)
+        histogram = combined.histogram()
+        self.assertEqual(sum(histogram), combined.n_steps)
+        # Every combination of steps of the layers happens exactly once in the cycle.
+        self.assertEqual(histogram[-1], 3 * 4 * 5 * 5 * 6 * 8 * 9)
+        self.assertEqual(histogram[0], 4 * 5 * 5 * 6 * 7 * 9 * 10)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Polyrhythm, [])
+        self.assertRaises(ValueError, Polyrhythm, [[]])
+        self.assertRaises(ValueError, Polyrhythm, [Bjorklund([])])
+        self.assertRaises(ValueError, Polyrhythm, [[1, 2]])
+        self.assertRaises(ValueError, Polyrhythm([[1]]).union, 0, -1)
+        self.assertRaises(ValueError, lambda: list(Polyrhythm([[1]]).chunks(0)))
@@ -0,0 +1,58 @@
+import unittest
+
+from pytom.libs import profiling
+from pytom.libs.bjorklund import Bjorklund, bjorklund
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def tearDown(self):
+        profiling.disable()
+        profiling.reset()
+
+    def test_disabled_by_default(self):
+        profiling.reset()
+        bjorklund(13, 5).total_uglyness()
+        self.assertFalse(profiling.is_enabled())
+        self.assertEqual(profiling.stats(), {})
+
+    def test_constructions(self):
+        # Each construction is counted once, by the function that was called.
+        for construct, name in [(lambda: Bjorklund.from_steps([1, 0, 1]), 'from_steps'),
+                                (lambda: Bjorklund.from_indices_and_n_steps([0, 2], 3), 'from_indices_and_n_steps'),
+                                (lambda: Bjorklund.from_mask(0b101, 3), 'from_mask'), (lambda: bjorklund(8, 3), None)]:
+            with profiling.profile() as construction_stats:
+                construct()
+            constructions = {key: value.calls for key, value in construction_stats().items()
+                             if value.category == 'construction'}
+            self.assertEqual(constructions, {f'bjorklund.Bjorklund.{name}' if name else 'bjorklund.bjorklund': 1})
+
+    def test_counters(self):
+        with profiling.profile() as stats:
+            x = Bjorklund([3, 2, 3], 1)
+            x.rotate_steps(1)
+            x.durations
+            x.rotate_durations(2)
+            x.uglyness_profile()
+            x.total_uglyness()
+        self.assertFalse(profiling.is_enabled())
+
+        counters = stats()
+        self.assertEqual(counters['bjorklund.Bjorklund.__init__'].calls, 1)
+        self.assertEqual(counters['bjorklund.Bjorklund.rotate_steps'].calls, 1)
+        self.assertEqual(counters['bjorklund.Bjorklund.rotate_durations'].calls, 1)
+        # Steps are rotated as a bitmask, and durations are read back from it.
+        self.assertEqual(counters['core.steps_to_mask'].calls, 1)
+        self.assertEqual(counters['core.mask_to_indices'].calls, 1)
+        self.assertEqual(counters['uglyness.uglyness_profile'].calls, 1)
+        self.assertEqual(counters['uglyness.total_uglyness'].calls, 1)
+        self.assertEqual(counters['uglyness.total_uglyness'].category, 'uglyness')
+        self.assertTrue(all(counter.seconds >= 0 for counter in counters.values()))
+        self.assertIn('bjorklund.Bjorklund.rotate_steps', profiling.report())
+
+        # Counters are kept until the next profile or reset.
+        bjorklund(8, 3)
+        self.assertEqual(stats(), counters)
+        with profiling.profile():
+            bjorklund(8, 3)
+        self.assertEqual(set(stats()), {'bjorklund.bjorklund'})
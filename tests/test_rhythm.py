@@ -0,0 +1,51 @@
+import pickle
+import unittest
+
+import hypothesis.strategies as st
+from hypothesis import given
+
+from pytom.libs.bjorklund import Bjorklund
+from pytom.libs.rhythm import Rhythm
+
+
+class RhythmTest(unittest.TestCase):
+
+    @given(st.lists(st.integers(min_value=1, max_value=4), max_size=32),
+           st.lists(st.integers(min_value=1, max_value=4), max_size=32))
+    def test_equality(self, durations, other):
+        reference = Bjorklund(durations) == Bjorklund(other)
+        self.assertEqual(Rhythm(durations) == Rhythm(other), reference)
+        if reference:
+            self.assertEqual(hash(Rhythm(durations)), hash(Rhythm(other)))
+
+    @given(st.lists(st.integers(min_value=1, max_value=4), min_size=1, max_size=32), st.integers(-64, 64))
+    def test_rotations(self, durations, n):
+        rhythm = Rhythm(durations, durations[-1] - 1)
+        bjorklund = rhythm.to_bjorklund()
+        self.assertEqual(rhythm.steps, tuple(bjorklund.steps))
+        self.assertEqual(rhythm.indices, tuple(bjorklund.indices))
+
+        rotated = rhythm.rotate_steps(n)
+        bjorklund.rotate_steps(n)
+        self.assertEqual((rotated.durations, rotated.offset), (tuple(bjorklund.durations), bjorklund.offset))
+        self.assertEqual(rotated, rhythm)
+
+        rotated = rhythm.rotate_durations(n)
+        self.assertEqual(rotated, rhythm)
+        self.assertEqual(hash(rotated), hash(rhythm))
+
+    @given(st.lists(st.integers(min_value=1, max_value=128), max_size=64))
+    def test_pickle(self, durations):
+        rhythm = Rhythm(durations)
+        restored = pickle.loads(pickle.dumps(rhythm))
+        self.assertEqual((restored.durations, restored.offset), (rhythm.durations, rhythm.offset))
+        self.assertEqual(hash(restored), hash(rhythm))
+
+    def test_immutable(self):
+        rhythm = Rhythm([3, 2, 3])
+        with self.assertRaises(AttributeError):
+            rhythm.offset = 1
+        with self.assertRaises(AttributeError):
+            rhythm.foo = 1
+        self.assertRaises(ValueError, Rhythm, [3, 0, 3])
+        self.assertRaises(ValueError, Rhythm, [3, 2, 3], 3)
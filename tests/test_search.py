@@ -0,0 +1,77 @@
+import unittest
+from itertools import combinations
+
+import hypothesis.strategies as st
+from hypothesis import given, settings
+
+from pytom.libs import uglyness
+from pytom.libs.bjorklund import bjorklund
+from pytom.libs.rhythm import Rhythm
+from pytom.libs.search import least_ugly
+
+
+def brute_force(n_steps, n_beats, fixed, forbidden, min_duration, max_duration):
+    scores = {}
+    for indices in combinations(range(n_steps), n_beats):
+        if not set(fixed) <= set(indices) or set(forbidden) & set(indices):
+            continue
+        durations = [b - a for a, b in zip(indices, indices[1:])] + [indices[0] + n_steps - indices[-1]]
+        if min(durations) < min_duration or max(durations) > max_duration:
+            continue
+        # Without constraints, rotations of the same rhythm are only reported once.
+        key = Rhythm(durations).canonical if not fixed and not forbidden else indices
+        scores[key] = uglyness.total_uglyness(list(indices), n_steps)
+    return sorted(scores.values())
+
+
+class SearchTest(unittest.TestCase):
+
+    @settings(deadline=None)
+    @given(st.integers(min_value=1, max_value=10), st.data())
+    def test_least_ugly(self, n_steps, data):
+        n_beats = data.draw(st.integers(min_value=1, max_value=n_steps))
+        fixed = data.draw(st.lists(st.integers(min_value=0, max_value=n_steps - 1), max_size=min(2, n_beats),
+                                   unique=True))
+        forbidden = data.draw(st.lists(st.integers(min_value=0, max_value=n_steps - 1), max_size=3, unique=True))
+        forbidden = [x for x in forbidden if x not in fixed]
+        min_duration = data.draw(st.integers(min_value=1, max_value=2))
+        max_duration = data.draw(st.integers(min_value=2, max_value=n_steps + 1))
+        top = data.draw(st.integers(min_value=1, max_value=4))
+
+        results = least_ugly(n_steps, n_beats, fixed, forbidden, min_duration, max_duration, top)
+        reference = brute_force(n_steps, n_beats, fixed, forbidden, min_duration, max_duration)
+        scores = [score for score, _ in results]
+        for score, rhythm in results:
+            self.assertEqual(len(rhythm.durations), n_beats)
+            self.assertEqual(sum(rhythm.durations), n_steps)
+            self.assertAlmostEqual(score, rhythm.total_uglyness())
+            self.assertTrue(set(fixed) <= set(rhythm.indices))
+            self.assertFalse(set(forbidden) & set(rhythm.indices))
+            self.assertTrue(min_duration <= min(rhythm.durations) and max(rhythm.durations) <= max_duration)
+        if not fixed and not forbidden:
+            self.assertEqual(len({Rhythm(rhythm.durations) for _, rhythm in results}), len(results))
+        reference = reference[:top]
+        self.assertEqual(len(scores), len(reference))
+        for score, expected in zip(scores, reference):
+            self.assertAlmostEqual(score, expected)
+
+    @settings(deadline=None)
+    @given(st.integers(min_value=2, max_value=48), st.data())
+    def test_bjorklund_is_least_ugly(self, n_steps, data):
+        n_beats = data.draw(st.integers(min_value=1, max_value=n_steps))
+        (score, rhythm), = least_ugly(n_steps, n_beats)
+        self.assertAlmostEqual(score, bjorklund(n_steps, n_beats).total_uglyness())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, least_ugly, 8, 9)
+        self.assertRaises(ValueError, least_ugly, 8, 3, fixed=[8])
+        self.assertRaises(ValueError, least_ugly, 8, 3, fixed=[1], forbidden=[1])
+        self.assertRaises(ValueError, least_ugly, 8, 2, fixed=[0, 1, 2])
+        self.assertRaises(ValueError, least_ugly, 8, 3, top=0)
+        self.assertEqual(least_ugly(8, 3, min_duration=4), [])
+
+    def test_many_fixed_steps(self):
+        fixed = [12, 26, 48, 60, 62]
+        (score, rhythm), = least_ugly(64, 20, fixed=fixed)
+        self.assertTrue(set(fixed) <= set(rhythm.indices))
+        self.assertAlmostEqual(score, 9.4)
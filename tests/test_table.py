@@ -0,0 +1,39 @@
+import unittest
+
+import hypothesis.strategies as st
+from hypothesis import given
+
+from pytom.libs.bjorklund import bjorklund
+from pytom.libs.euclid import bjorklund_phase
+from pytom.libs.table import euclidean_table
+
+
+class EuclideanTableTest(unittest.TestCase):
+
+    @given(st.integers(min_value=1, max_value=256), st.integers(min_value=1, max_value=256))
+    def test_bjorklund_phase(self, n_steps, n_beats):
+        if n_beats > n_steps:
+            self.assertRaises(ValueError, bjorklund_phase, n_steps, n_beats)
+        else:
+            phase = bjorklund_phase(n_steps, n_beats)
+            indices = [(i * n_steps + phase) // n_beats for i in range(n_beats)]
+            self.assertEqual(indices, bjorklund(n_steps, n_beats).indices)
+
+    @given(st.integers(min_value=1, max_value=24), st.integers(min_value=0, max_value=24))
+    def test_euclidean_table(self, min_steps, extra):
+        max_steps = min_steps + extra
+        table = euclidean_table(max_steps, min_steps)
+        self.assertEqual(table.n_patterns, sum(range(min_steps, max_steps + 1)))
+        for n_steps in range(min_steps, max_steps + 1):
+            for n_beats in range(1, n_steps + 1):
+                row = table.row(n_steps, n_beats)
+                reference = bjorklund(n_steps, n_beats)
+                self.assertEqual((table.n_steps[row], table.n_beats[row]), (n_steps, n_beats))
+                self.assertEqual(table.durations_of(row).tolist(), reference.durations)
+                self.assertEqual(table.indices_of(row).tolist(), reference.indices)
+                self.assertEqual(table.steps_of(row).tolist(), reference.steps)
+
+    def test_euclidean_table_exceptions(self):
+        self.assertRaises(ValueError, euclidean_table, 0)
+        self.assertRaises(ValueError, euclidean_table, 4, 8)
+        self.assertRaises(ValueError, euclidean_table(8).row, 9, 3)
@@ -0,0 +1,38 @@
+import unittest
+from math import gcd
+
+import hypothesis.strategies as st
+import numpy as np
+from hypothesis import given
+
+from pytom.libs.tuning import EDO
+
+
+class EDOTest(unittest.TestCase):
+
+    @given(st.integers(min_value=1, max_value=72), st.integers(min_value=-100, max_value=100), st.data())
+    def test_mapping(self, n, generator, data):
+        if gcd(generator, n) != 1:
+            self.assertRaises(ValueError, EDO, n, generator)
+            return
+        edo = EDO(n, generator, reference=0)
+        self.assertEqual(sorted(edo.degree_table), list(range(n)))
+
+        chords = data.draw(st.lists(st.lists(st.integers(min_value=0, max_value=3 * n), max_size=5), max_size=10))
+        flat = [i for chord in chords for i in chord]
+        degrees = [(i * generator) % n for i in flat]
+        self.assertEqual(edo.degrees(flat), degrees)
+        self.assertEqual(edo.cents(flat), [degree * 1200 / n for degree in degrees])
+        self.assertEqual(list(edo.names(chords)), [[str((i * generator) % n) for i in chord] for chord in chords])
+
+        array = np.array(flat, dtype=int).reshape(-1, 1)
+        self.assertEqual(edo.degrees(array).tolist(), [[degree] for degree in degrees])
+        self.assertEqual(edo.cents(array).tolist(), [[degree * 1200 / n] for degree in degrees])
+        self.assertEqual(edo.names(array).tolist(), [[str(degree)] for degree in degrees])
+        self.assertEqual([names.tolist() for names in edo.names(np.array(chord, dtype=int) for chord in chords)],
+                         list(edo.names(chords)))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, EDO, 0, 1)
+        self.assertRaises(ValueError, EDO, 24, 2)
+        self.assertRaises(ValueError, EDO, 12, 7, ['c'])
@@ -0,0 +1,32 @@
+import unittest
+
+from pytom.libs.utils import memoize
+
+
+class MemoizeTest(unittest.TestCase):
+
+    def test_memoize(self):
+        calls = []
+
+        @memoize(maxsize=2)
+        def double(x):
+            calls.append(x)
+            return 2 * x
+
+        self.assertEqual([double(x) for x in [1, 2, 1, 3, 2]], [2, 4, 2, 6, 4])
+        self.assertEqual(calls, [1, 2, 3, 2])
+        self.assertEqual(double.cache_info(), (1, 4, 2, 2))
+
+        double.set_maxsize(1)
+        self.assertEqual(double.cache_info().currsize, 1)
+        double.set_maxsize(0)
+        double(5)
+        self.assertEqual(double.cache_info().currsize, 0)
+
+        double.set_maxsize(None)
+        for x in range(100):
+            double(x)
+        self.assertEqual(double.cache_info().currsize, 100)
+
+        double.cache_clear()
+        self.assertEqual(double.cache_info(), (0, 0, None, 0))